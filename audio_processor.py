@@ -3,11 +3,17 @@ Audio processing module for the Voice-to-Music Generator
 Using only Python standard library
 """
 
+import sys
 import array
 import wave
 import math
 import logging
+import operator
+from itertools import repeat
 from config import *
+from utils import atomic_write
+from metrics import METRICS, ANALYSE
+from wav_source import WavSource, WAVE_FORMAT_PCM
 
 logger = logging.getLogger(__name__)
 
@@ -16,31 +22,133 @@ class AudioProcessor:
         self.sample_rate = SAMPLE_RATE
         self.channels = CHANNELS
         self.dtype = DTYPE
+        self.buffer = None
         logger.info("AudioProcessor initialized")
 
+    def open_stream(self, capacity_ms=RING_BUFFER_MS):
+        """
+        Start a rolling buffer holding the last capacity_ms of continuous
+        capture; returns the RingBuffer
+        """
+        self.buffer = RingBuffer(self.sample_rate * capacity_ms // 1000, self.sample_rate)
+        return self.buffer
+
+    def process_block(self, block):
+        """
+        Append one captured block of int16 PCM to the rolling buffer
+        (opened on first use) and return the buffer, whose statistics and
+        windows now include the block
+        """
+        if self.buffer is None:
+            self.open_stream()
+        self.buffer.write(block)
+        return self.buffer
+
     def process_audio(self, data):
         """
         Basic audio processing using standard library
+
+        data is either raw int16 PCM (any bytes-like object) or the path of
+        a WAV file, which is analyzed in chunks without loading it whole.
         """
         try:
-            # Convert data to array
-            audio_array = array.array('h', data)
-            
-            # Basic audio analysis
-            max_amplitude = max(abs(min(audio_array)), abs(max(audio_array)))
-            
-            analysis = {
-                'max_amplitude': max_amplitude,
-                'length': len(audio_array),
-                'sample_rate': self.sample_rate
-            }
+            if isinstance(data, str):
+                return self.analyze_wav(data)
+
+            # Analyze the buffer in place through a memoryview, chunk by chunk
+            view = memoryview(data).cast('B')
+            stats = _SampleStats()
+            chunk_bytes = PROCESS_CHUNK_FRAMES * 2
+            with METRICS.timer(ANALYSE):
+                for start in range(0, len(view), chunk_bytes):
+                    stats.update(_sample_view(view[start:start + chunk_bytes]))
+            METRICS.increment('samples_analysed', stats.count)
             
+            analysis = stats.summary()
+            analysis['sample_rate'] = self.sample_rate
             return analysis
 
         except Exception as e:
             logger.error(f"Error during audio processing: {str(e)}")
             raise
 
+    def analyze_wav(self, path, chunk_frames=PROCESS_CHUNK_FRAMES):
+        """
+        Compute peak, RMS, length and clipping count of a WAV file in a
+        single streamed pass; memory use is bounded by one chunk. 16-bit
+        files are read with the standard library, other sample formats are
+        converted to 16-bit blocks on the way (needs NumPy).
+        """
+        with WavSource(path) as source:
+            if source.format_tag != WAVE_FORMAT_PCM or source.sample_width != 2:
+                return self._analyze_converted(source, chunk_frames)
+
+        with wave.open(path, 'rb') as wav_file, METRICS.timer(ANALYSE):
+            _check_sample_width(wav_file)
+            stats = _SampleStats()
+            while True:
+                chunk = wav_file.readframes(chunk_frames)
+                if not chunk:
+                    break
+                stats.update(_to_samples(chunk))
+            METRICS.increment('samples_analysed', stats.count)
+            
+            analysis = stats.summary()
+            analysis['length'] = wav_file.getnframes()
+            analysis['channels'] = wav_file.getnchannels()
+            analysis['sample_rate'] = wav_file.getframerate()
+            analysis['duration'] = analysis['length'] / analysis['sample_rate']
+            return analysis
+
+    def _analyze_converted(self, source, chunk_frames):
+        from convert import iter_converted
+
+        with METRICS.timer(ANALYSE):
+            stats = _SampleStats()
+            for block in iter_converted(source, source.sample_rate, source.channels, 's16',
+                                        dither=False, block_frames=chunk_frames):
+                stats.update(_sample_view(block.tobytes()))
+            METRICS.increment('samples_analysed', stats.count)
+
+            analysis = stats.summary()
+            analysis['length'] = source.frames
+            analysis['channels'] = source.channels
+            analysis['sample_rate'] = source.sample_rate
+            analysis['duration'] = analysis['length'] / analysis['sample_rate']
+            return analysis
+
+    def normalize_wav(self, input_path, output_path, chunk_frames=PROCESS_CHUNK_FRAMES):
+        """
+        Normalize a 16-bit WAV file to full scale as a two-pass streamed
+        rewrite: the first pass finds the peak, the second scales each chunk
+        and writes it out. Returns the scale factor applied.
+        """
+        try:
+            with WavSource(input_path) as source:
+                if source.format_tag != WAVE_FORMAT_PCM or source.sample_width != 2:
+                    raise ValueError(f"Only 16-bit PCM WAV files can be normalized, "
+                                     f"got {8 * source.sample_width}-bit")
+            peak = self.analyze_wav(input_path, chunk_frames)['max_amplitude']
+            scale = MAX_AMPLITUDE / peak if peak > 0 else 1.0
+            
+            with wave.open(input_path, 'rb') as source, atomic_write(output_path) as output_file:
+                with wave.open(output_file, 'wb') as target:
+                    target.setparams(source.getparams())
+                    while True:
+                        chunk = source.readframes(chunk_frames)
+                        if not chunk:
+                            break
+                        samples = _scale_samples(_to_samples(chunk), scale)
+                        if sys.byteorder == 'big':
+                            samples.byteswap()
+                        target.writeframesraw(samples)
+            
+            return scale
+
+        except Exception as e:
+            logger.error(f"Error during normalization: {str(e)}")
+            raise
+
     def _normalize_audio(self, audio_data):
         """
         Normalize audio data using standard library
@@ -49,8 +157,162 @@ class AudioProcessor:
             max_val = max(abs(min(audio_data)), abs(max(audio_data)))
             if max_val > 0:
                 scale = MAX_AMPLITUDE / max_val
-                return [int(sample * scale) for sample in audio_data]
+                return _scale_samples(audio_data, scale)
             return audio_data
         except Exception as e:
             logger.error(f"Error during normalization: {str(e)}")
-            return audio_data
\ No newline at end of file
+            return audio_data
+
+class _SampleStats:
+    """
+    Running peak, RMS and clipping statistics over int16 sample chunks
+    """
+    def __init__(self):
+        self.count = 0
+        self.peak = 0
+        self.sum_squares = 0
+        self.clipped = 0
+
+    def update(self, samples):
+        """
+        Add a chunk (array('h') or 'h' memoryview); returns its peak and
+        sum of squares
+        """
+        if not samples:
+            return 0, 0
+        peak = max(abs(min(samples)), abs(max(samples)))
+        sum_squares = sum(map(operator.mul, samples, samples))
+        self.count += len(samples)
+        self.peak = max(self.peak, peak)
+        self.sum_squares += sum_squares
+        self.clipped += operator.countOf(samples, MAX_AMPLITUDE) + operator.countOf(samples, -MAX_AMPLITUDE - 1)
+        return peak, sum_squares
+
+    def summary(self):
+        return {
+            'max_amplitude': self.peak,
+            'rms': math.sqrt(self.sum_squares / self.count) if self.count else 0.0,
+            'clipped_samples': self.clipped,
+            'length': self.count
+        }
+
+class RingBuffer:
+    """
+    Fixed-capacity int16 ring buffer over one preallocated array
+
+    The ring is stored twice, back to back, so the most recent samples are
+    always a single contiguous memoryview (see last()) whatever the write
+    position; analysers read them in place. Statistics are updated as each
+    block is written:
+        stats           peak, RMS and clipping of everything written
+        block_peak/rms  of the last block
+        window_rms()    of the buffered samples, kept by adding the energy
+                        of new samples and subtracting what they overwrite
+    Writing copies the block into the array and allocates no buffers.
+    """
+    def __init__(self, capacity, sample_rate=SAMPLE_RATE):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self._data = array.array('h', bytes(4 * capacity))
+        self._view = memoryview(self._data)
+        self.position = 0  # Index the next sample goes to
+        self.filled = 0
+        self.frames_written = 0
+        self.stats = _SampleStats()
+        self.block_peak = 0
+        self.block_rms = 0.0
+        self._window_squares = 0
+
+    def write(self, block):
+        """Append little-endian int16 PCM (bytes-like or array('h'))"""
+        samples = _sample_view(block)
+        count = len(samples)
+        if not count:
+            return
+        self.block_peak, block_squares = self.stats.update(samples)
+        self.block_rms = math.sqrt(block_squares / count)
+        self.frames_written += count
+
+        capacity = self.capacity
+        if count >= capacity:
+            samples = samples[count - capacity:]
+            count = capacity
+            self._window_squares = sum(map(operator.mul, samples, samples))
+            self.filled = capacity
+        else:
+            overwritten = self.filled + count - capacity
+            if overwritten > 0:
+                oldest = self.position + capacity - self.filled
+                stale = self._view[oldest:oldest + overwritten]
+                self._window_squares -= sum(map(operator.mul, stale, stale))
+                self.filled = capacity
+            else:
+                self.filled += count
+            self._window_squares += block_squares
+
+        view = self._view
+        position = self.position
+        first = min(count, capacity - position)
+        for offset in (position, position + capacity):
+            view[offset:offset + first] = samples[:first]
+        if count > first:
+            rest = count - first
+            view[0:rest] = samples[first:]
+            view[capacity:capacity + rest] = samples[first:]
+        self.position = (position + count) % capacity
+
+    def last(self, frames=None):
+        """
+        The most recent frames samples (all buffered ones by default), oldest
+        first, as a read-only 'h' memoryview into the buffer. The view is
+        only valid until the next write overwrites it.
+        """
+        frames = self.filled if frames is None else min(frames, self.filled)
+        end = self.position + self.capacity
+        return self._view[end - frames:end].toreadonly()
+
+    def last_ms(self, milliseconds):
+        """The most recent milliseconds of audio, see last()"""
+        return self.last(self.sample_rate * milliseconds // 1000)
+
+    def window_rms(self):
+        """RMS of the buffered samples"""
+        return math.sqrt(self._window_squares / self.filled) if self.filled else 0.0
+
+    def window_peak(self):
+        """Peak absolute amplitude of the buffered samples"""
+        window = self.last()
+        return max(abs(min(window)), abs(max(window))) if self.filled else 0
+
+    def __len__(self):
+        return self.filled
+
+def _check_sample_width(wav_file):
+    if wav_file.getsampwidth() != 2:
+        raise ValueError(f"Only 16-bit WAV files are supported, got {8 * wav_file.getsampwidth()}-bit")
+
+def _to_samples(chunk):
+    """Interpret little-endian int16 PCM bytes as an array('h')"""
+    samples = array.array('h')
+    samples.frombytes(chunk)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+def _sample_view(chunk):
+    """
+    View int16 PCM as 'h' samples without copying; little-endian bytes are
+    copied into an array('h') only on big-endian hosts
+    """
+    view = memoryview(chunk)
+    if view.format == 'h':
+        return view
+    if sys.byteorder == 'big':
+        return _to_samples(view)
+    return view.cast('B').cast('h')
+
+def _scale_samples(samples, scale):
+    """Multiply samples by scale, truncating like int(), into an array('h')"""
+    return array.array('h', map(int, map(operator.mul, samples, repeat(float(scale)))))
@@ -0,0 +1,111 @@
+"""
+Batch generation module for the Voice-to-Music Generator
+Using only Python standard library
+"""
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from config import *
+from music_generator import MusicGenerator
+from utils import atomic_write, generate_filename, get_file_path
+
+logger = logging.getLogger(__name__)
+
+# One warmed generator per worker process, created by _init_worker
+_worker_generator = None
+_worker_output_dir = None
+
+def load_prompts(path):
+    """
+    Load prompts from a text file (one prompt per line) or a JSONL file
+    (one object per line with a "text" key and an optional "id" key)
+
+    A line that starts with "{" but is not valid JSON is taken as a plain
+    text prompt. A JSON object without a "text" string is kept as a prompt
+    with an "error", reported in the manifest instead of failing the batch.
+    """
+    prompts = []
+    with open(path, encoding="utf-8") as prompt_file:
+        for line_number, line in enumerate(prompt_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = None
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    pass
+            if record is None:
+                prompts.append({'id': str(line_number), 'text': line})
+            elif isinstance(record.get('text'), str):
+                prompts.append({'id': str(record.get('id', line_number)), 'text': record['text']})
+            else:
+                prompts.append({'id': str(record.get('id', line_number)), 'text': line,
+                                'error': f"Line {line_number} has no \"text\" string"})
+    return prompts
+
+def _init_worker(output_dir):
+    """
+    Build the MusicGenerator once per worker so its note cache stays warm
+    """
+    global _worker_generator, _worker_output_dir
+    _worker_generator = MusicGenerator()
+    _worker_generator.register_metrics()
+    _worker_output_dir = output_dir
+
+def _render_prompt(prompt):
+    """
+    Render one prompt in a worker and return its manifest entry
+    """
+    entry = {'id': prompt['id'], 'text': prompt['text'], 'output': None, 'error': prompt.get('error')}
+    start_time = time.perf_counter()
+    if entry['error']:
+        entry['seconds'] = 0.0
+        return entry
+    try:
+        output_path = get_file_path(_worker_output_dir, generate_filename("batch", "wav"))
+        entry['output'] = _worker_generator.generate_music(prompt['text'], output_path)
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['seconds'] = time.perf_counter() - start_time
+    return entry
+
+def run_batch(prompts_path, manifest_path=None, output_dir=OUTPUT_DIR, workers=BATCH_WORKERS):
+    """
+    Render every prompt in prompts_path across a process pool
+
+    Writes a JSONL manifest with one entry per prompt (output path, timing
+    and error) and returns the manifest path and the entries in input order.
+    """
+    prompts = load_prompts(prompts_path)
+    workers = workers or os.cpu_count() or 1
+    if manifest_path is None:
+        manifest_path = get_file_path(output_dir, generate_filename("manifest", "jsonl"))
+    os.makedirs(output_dir, exist_ok=True)
+
+    logger.info(f"Rendering {len(prompts)} prompts with {workers} workers")
+    start_time = time.perf_counter()
+
+    # Hand prompts out in chunks so IPC overhead stays small next to rendering
+    chunksize = max(1, len(prompts) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(output_dir,)
+    ) as executor:
+        entries = list(executor.map(_render_prompt, prompts, chunksize=chunksize))
+
+    with atomic_write(manifest_path, "w") as manifest_file:
+        for entry in entries:
+            manifest_file.write(json.dumps(entry) + "\n")
+
+    failures = sum(1 for entry in entries if entry['error'])
+    logger.info(
+        f"Batch finished in {time.perf_counter() - start_time:.2f} seconds "
+        f"({failures} failed), manifest: {manifest_path}"
+    )
+    return manifest_path, entries
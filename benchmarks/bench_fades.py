@@ -0,0 +1,118 @@
+"""
+Note fade benchmark for the Voice-to-Music Generator
+
+Streams a score of short notes through MusicGenerator.iter_pcm_chunks
+with the note cache off, so every note is rendered:
+    abrupt        no fades, notes butted together (the old output)
+    fades         attack and release from the cached fade tables
+    crossfade     fades plus a blend of each note into the next
+    per-sample    fades as a gain multiply for every sample, for contrast
+The cost of a case is its extra time over abrupt, per note.
+
+Usage: python benchmarks/bench_fades.py [--notes N] [--note-seconds S] [--runs N] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from music_generator import MusicGenerator
+from fades import fade_frames, fade_table
+
+ATTACK = 0.005
+RELEASE = 0.005
+CROSSFADE = 0.01
+WORDS = "DO RE MI FA SOL LA SI"
+
+def configure(generator, attack, release, crossfade):
+    generator.synthesizer.attack = attack
+    generator.synthesizer.release = release
+    generator.crossfade = crossfade
+
+def per_sample_fades(generator, score):
+    """The envelope as a full-length gain curve multiplied into every note"""
+    synthesizer = generator.synthesizer
+    for frequency, duration in zip(score.frequencies(), score.durations):
+        block = synthesizer.render_note(frequency, duration).astype(np.float64)
+        attack = fade_frames(ATTACK, generator.sample_rate)
+        release = fade_frames(RELEASE, generator.sample_rate)
+        gains = np.ones(len(block))
+        gains[:attack] = fade_table(attack)
+        gains[len(block) - release:] = fade_table(release)[::-1]
+        block *= gains
+        yield block.astype(np.int16)
+
+def make_cases(generator, score):
+    def stream():
+        for _ in generator.iter_pcm_chunks(score):
+            pass
+
+    def per_sample():
+        configure(generator, 0.0, 0.0, 0.0)
+        for _ in per_sample_fades(generator, score):
+            pass
+
+    return {
+        'abrupt': (lambda: configure(generator, 0.0, 0.0, 0.0), stream),
+        'fades': (lambda: configure(generator, ATTACK, RELEASE, 0.0), stream),
+        'crossfade': (lambda: configure(generator, ATTACK, RELEASE, CROSSFADE), stream),
+        'per-sample': (lambda: None, per_sample)
+    }
+
+def run(notes, note_seconds, runs):
+    """Best-of-runs time of every case, with its overhead per note"""
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        generator = MusicGenerator()
+        generator.synthesizer.cache = None
+        generator.note_duration = note_seconds
+        words = WORDS.split()
+        score = generator.parse_score(" ".join(words[index % len(words)] for index in range(notes)))
+        cases = make_cases(generator, score)
+        best = dict.fromkeys(cases, float('inf'))
+        # Cases take turns within each round, so drift in machine load
+        # affects them alike
+        for _ in range(runs + 1):
+            for name, (setup, case) in cases.items():
+                setup()
+                best[name] = min(best[name], _time(case))
+        for name, seconds in best.items():
+            results[name] = {'best_ms': seconds * 1000, 'us_per_note': seconds * 1e6 / notes, 'runs': runs}
+    baseline = results['abrupt']['us_per_note']
+    for result in results.values():
+        result['overhead_us_per_note'] = result['us_per_note'] - baseline
+        result['overhead_percent'] = 100 * (result['us_per_note'] / baseline - 1)
+    return results
+
+def _time(case):
+    start_time = time.perf_counter()
+    case()
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of note fades and crossfades")
+    parser.add_argument("--notes", type=int, default=400, help="Notes in the score")
+    parser.add_argument("--note-seconds", type=float, default=0.25, help="Length of each note")
+    parser.add_argument("--runs", type=int, default=15, help="Repetitions per case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.notes, args.note_seconds, args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'case':<12}{'best ms':>10}{'us/note':>10}{'overhead':>10}")
+    for name, result in results.items():
+        print(f"{name:<12}{result['best_ms']:>10.2f}{result['us_per_note']:>10.1f}"
+              f"{result['overhead_percent']:>9.1f}%")
+
+if __name__ == "__main__":
+    main()
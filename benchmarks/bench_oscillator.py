@@ -0,0 +1,84 @@
+"""
+Oscillator benchmark for the Voice-to-Music Generator
+
+Measures synthesis throughput in samples per second for one note:
+    math-sin      the original per-sample loop from generate_music
+    synth-stdlib  Synthesizer.render_note without NumPy
+    synth-numpy   Synthesizer.render_note with np.sin
+    wavetable     Oscillator.render with phase accumulation and interpolation
+    wavetable-int Synthesizer.render_with, including int16 conversion
+
+Usage: python benchmarks/bench_oscillator.py [--seconds S] [--runs N] [--json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthesizer import Synthesizer
+from oscillator import Oscillator
+
+SAMPLE_RATE = 44100
+FREQUENCY = 440.0
+
+def math_sin_loop(duration):
+    samples = []
+    for i in range(int(SAMPLE_RATE * duration)):
+        t = float(i) / SAMPLE_RATE
+        samples.append(int(32767 * math.sin(2 * math.pi * FREQUENCY * t)))
+    return samples
+
+def make_cases(duration):
+    stdlib = Synthesizer(use_numpy=False)
+    vectorized = Synthesizer(use_numpy=True)
+    oscillator = Oscillator('sine')
+    return {
+        'math-sin': lambda: math_sin_loop(duration),
+        'synth-stdlib': lambda: stdlib.render_note(FREQUENCY, duration),
+        'synth-numpy': lambda: vectorized.render_note(FREQUENCY, duration),
+        'wavetable': lambda: oscillator.render(FREQUENCY, int(SAMPLE_RATE * duration)),
+        'wavetable-int': lambda: vectorized.render_with(oscillator, FREQUENCY, duration)
+    }
+
+def run(duration, runs):
+    """
+    Best-of-runs throughput of every case in samples per second
+    """
+    frames = int(SAMPLE_RATE * duration)
+    results = {}
+    for name, case in make_cases(duration).items():
+        case()  # warm up tables and imports
+        best = min(_time(case) for _ in range(runs))
+        results[name] = {'samples_per_second': frames / best, 'best_ms': best * 1000, 'runs': runs}
+    return results
+
+def _time(case):
+    start_time = time.perf_counter()
+    case()
+    return time.perf_counter() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Oscillator throughput benchmark")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Length of the rendered note")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per case")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    results = run(args.seconds, args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    baseline = results['math-sin']['samples_per_second']
+    print(f"{'case':<15}{'Msamples/s':>12}{'best ms':>10}{'speedup':>10}")
+    for name, result in results.items():
+        rate = result['samples_per_second']
+        print(f"{name:<15}{rate / 1e6:>12.2f}{result['best_ms']:>10.2f}{rate / baseline:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
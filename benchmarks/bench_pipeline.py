@@ -0,0 +1,80 @@
+"""
+Speech pipeline benchmark for the Voice-to-Music Generator
+
+Runs a synthetic recording through segmentation, the offline stub
+recognizer (with a per-call delay standing in for a remote service) and
+WAV rendering:
+    serial      segment, then recognize, then render each segment in turn
+    pipelined   SpeechPipeline, recognition overlapping rendering
+
+Usage: python benchmarks/bench_pipeline.py [--segments N] [--delay S] [--workers N] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from music_generator import MusicGenerator
+from pipeline import SpeechPipeline
+from recognizers import StubBackend
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+def make_recording(segments, seconds_each=1.0, gap=0.6):
+    rng = np.random.default_rng(0)
+    signal = rng.normal(0, 50, int((segments * (seconds_each + gap) + gap) * SAMPLE_RATE))
+    t = np.arange(int(seconds_each * SAMPLE_RATE)) / SAMPLE_RATE
+    for index in range(segments):
+        start = int((gap + index * (seconds_each + gap)) * SAMPLE_RATE)
+        signal[start:start + len(t)] += 8000 * np.sin(2 * np.pi * (180 + 20 * index) * t)
+    return signal.astype(np.int16)
+
+def run_serial(audio, backend, generator):
+    for segment in VoiceActivityDetector(SAMPLE_RATE).segments(audio):
+        text = backend.recognize(segment.samples, SAMPLE_RATE)
+        generator.generate_music(text)
+
+def run_pipelined(audio, backend, generator, workers):
+    pipeline = SpeechPipeline(backend, generator, VoiceActivityDetector(SAMPLE_RATE), workers=workers)
+    for _ in pipeline.run(audio):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial versus pipelined speech-to-music")
+    parser.add_argument("--segments", type=int, default=8, help="Speech segments in the recording")
+    parser.add_argument("--delay", type=float, default=0.2, help="Stub recognizer seconds per call")
+    parser.add_argument("--workers", type=int, default=4, help="Recognizer threads")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    audio = make_recording(args.segments)
+    backend = StubBackend(delay=args.delay)
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        generator = MusicGenerator()
+        generator.render_cache = None
+        generator.generate_music("DO")  # warm up imports and tables
+        for name, case in (('serial', lambda: run_serial(audio, backend, generator)),
+                           ('pipelined', lambda: run_pipelined(audio, backend, generator, args.workers))):
+            start_time = time.perf_counter()
+            case()
+            elapsed = time.perf_counter() - start_time
+            results[name] = {'seconds': elapsed, 'segments_per_second': args.segments / elapsed}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"{name:<10}{result['seconds']:>8.2f} s{result['segments_per_second']:>10.1f} segments/s")
+    print(f"speedup   {results['serial']['seconds'] / results['pipelined']['seconds']:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Startup benchmark for the Voice-to-Music Generator
+
+Measures time-to-first-render of a fresh interpreter for a short prompt:
+    eager         imports NumPy and scipy.signal up front, as utils.py used to
+    lazy          current import graph, NumPy loaded on the first render
+    lazy-stdlib   current import graph with the standard library synthesizer
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RENDER = (
+    "import io\n"
+    "from music_generator import MusicGenerator\n"
+    "generator = MusicGenerator()\n"
+    "generator.synthesizer.use_numpy = {use_numpy}\n"
+    "generator.stream_music('DO RE MI', io.BytesIO())\n"
+)
+
+MODES = {
+    'eager': "import numpy\nfrom scipy import signal\n" + RENDER.format(use_numpy=True),
+    'lazy': RENDER.format(use_numpy=True),
+    'lazy-stdlib': RENDER.format(use_numpy=False)
+}
+
+def time_to_first_render(code):
+    """
+    Wall-clock seconds for a new interpreter to run code
+    """
+    start_time = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, check=True)
+    return time.perf_counter() - start_time
+
+def run(runs):
+    """
+    Time every mode runs times and return median/min/max per mode
+    """
+    # Warm the OS file cache so the first mode measured is not penalized
+    time_to_first_render(MODES['eager'])
+    results = {}
+    for mode, code in MODES.items():
+        timings = [time_to_first_render(code) for _ in range(runs)]
+        results[mode] = {
+            'median_ms': statistics.median(timings) * 1000,
+            'min_ms': min(timings) * 1000,
+            'max_ms': max(timings) * 1000,
+            'runs': runs
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-render benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter launches per mode")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'mode':<14}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<14}{result['median_ms']:>12.1f}{result['min_ms']:>10.1f}{result['max_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
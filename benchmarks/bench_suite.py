@@ -0,0 +1,262 @@
+"""
+Benchmark suite for the Voice-to-Music Generator
+
+Runs offline on synthetic inputs and covers the synthesis, analysis and
+I/O paths:
+    generate   MusicGenerator.generate_music to a WAV file, by prompt words
+    process    AudioProcessor.process_audio on a WAV file, by recording length
+    pitch      detect_pitch on a memory-mapped WavSource
+    spectrum   analyze_frequency_spectrum on a memory-mapped WavSource
+
+Every case and size runs in a fresh interpreter. The cold latency runs
+from the start of that interpreter's main() to the end of the first call,
+so it includes importing the modules under test and building their
+tables; the call is then repeated to get warm latency percentiles and
+throughput. Peak RSS is the high-water mark of that interpreter.
+
+Results are saved as JSON. With --baseline the run is compared against an
+earlier results file, and the exit status is 1 when any cold or warm p50
+latency got slower than the baseline by more than --threshold.
+
+Usage: python benchmarks/bench_suite.py [--profile quick|full] [--cases generate,pitch]
+                                         [--runs N] [--output results.json]
+                                         [--baseline baseline.json] [--threshold 0.2]
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+SAMPLE_RATE = 44100
+SEED = 1234
+
+# Sizes are prompt words for generate and recording seconds otherwise
+PROFILES = {
+    'quick': {
+        'generate': [1, 10, 100, 1000],
+        'process': [1, 10, 60],
+        'pitch': [1, 10, 60],
+        'spectrum': [1, 10, 60]
+    },
+    'full': {
+        'generate': [1, 10, 100, 1000, 10000],
+        'process': [1, 10, 60, 600, 3600],
+        'pitch': [1, 10, 60, 600, 3600],
+        # The full STFT of analyze_frequency_spectrum is held in memory
+        # (about 1.4 GB per 10 minutes), so it stops at 10 minutes
+        'spectrum': [1, 10, 60, 600]
+    }
+}
+
+WORDS = ["DO", "RE", "MI", "FA", "SOL", "LA", "SI", "HAPPY", "SAD", "CALM",
+         "music", "river", "light", "morning", "echo", "signal"]
+
+def make_prompt(words):
+    """Deterministic prompt mixing vocabulary and unknown words"""
+    rng = random.Random(SEED)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def make_recording(path, seconds, chunk_seconds=10):
+    """
+    Write a synthetic mono 16-bit recording: a gliding voiced tone with
+    harmonics, pauses and noise, generated chunk by chunk
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(SEED)
+    frames = int(seconds * SAMPLE_RATE)
+    chunk_frames = chunk_seconds * SAMPLE_RATE
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        for start in range(0, frames, chunk_frames):
+            t = np.arange(start, min(frames, start + chunk_frames)) / SAMPLE_RATE
+            pitch = 150 + 50 * np.sin(2 * np.pi * 0.2 * t)
+            phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+            voiced = (np.sin(2 * np.pi * 0.5 * t) > -0.3)
+            signal = (np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)) * voiced
+            signal += 0.02 * rng.standard_normal(len(t))
+            wav_file.writeframes((signal * 8000).astype('<i2').tobytes())
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _make_case(case, size, input_path, work_dir):
+    """
+    Return (call, units, unit) for one case, with the imports it needs
+    done here so they count towards the cold start
+    """
+    if case == 'generate':
+        from music_generator import MusicGenerator
+        generator = MusicGenerator()
+        generator.render_cache = None  # measure rendering, not cache hits
+        prompt = make_prompt(size)
+        output_path = os.path.join(work_dir, "generate.wav")
+        return (lambda: generator.generate_music(prompt, output_path)), size, 'words'
+
+    if case == 'process':
+        from audio_processor import AudioProcessor
+        processor = AudioProcessor()
+        return (lambda: processor.process_audio(input_path)), size, 'audio_seconds'
+
+    from wav_source import WavSource
+    from utils import analyze_frequency_spectrum, detect_pitch
+    analyze = detect_pitch if case == 'pitch' else analyze_frequency_spectrum
+
+    def call():
+        with WavSource(input_path) as source:
+            analyze(source)
+    return call, size, 'audio_seconds'
+
+def run_child(case, size, input_path, work_dir, runs, start_time):
+    """
+    Measure one case and size inside this (fresh) interpreter
+    """
+    call, units, unit = _make_case(case, size, input_path, work_dir)
+    call()
+    cold = time.perf_counter() - start_time
+
+    timings = []
+    for _ in range(runs):
+        call_start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - call_start)
+    timings.sort()
+
+    def percentile(fraction):
+        return timings[min(len(timings) - 1, int(fraction * len(timings)))]
+
+    return {
+        'case': case,
+        'size': size,
+        'unit': unit,
+        'runs': runs,
+        'cold_seconds': cold,
+        'warm_p50_seconds': statistics.median(timings),
+        'warm_p90_seconds': percentile(0.9),
+        'warm_p99_seconds': percentile(0.99),
+        'warm_min_seconds': timings[0],
+        'throughput': units / statistics.median(timings),
+        'throughput_unit': f"{unit}/s",
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+def run_case(case, size, input_path, work_dir, runs):
+    """Run one case and size in a new interpreter and return its result"""
+    command = [sys.executable, os.path.abspath(__file__), "--child", case, str(size),
+               "--input", input_path or "", "--work-dir", work_dir, "--runs", str(runs)]
+    completed = subprocess.run(command, cwd=work_dir, check=True, capture_output=True, text=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run(profile, cases, runs, work_dir):
+    """Run the selected cases of a profile; returns the results document"""
+    results = []
+    recordings = {}
+    for case in cases:
+        for size in PROFILES[profile][case]:
+            input_path = None
+            if case != 'generate':
+                input_path = recordings.get(size)
+                if input_path is None:
+                    input_path = recordings[size] = os.path.join(work_dir, f"recording_{size}s.wav")
+                    make_recording(input_path, size)
+            result = run_case(case, size, input_path, work_dir, runs)
+            results.append(result)
+            print(_format_row(result), file=sys.stderr)
+    return {
+        'profile': profile,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'results': results
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Compare latencies against a baseline results document; returns a list
+    of (case, size, metric, baseline, current, change) rows that regressed
+    """
+    previous = {(entry['case'], entry['size']): entry for entry in baseline['results']}
+    regressions = []
+    for entry in results['results']:
+        old = previous.get((entry['case'], entry['size']))
+        if old is None:
+            continue
+        for metric in ('cold_seconds', 'warm_p50_seconds'):
+            change = entry[metric] / old[metric] - 1 if old[metric] else 0.0
+            entry.setdefault('change', {})[metric] = change
+            if change > threshold:
+                regressions.append((entry['case'], entry['size'], metric, old[metric], entry[metric], change))
+    return regressions
+
+def _format_row(result):
+    return (f"{result['case']:<10}{result['size']:>7} {result['unit']:<14}"
+            f"{result['cold_seconds'] * 1000:>10.1f}{result['warm_p50_seconds'] * 1000:>10.1f}"
+            f"{result['warm_p99_seconds'] * 1000:>10.1f}{result['throughput']:>14.1f}"
+            f"{result['peak_rss_mb']:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesis, analysis and I/O benchmark suite")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick", help="Input size set")
+    parser.add_argument("--cases", default=",".join(PROFILES['quick']),
+                        help="Comma-separated cases to run")
+    parser.add_argument("--runs", type=int, default=5, help="Warm repetitions per case and size")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline as a fraction")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        start_time = time.perf_counter()
+        case, size = args.child
+        print(json.dumps(run_child(case, int(size), args.input or None, args.work_dir,
+                                   args.runs, start_time)))
+        return 0
+
+    cases = [case for case in args.cases.split(",") if case]
+    unknown = set(cases) - set(PROFILES[args.profile])
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    print(f"{'case':<10}{'size':>7} {'unit':<14}{'cold ms':>10}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'throughput':>14}{'RSS MB':>9}", file=sys.stderr)
+    with tempfile.TemporaryDirectory(prefix="vtm-bench-") as work_dir:
+        results = run(args.profile, cases, args.runs, work_dir)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        for case, size, metric, old, new, change in regressions:
+            print(f"REGRESSION {case} {size}: {metric} {old * 1000:.1f} ms -> "
+                  f"{new * 1000:.1f} ms ({change:+.0%})", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,12 +11,107 @@ DEFAULT_DURATION = 5
 CHANNELS = 1
 DTYPE = 'int16'
 MAX_AMPLITUDE = 32767  # Maximum amplitude for 16-bit audio
+PROCESS_CHUNK_FRAMES = 65536  # Frames read per chunk when analyzing recordings
+RING_BUFFER_MS = 10000  # Audio kept by the rolling buffer of continuous capture
+
+# Analysis settings
+FFT_SIZE = 2048
+HOP_LENGTH = 512
+WINDOW_TYPE = "hann"
+PITCH_MIN_FREQUENCY = 50.0  # Lowest pitch searched by the pitch tracker (Hz)
+PITCH_MAX_FREQUENCY = 2000.0  # Highest pitch searched by the pitch tracker (Hz)
+PITCH_PEAK_THRESHOLD = 0.9  # Pick the first peak within this fraction of the best one
+PITCH_MIN_CONFIDENCE = 0.5  # Frames below this confidence count as unvoiced
+ANALYSIS_BATCH_FRAMES = 256  # Frames transformed per vectorized FFT batch
+STFT_MAX_BLOCK_FRAMES = 4096  # Live input block size the streaming STFT preallocates for
+
+# Speech recognition settings
+LANGUAGE = "en-US"  # Language passed to the recognition service
+AMBIENT_DURATION = 1  # Seconds of ambient noise sampled when calibrating the microphone
+RECOGNIZER_BACKEND = "google"  # Backend used for recorded segments, see recognizers.RECOGNIZERS
+RECOGNIZER_WORKERS = 4  # Segments recognized at the same time
+PIPELINE_QUEUE_SEGMENTS = 8  # Segments recognized ahead of the music renderer
+STUB_SECONDS_PER_WORD = 0.5  # Speech length per word emitted by the offline stub backend
+
+# Voice activity detection settings
+VAD_FRAME_MS = 20  # Length of the frames classified as speech or silence
+VAD_ENERGY_RATIO = 3.0  # Frames this many times above the noise floor RMS are speech
+VAD_ZCR_THRESHOLD = 0.2  # Quieter frames (above half that ratio) crossing zero this often are speech
+VAD_MIN_NOISE_RMS = 30.0  # Lowest noise floor, so digital silence does not make every frame speech
+VAD_NOISE_ADAPTATION = 0.05  # Weight of each block's silent frames in the tracked noise floor
+VAD_HANGOVER_MS = 300  # Silence shorter than this does not end a segment
+VAD_MIN_SPEECH_MS = 100  # Shorter segments are dropped as clicks
+VAD_PADDING_MS = 100  # Audio kept before and after each segment
+
+# Synthesis settings
+NOTE_CACHE_MAX_BYTES = 8 * 1024 * 1024  # Memory ceiling for cached note waveforms
+STREAM_CHUNK_FRAMES = 4096  # Frames per PCM chunk when streaming output
+WAVETABLE_SIZE = 2048  # Points per oscillator wavetable cycle
+SYNTH_WAVEFORM = 'sine'  # Waveform or instrument timbre of generated notes
+SYNTH_CONTINUOUS_PHASE = False  # Carry oscillator phase across notes (bypasses the note cache)
+SYNTH_ATTACK = 0.005  # Seconds each generated note fades in over
+SYNTH_RELEASE = 0.005  # Seconds each generated note fades out over before it ends
+SYNTH_FADE_SHAPE = 'cosine'  # Curve of note fades and crossfades, see fades.FADE_SHAPES
+SYNTH_CROSSFADE = 0.0  # Seconds each note overlaps the next one, blending the two
+RENDER_CACHE_ENABLED = True  # Reuse rendered files for repeated prompts
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Disk budget of the render cache
+
+# Output encoding settings
+OUTPUT_FORMAT = "wav"  # Default format of generated files, see encoders.OUTPUT_FORMATS
+ZPCM_BLOCK_FRAMES = 65536  # Frames per independently compressed block in .zpcm files
+ENCODE_QUEUE_CHUNKS = 16  # Rendered chunks buffered ahead of the encoder thread
+RESAMPLE_ZERO_CROSSINGS = 16  # Sinc zero crossings on each side of the resampling filter
+RESAMPLE_ROLLOFF = 0.9  # Filter cutoff as a fraction of the lower Nyquist frequency
+RESAMPLE_KAISER_BETA = 8.0  # Kaiser window shape of the resampling filter
+CONVERT_DITHER = True  # Add triangular dither when format conversion requantizes samples
+
+# Mixer settings
+MIXER_ATTACK = 0.01  # Seconds from silence to full level
+MIXER_DECAY = 0.05  # Seconds from full level down to the sustain level
+MIXER_SUSTAIN = 0.8  # Sustain level as a fraction of full level
+MIXER_RELEASE = 0.05  # Seconds from note-off to silence
+MIXER_MASTER_GAIN = 0.5  # Gain applied to the voice sum before soft clipping
+MIXER_DITHER = True  # Add triangular dither when quantizing to int16
+
+# Score settings
+SCALE = "C_major"  # Scale notes are quantized to, see tokenizer.SCALES
+VOCABULARY_PATH = None  # Optional binary vocabulary file replacing the built-in words
+DEFAULT_TEMPO = 120  # Beats per minute
+DEFAULT_VELOCITY = 100  # MIDI note velocity
+MIDI_TICKS_PER_BEAT = 480  # Time resolution of written MIDI files
+
+# Batch settings
+BATCH_WORKERS = None  # Worker processes for batch rendering, None uses all cores
+
+# Server settings
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_MAX_IN_FLIGHT = 4  # Requests rendering at the same time
+SERVER_QUEUE_DEPTH = 16  # Requests allowed to wait before answering "busy"
+SERVER_MAX_BODY = 1024 * 1024  # Largest accepted request body in bytes
+SERVER_STREAM_QUEUE_CHUNKS = 8  # Rendered chunks buffered per response
 
 # File paths
 OUTPUT_DIR = "output"
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+RECORDINGS_DIR = os.path.join(OUTPUT_DIR, "recordings")
+MIDI_DIR = os.path.join(OUTPUT_DIR, "midi")
+LOG_DIR = os.path.join(OUTPUT_DIR, "logs")
+RENDER_CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+
+# Metrics settings
+METRICS_ENABLED = True  # Time pipeline stages and count throughput (cheap enough to leave on)
+METRICS_PREFIX = "vtm"  # Name prefix of exported Prometheus metrics
+METRICS_FILE = None  # Write metrics here on exit; .prom/.txt for Prometheus text, else JSON
 
 # Logging settings
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
\ No newline at end of file
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+LOG_FILE = os.path.join(LOG_DIR, "app.log")
+
+def init_output_dirs():
+    """
+    Create the output directory tree. Called explicitly at start-up rather
+    than on import, so importing config has no filesystem side effects.
+    """
+    for directory in (OUTPUT_DIR, RECORDINGS_DIR, MIDI_DIR, LOG_DIR, RENDER_CACHE_DIR):
+        os.makedirs(directory, exist_ok=True)
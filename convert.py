@@ -0,0 +1,268 @@
+"""
+Sample rate, channel and sample format conversion for the Voice-to-Music
+Generator (uses NumPy, imported on first use)
+
+Sample formats are named:
+    u8   unsigned 8-bit PCM           s24  signed 24-bit PCM (3 bytes)
+    s16  signed 16-bit PCM            s32  signed 32-bit PCM
+    f32  32-bit IEEE float            f64  64-bit IEEE float
+Integer samples are scaled to [-1, 1) floats for processing and back.
+A Converter chains decoding, channel remixing, polyphase resampling and
+quantization block by block, so it can sit behind any chunked reader.
+Filters come from resampler.polyphase_filter, designed once per rate pair.
+"""
+
+import struct
+import logging
+from config import *
+from resampler import Resampler
+from wav_source import WavSource, WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT
+from utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# name -> (bytes per sample, NumPy dtype of the stored values, full scale)
+# s24 values are held in int32 once unpacked; floats have no full scale
+SAMPLE_FORMATS = {
+    'u8': (1, 'u1', 128),
+    's16': (2, '<i2', 32768),
+    's24': (3, '<i4', 8388608),
+    's32': (4, '<i4', 2147483648),
+    'f32': (4, '<f4', None),
+    'f64': (8, '<f8', None)
+}
+
+# (WAV format tag, bytes per sample) -> format name
+WAV_FORMATS = {
+    (WAVE_FORMAT_PCM, 1): 'u8',
+    (WAVE_FORMAT_PCM, 2): 's16',
+    (WAVE_FORMAT_PCM, 3): 's24',
+    (WAVE_FORMAT_PCM, 4): 's32',
+    (WAVE_FORMAT_IEEE_FLOAT, 4): 'f32',
+    (WAVE_FORMAT_IEEE_FLOAT, 8): 'f64'
+}
+
+def _check_format(sample_format):
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported sample format: {sample_format}")
+    return SAMPLE_FORMATS[sample_format]
+
+def source_format(source):
+    """Format name of a WavSource"""
+    sample_format = WAV_FORMATS.get((source.format_tag, source.sample_width))
+    if sample_format is None:
+        raise ValueError(
+            f"Unsupported sample format {source.format_tag} with {8 * source.sample_width}-bit samples"
+        )
+    return sample_format
+
+def unpack(data, sample_format):
+    """
+    Interpret raw little-endian PCM bytes as stored values: a view for
+    every format but s24, which is unpacked into int32
+    """
+    import numpy as np
+
+    width, dtype, _ = _check_format(sample_format)
+    if sample_format != 's24':
+        return np.frombuffer(data, dtype=dtype)
+    triples = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+    values = triples[:, 0].astype(np.int32)
+    values |= triples[:, 1].astype(np.int32) << 8
+    values |= triples[:, 2].astype(np.int8).astype(np.int32) << 16
+    return values
+
+def pack(values, sample_format):
+    """Raw little-endian PCM bytes of stored values"""
+    import numpy as np
+
+    _, dtype, _ = _check_format(sample_format)
+    values = np.ascontiguousarray(values, dtype=dtype)
+    if sample_format != 's24':
+        return values.tobytes()
+    return values.reshape(-1, 1).view(np.uint8)[:, :3].tobytes()
+
+def to_float(values, sample_format):
+    """Stored values as float64 in [-1, 1)"""
+    import numpy as np
+
+    _, _, full_scale = _check_format(sample_format)
+    samples = np.asarray(values, dtype=np.float64)
+    if sample_format == 'u8':
+        samples = samples - 128.0
+    if full_scale is not None:
+        samples = samples * (1.0 / full_scale)
+    return samples
+
+def from_float(samples, sample_format, rng=None):
+    """
+    Quantize float samples in [-1, 1) to stored values, clipping; with
+    rng, triangular dither of one step is added first
+    """
+    import numpy as np
+
+    _, dtype, full_scale = _check_format(sample_format)
+    if full_scale is None:
+        return np.asarray(samples, dtype=dtype)
+    scaled = np.multiply(samples, full_scale)
+    if rng is not None:
+        scaled += rng.triangular(-1.0, 0.0, 1.0, size=scaled.shape)
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -full_scale, full_scale - 1, out=scaled)
+    if sample_format == 'u8':
+        scaled += 128.0
+    return scaled.astype(dtype)
+
+def remix(samples, channels):
+    """
+    Change the channel count of (frames,) or (frames, channels) samples:
+    mono output averages all channels, mono input is copied to every
+    channel, and other changes keep or zero-fill channels in order
+    """
+    import numpy as np
+
+    source_channels = 1 if samples.ndim == 1 else samples.shape[1]
+    if source_channels == channels:
+        return samples
+    if channels == 1:
+        return samples.mean(axis=1)
+    if source_channels == 1:
+        return np.repeat(samples[:, None], channels, axis=1)
+    output = np.zeros((len(samples), channels), dtype=samples.dtype)
+    kept = min(channels, source_channels)
+    output[:, :kept] = samples[:, :kept]
+    return output
+
+class Converter:
+    """
+    Streaming converter between two (rate, channels, sample format) layouts
+
+    convert() takes raw interleaved PCM bytes, or stored values as a
+    (frames,) or (frames, channels) array, and returns stored values in
+    the target format as an array of the same shape convention (s24 as
+    int32); call flush() after the last block. Channels are reduced before
+    resampling and added after it, so the filter runs on as few channels
+    as possible. Dither is only applied where output is requantized.
+    """
+    def __init__(self, from_rate, from_channels=1, from_format='s16',
+                 to_rate=SAMPLE_RATE, to_channels=CHANNELS, to_format='s16',
+                 dither=CONVERT_DITHER, seed=None):
+        import numpy as np
+
+        self.from_rate = from_rate
+        self.from_channels = from_channels
+        self.from_format = from_format
+        self.to_rate = to_rate
+        self.to_channels = to_channels
+        self.to_format = to_format
+        self._frame_bytes = _check_format(from_format)[0] * from_channels
+        _check_format(to_format)
+
+        self.resample_channels = min(from_channels, to_channels)
+        self.resampler = None
+        if from_rate != to_rate:
+            self.resampler = Resampler(from_rate, to_rate, self.resample_channels)
+
+        # Requantizing happens when the output has finer values than the
+        # target can hold: resampled, averaged, narrowed or float input
+        from_width = _check_format(from_format)[0]
+        to_width = _check_format(to_format)[0]
+        requantizes = (self.resampler is not None or (to_channels == 1 and from_channels > 1)
+                       or SAMPLE_FORMATS[from_format][2] is None
+                       or (SAMPLE_FORMATS[to_format][2] is not None and from_width > to_width))
+        self.rng = np.random.default_rng(seed) if dither and requantizes else None
+        self._remainder = b''
+
+    def _values(self, block):
+        import numpy as np
+
+        if isinstance(block, np.ndarray):
+            return block
+        data = memoryview(block).cast('B')
+        if self._remainder:
+            data = self._remainder + data
+        whole = len(data) - len(data) % self._frame_bytes
+        self._remainder = bytes(data[whole:])
+        values = unpack(data[:whole], self.from_format)
+        return values.reshape(-1, self.from_channels) if self.from_channels > 1 else values
+
+    def _finish(self, samples):
+        return from_float(remix(samples, self.to_channels), self.to_format, self.rng)
+
+    def convert(self, block):
+        """Convert one block; returns the output that is ready"""
+        samples = remix(to_float(self._values(block), self.from_format), self.resample_channels)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return self._finish(samples)
+
+    def flush(self):
+        """Return the output still held back by the resampling filter"""
+        import numpy as np
+
+        if self.resampler is None:
+            shape = (0,) if self.to_channels == 1 else (0, self.to_channels)
+            return np.zeros(shape, dtype=SAMPLE_FORMATS[self.to_format][1])
+        return self._finish(self.resampler.flush())
+
+def iter_converted(audio, to_rate=SAMPLE_RATE, to_channels=CHANNELS, to_format='s16',
+                   dither=CONVERT_DITHER, block_frames=PROCESS_CHUNK_FRAMES, seed=None):
+    """
+    Yield a WAV file (path or WavSource) converted block by block; blocks
+    are read straight from the memory map
+    """
+    if isinstance(audio, str):
+        with WavSource(audio) as source:
+            yield from iter_converted(source, to_rate, to_channels, to_format, dither, block_frames, seed)
+        return
+
+    converter = Converter(audio.sample_rate, audio.channels, source_format(audio),
+                          to_rate, to_channels, to_format, dither, seed)
+    for start in range(0, audio.frames, block_frames):
+        block = converter.convert(audio.raw(start, start + block_frames))
+        if len(block):
+            yield block
+    tail = converter.flush()
+    if len(tail):
+        yield tail
+
+def load_audio(audio, sample_rate=SAMPLE_RATE, channels=1):
+    """
+    Read a whole WAV file (path or WavSource) of any supported layout as
+    float64 samples in [-1, 1) at sample_rate with channels channels
+    """
+    import numpy as np
+
+    blocks = list(iter_converted(audio, sample_rate, channels, 'f64', dither=False))
+    if not blocks:
+        return np.zeros((0,) if channels == 1 else (0, channels))
+    return np.concatenate(blocks)
+
+def _wav_header(sample_format, channels, sample_rate, data_bytes):
+    width = SAMPLE_FORMATS[sample_format][0]
+    format_tag = WAVE_FORMAT_PCM if SAMPLE_FORMATS[sample_format][2] is not None else WAVE_FORMAT_IEEE_FLOAT
+    # The RIFF size counts the pad byte that keeps an odd data chunk aligned
+    return struct.pack('<4sL4s4sLHHLLHH4sL', b'RIFF', 36 + data_bytes + (data_bytes & 1), b'WAVE',
+                       b'fmt ', 16, format_tag, channels, sample_rate,
+                       sample_rate * channels * width, channels * width, 8 * width,
+                       b'data', data_bytes)
+
+def convert_wav(input_path, output_path, to_rate=SAMPLE_RATE, to_channels=CHANNELS,
+                to_format='s16', dither=CONVERT_DITHER, block_frames=PROCESS_CHUNK_FRAMES):
+    """
+    Stream a WAV file of any supported layout into a new WAV file with the
+    given rate, channels and sample format; returns the frames written
+    """
+    frames = 0
+    with atomic_write(output_path) as output_file:
+        output_file.write(_wav_header(to_format, to_channels, to_rate, 0))
+        for block in iter_converted(input_path, to_rate, to_channels, to_format, dither, block_frames):
+            output_file.write(pack(block, to_format))
+            frames += len(block)
+        data_bytes = frames * to_channels * SAMPLE_FORMATS[to_format][0]
+        if data_bytes & 1:
+            output_file.write(b'\0')
+        output_file.seek(0)
+        output_file.write(_wav_header(to_format, to_channels, to_rate, data_bytes))
+    logger.debug(f"Converted {input_path} to {frames} frames of {to_format} at {to_rate} Hz")
+    return frames
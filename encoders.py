@@ -0,0 +1,354 @@
+"""
+Output encoders for the Voice-to-Music Generator
+Using only Python standard library (NumPy is used for resampling and
+delta coding when installed)
+
+Every encoder takes mono int16 PCM chunks at the render rate. Encoders
+with a sample_rate set resample on the way in. OUTPUT_FORMATS names the
+ready-made configurations; register_format adds more.
+
+The .zpcm container is a stdlib-only compressed PCM format:
+    header  b'ZPCM', version, codec, filter, sample width, channels,
+            sample rate, frames per block
+    blocks  independently compressed runs of frames_per_block frames
+    index   per block: byte offset, compressed size, frame count
+    footer  index offset, total frames, b'ZIDX'
+Blocks decode on their own, so ZpcmReader can seek to any frame.
+"""
+
+import io
+import sys
+import array
+import lzma
+import zlib
+import queue
+import struct
+import bisect
+import logging
+import threading
+import importlib.util
+from itertools import accumulate
+from config import *
+from resampler import Resampler
+from metrics import METRICS, PACK, WRITE
+
+logger = logging.getLogger(__name__)
+
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+ZPCM_MAGIC = b'ZPCM'
+ZPCM_INDEX_MAGIC = b'ZIDX'
+ZPCM_VERSION = 1
+ZPCM_HEADER = struct.Struct('<4sBBBBHLL')
+ZPCM_INDEX_ENTRY = struct.Struct('<QLL')
+ZPCM_FOOTER = struct.Struct('<QQ4s')
+
+def _zlib_compress(data, level):
+    return zlib.compress(data, -1 if level is None else level)
+
+def _lzma_compress(data, level):
+    return lzma.compress(data, preset=level)
+
+# codec name -> (id stored in the header, compress(data, level), decompress(data))
+CODECS = {
+    'zlib': (1, _zlib_compress, zlib.decompress),
+    'lzma': (2, _lzma_compress, lzma.decompress)
+}
+CODEC_IDS = {codec_id: name for name, (codec_id, _, _) in CODECS.items()}
+
+FILTER_NONE = 0
+FILTER_DELTA = 1  # First differences of the int16 samples, wrapping
+
+class Encoder:
+    """
+    Base class of the output encoders
+
+    Subclasses set extension and implement _open(fileobj, sample_rate),
+    returning a stream with write(pcm_chunk) and close().
+    """
+    extension = None
+
+    def __init__(self, sample_rate=None):
+        self.sample_rate = sample_rate
+
+    def open(self, fileobj, source_rate):
+        """
+        Start encoding into fileobj; chunks written to the returned stream
+        are int16 PCM at source_rate
+        """
+        rate = self.sample_rate or source_rate
+        stream = self._open(fileobj, rate)
+        if rate != source_rate:
+            stream = _ResampledStream(stream, Resampler(source_rate, rate))
+        return stream
+
+    def _open(self, fileobj, sample_rate):
+        raise NotImplementedError
+
+class WavEncoder(Encoder):
+    """16-bit mono WAV; the header is patched on close, so fileobj must be seekable"""
+    extension = 'wav'
+
+    def _open(self, fileobj, sample_rate):
+        return _WavStream(fileobj, sample_rate)
+
+class ZpcmEncoder(Encoder):
+    """
+    Block-compressed PCM (.zpcm) using zlib or lzma
+
+    With NumPy installed the samples are delta coded before compression,
+    which makes smooth waveforms compress several times better.
+    """
+    extension = 'zpcm'
+
+    def __init__(self, codec='zlib', sample_rate=None, level=None,
+                 block_frames=ZPCM_BLOCK_FRAMES):
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported codec: {codec}")
+        super().__init__(sample_rate)
+        self.codec = codec
+        self.level = level
+        self.block_frames = block_frames
+
+    def _open(self, fileobj, sample_rate):
+        return _ZpcmStream(fileobj, sample_rate, self.codec, self.level, self.block_frames)
+
+OUTPUT_FORMATS = {
+    'wav': lambda: WavEncoder(),
+    'wav22k': lambda: WavEncoder(sample_rate=22050),
+    'wav16k': lambda: WavEncoder(sample_rate=16000),
+    'zpcm': lambda: ZpcmEncoder('zlib'),
+    'zpcm-lzma': lambda: ZpcmEncoder('lzma'),
+    'zpcm22k': lambda: ZpcmEncoder('zlib', sample_rate=22050),
+    'zpcm16k': lambda: ZpcmEncoder('zlib', sample_rate=16000)
+}
+
+def register_format(name, factory):
+    """Make an encoder factory available under name"""
+    OUTPUT_FORMATS[name] = factory
+
+def get_encoder(output_format):
+    """Create the encoder for a named output format"""
+    factory = OUTPUT_FORMATS.get(output_format)
+    if factory is None:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    return factory()
+
+class _WavStream:
+    def __init__(self, fileobj, sample_rate):
+        import wave
+        self._wav_file = wave.open(fileobj, 'wb')
+        self._wav_file.setnchannels(1)
+        self._wav_file.setsampwidth(2)
+        self._wav_file.setframerate(sample_rate)
+
+    def write(self, chunk):
+        with METRICS.timer(WRITE):
+            self._wav_file.writeframes(chunk)
+        METRICS.increment('bytes_written', len(chunk))
+
+    def close(self):
+        self._wav_file.close()
+
+class _ResampledStream:
+    """Resamples int16 chunks before handing them to the next stream"""
+    def __init__(self, stream, resampler):
+        self.stream = stream
+        self.resampler = resampler
+
+    def _forward(self, samples):
+        import numpy as np
+        np.rint(samples, out=samples)
+        np.clip(samples, -MAX_AMPLITUDE - 1, MAX_AMPLITUDE, out=samples)
+        if len(samples):
+            self.stream.write(samples.astype('<i2').tobytes())
+
+    def write(self, chunk):
+        import numpy as np
+        with METRICS.timer(PACK):
+            samples = self.resampler.process(np.frombuffer(chunk, dtype='<i2'))
+        self._forward(samples)
+
+    def close(self):
+        self._forward(self.resampler.flush())
+        self.stream.close()
+
+def _delta_encode(pcm):
+    import numpy as np
+    samples = np.frombuffer(pcm, dtype='<i2')
+    deltas = np.empty_like(samples)
+    deltas[:1] = samples[:1]
+    np.subtract(samples[1:], samples[:-1], out=deltas[1:])
+    return deltas.tobytes()
+
+def _delta_decode(data):
+    if HAVE_NUMPY:
+        import numpy as np
+        return np.cumsum(np.frombuffer(data, dtype='<i2'), dtype='<i2').tobytes()
+    deltas = array.array('h')
+    deltas.frombytes(data)
+    if sys.byteorder == 'big':
+        deltas.byteswap()
+    wrap = lambda total, delta: (total + delta + 32768) % 65536 - 32768
+    samples = array.array('h', accumulate(deltas, wrap))
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+class _ZpcmStream:
+    def __init__(self, fileobj, sample_rate, codec, level, block_frames):
+        self.fileobj = fileobj
+        self.block_bytes = block_frames * 2
+        self.codec_id, self._compress, _ = CODECS[codec]
+        self.level = level
+        self.filter = FILTER_DELTA if HAVE_NUMPY else FILTER_NONE
+        self.index = []
+        self.frames = 0
+        self._pending = bytearray()
+        fileobj.write(ZPCM_HEADER.pack(ZPCM_MAGIC, ZPCM_VERSION, self.codec_id, self.filter,
+                                       2, 1, sample_rate, block_frames))
+        self._offset = ZPCM_HEADER.size
+
+    def write(self, chunk):
+        self._pending += chunk
+        while len(self._pending) >= self.block_bytes:
+            self._write_block(self._pending[:self.block_bytes])
+            del self._pending[:self.block_bytes]
+
+    def _write_block(self, pcm):
+        with METRICS.timer(PACK):
+            if self.filter == FILTER_DELTA:
+                pcm = _delta_encode(pcm)
+            data = self._compress(bytes(pcm), self.level)
+        with METRICS.timer(WRITE):
+            self.fileobj.write(data)
+        METRICS.increment('bytes_written', len(data))
+        frames = len(pcm) // 2
+        self.index.append((self._offset, len(data), frames))
+        self._offset += len(data)
+        self.frames += frames
+
+    def close(self):
+        if self._pending:
+            self._write_block(self._pending)
+            self._pending.clear()
+        index_offset = self._offset
+        self.fileobj.write(b''.join(ZPCM_INDEX_ENTRY.pack(*entry) for entry in self.index))
+        self.fileobj.write(ZPCM_FOOTER.pack(index_offset, self.frames, ZPCM_INDEX_MAGIC))
+
+class ZpcmReader:
+    """
+    Random access to a .zpcm file; only the blocks covering the requested
+    frames are read and decompressed
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self):
+        header = self._file.read(ZPCM_HEADER.size)
+        if len(header) < ZPCM_HEADER.size:
+            raise ValueError(f"{self.path} is not a ZPCM file")
+        magic, version, codec_id, self.filter, self.sample_width, self.channels, \
+            self.sample_rate, self.block_frames = ZPCM_HEADER.unpack(header)
+        if magic != ZPCM_MAGIC or version != ZPCM_VERSION or codec_id not in CODEC_IDS:
+            raise ValueError(f"{self.path} is not a supported ZPCM file")
+        self.codec = CODEC_IDS[codec_id]
+        self._decompress = CODECS[self.codec][2]
+
+        self._file.seek(-ZPCM_FOOTER.size, io.SEEK_END)
+        footer_offset = self._file.tell()
+        index_offset, self.frames, index_magic = ZPCM_FOOTER.unpack(self._file.read(ZPCM_FOOTER.size))
+        if index_magic != ZPCM_INDEX_MAGIC:
+            raise ValueError(f"{self.path} has no block index")
+        self._file.seek(index_offset)
+        entries = self._file.read(footer_offset - index_offset)
+        self.index = list(ZPCM_INDEX_ENTRY.iter_unpack(entries))
+        self._block_starts = list(accumulate((frames for _, _, frames in self.index), initial=0))
+
+    @property
+    def duration(self):
+        """Length in seconds"""
+        return self.frames / self.sample_rate
+
+    def read_block(self, number):
+        """Decode one block to little-endian int16 PCM bytes"""
+        offset, size, _ = self.index[number]
+        self._file.seek(offset)
+        data = self._decompress(self._file.read(size))
+        if self.filter == FILTER_DELTA:
+            data = _delta_decode(data)
+        return data
+
+    def read(self, start=0, stop=None):
+        """Return frames [start, stop) as little-endian int16 PCM bytes"""
+        start, stop, _ = slice(start, stop).indices(self.frames)
+        if stop <= start:
+            return b''
+        first = bisect.bisect_right(self._block_starts, start) - 1
+        last = bisect.bisect_right(self._block_starts, stop - 1) - 1
+        data = b''.join(self.read_block(number) for number in range(first, last + 1))
+        skip = (start - self._block_starts[first]) * 2
+        return data[skip:skip + (stop - start) * 2]
+
+    def __len__(self):
+        return self.frames
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+class ThreadedStream:
+    """
+    Runs an encoder stream in a worker thread
+
+    write() hands chunks over through a bounded queue, so rendering in the
+    caller overlaps compression in the worker (zlib, lzma and NumPy release
+    the GIL) while at most max_chunks chunks wait in memory. Errors raised
+    in the worker are re-raised by the next write() or by close().
+    """
+    def __init__(self, stream, max_chunks=ENCODE_QUEUE_CHUNKS):
+        self.stream = stream
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="encoder", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        done = False
+        try:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    done = True
+                    break
+                self.stream.write(chunk)
+            self.stream.close()
+        except BaseException as e:
+            self._error = e
+            # Keep draining so the producer never blocks on a dead worker,
+            # unless close() has already queued its final None
+            while not done:
+                done = self._queue.get() is None
+
+    def write(self, chunk):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(bytes(chunk))
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,72 @@
+"""
+Note fade and crossfade tables for the Voice-to-Music Generator
+Using only Python standard library (NumPy blends crossfades when installed)
+
+A fade table holds the gains of a rising fade; read backwards it is the
+matching falling fade. Tables are designed once per (frames, shape) and
+shared as read-only memoryviews of doubles, which NumPy views without
+copying, so fading a note costs one in-place multiply per faded frame.
+"""
+
+import math
+import array
+import logging
+import importlib.util
+from functools import lru_cache
+from config import *
+
+logger = logging.getLogger(__name__)
+
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Gain at x in [0, 1] of each fade curve
+FADE_SHAPES = {
+    'linear': lambda x: x,
+    'cosine': lambda x: 0.5 - 0.5 * math.cos(math.pi * x),
+    'equal_power': lambda x: math.sin(0.5 * math.pi * x)
+}
+
+def fade_frames(seconds, sample_rate=SAMPLE_RATE):
+    """Frames in a fade of the given length"""
+    return int(sample_rate * seconds)
+
+@lru_cache(maxsize=128)
+def fade_table(frames, shape=SYNTH_FADE_SHAPE):
+    """
+    Gains of a rising fade over frames frames as a read-only 'd' memoryview
+
+    Gains are sampled at frame centres, so a table and its reverse sum to
+    one (linear, cosine) or have squares summing to one (equal_power).
+    """
+    curve = FADE_SHAPES.get(shape)
+    if curve is None:
+        raise ValueError(f"Unsupported fade shape: {shape}")
+    gains = array.array('d', (curve((index + 0.5) / frames) for index in range(frames)))
+    return memoryview(gains.tobytes()).cast('d')
+
+def crossfade(outgoing, incoming, shape=SYNTH_FADE_SHAPE):
+    """
+    Blend two equally long int16 blocks (anything exposing 'h' samples or
+    int16 bytes), fading outgoing out while incoming fades in; returns
+    the blended int16 block
+    """
+    if HAVE_NUMPY:
+        import numpy as np
+        outgoing = np.frombuffer(outgoing, dtype=np.int16)
+        incoming = np.frombuffer(incoming, dtype=np.int16)
+        gains = np.frombuffer(fade_table(len(incoming), shape))
+        mix = incoming * gains
+        mix += outgoing * gains[::-1]
+        np.rint(mix, out=mix)
+        # Only equal power gains sum past one, so only they can overflow
+        if shape == 'equal_power':
+            np.clip(mix, -MAX_AMPLITUDE - 1, MAX_AMPLITUDE, out=mix)
+        return mix.astype(np.int16)
+
+    outgoing = memoryview(outgoing).cast('B').cast('h')
+    incoming = memoryview(incoming).cast('B').cast('h')
+    fade_in = fade_table(len(incoming), shape)
+    return array.array('h', (
+        max(-MAX_AMPLITUDE - 1, min(MAX_AMPLITUDE, round(a * fade_out + b * gain)))
+        for a, b, fade_out, gain in zip(outgoing, incoming, reversed(fade_in), fade_in)
+    ))
@@ -1,31 +1,26 @@
-from midiutil import MIDIFile
-import random
+from config import MIDI_DIR, init_output_dirs
+from score import Score
+from tokenizer import TextMapper
+from midi_writer import write_midi
+from utils import generate_filename, get_file_path
 
-def generate_music(command):
+# Built once; unknown words get a stable note from a hash of the word
+MAPPER = TextMapper()
+
+def generate_music(command, midi_filename=None):
     """
     Generates a MIDI file based on the recognized command.
     Each word in the command is mapped to a musical note.
+    Output goes to a unique file under MIDI_DIR unless a filename is given.
     """
-    midi = MIDIFile(1)
-    midi.addTempo(0, 0, 120)  # Set tempo to 120 BPM
-    
-    notes = {
-        "C": 60, "D": 62, "E": 64, "F": 65, "G": 67, "A": 69, "B": 71,
-        "DO": 60, "RE": 62, "MI": 64, "FA": 65, "SOL": 67, "LA": 69, "SI": 71
-    }
-    
-    words = command.split()
-    time = 0  # Start time for MIDI notes
-    
-    for word in words:
-        note = notes.get(word.upper(), random.choice(list(notes.values())))
-        midi.addNote(0, 0, note, time, 1, 100)  # Add note to track 0, channel 0
-        time += 1  # Move to the next beat
+    # One beat per note at 120 BPM
+    score = Score.from_pitches(MAPPER.map_text(command), 0.5, tempo=120)
     
     # Save the MIDI file
-    midi_filename = "generated_music.mid"
-    with open(midi_filename, "wb") as output_file:
-        midi.writeFile(output_file)
+    if midi_filename is None:
+        init_output_dirs()
+        midi_filename = get_file_path(MIDI_DIR, generate_filename("generated_music", "mid"))
+    write_midi(score, midi_filename)
     print(f"MIDI file '{midi_filename}' successfully created!")
     
     return midi_filename
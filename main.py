@@ -4,10 +4,99 @@ Using only Python standard library
 """
 
 import sys
+import argparse
+from config import *
 from audio_processor import AudioProcessor
 from music_generator import MusicGenerator
+from metrics import METRICS
+from utils import setup_logging
 
-def main():
+def parse_args(argv=None):
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Voice-to-Music Generator")
+    parser.add_argument("--metrics", default=METRICS_FILE,
+                        help="Write stage timings and counters here on exit (.prom for Prometheus text)")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch_parser = subparsers.add_parser("batch", help="Render a file of prompts in parallel")
+    batch_parser.add_argument("prompts", help="Prompt file, one prompt per line or JSONL")
+    batch_parser.add_argument("--manifest", help="Path of the JSONL manifest to write")
+    batch_parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Directory for rendered files")
+    batch_parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                              help="Number of worker processes (default: all cores)")
+    
+    serve_parser = subparsers.add_parser("serve", help="Run the asyncio generation server")
+    serve_parser.add_argument("--host", default=SERVER_HOST, help="Address to listen on")
+    serve_parser.add_argument("--port", type=int, default=SERVER_PORT, help="TCP port to listen on")
+    serve_parser.add_argument("--unix-socket", help="Listen on this Unix socket path instead of TCP")
+    serve_parser.add_argument("--max-in-flight", type=int, default=SERVER_MAX_IN_FLIGHT,
+                              help="Requests rendered concurrently")
+    serve_parser.add_argument("--queue-depth", type=int, default=SERVER_QUEUE_DEPTH,
+                              help="Requests allowed to wait before answering busy")
+    
+    speech_parser = subparsers.add_parser("speech", help="Turn the speech in a WAV recording into music")
+    speech_parser.add_argument("recording", help="WAV file to segment and recognize")
+    speech_parser.add_argument("--backend", default=RECOGNIZER_BACKEND,
+                               help="Recognizer backend (google, or stub for offline runs)")
+    speech_parser.add_argument("--workers", type=int, default=RECOGNIZER_WORKERS,
+                               help="Segments recognized concurrently")
+    speech_parser.add_argument("--format", default=OUTPUT_FORMAT, help="Output format of the music")
+    
+    return parser.parse_args(argv)
+
+def run_batch_command(args):
+    """
+    Render a prompt file with the batch API and summarize the results
+    """
+    from batch import run_batch
+    
+    manifest_path, entries = run_batch(
+        args.prompts,
+        manifest_path=args.manifest,
+        output_dir=args.output_dir,
+        workers=args.workers
+    )
+    failures = sum(1 for entry in entries if entry['error'])
+    print(f"Rendered {len(entries) - failures}/{len(entries)} prompts")
+    print(f"Manifest written to: {manifest_path}")
+    return 1 if failures else 0
+
+def run_serve_command(args):
+    """
+    Run the generation server until interrupted
+    """
+    from server import serve
+    
+    try:
+        serve(args.host, args.port, args.unix_socket, args.max_in_flight, args.queue_depth)
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    return 0
+
+def run_speech_command(args):
+    """
+    Recognize a recording segment by segment and render each segment's
+    text while the next ones are still being recognized
+    """
+    from pipeline import SpeechPipeline
+    from recognizers import get_backend
+    
+    pipeline = SpeechPipeline(get_backend(args.backend), workers=args.workers)
+    pipeline.generator.register_metrics()
+    rendered = 0
+    for result in pipeline.run(args.recording, output_format=args.format):
+        start, stop = result.start / pipeline.detector.sample_rate, result.stop / pipeline.detector.sample_rate
+        if result.output_path is None:
+            print(f"[{start:.2f}-{stop:.2f}s] (no speech recognized)")
+            continue
+        rendered += 1
+        print(f"[{start:.2f}-{stop:.2f}s] {result.text} -> {result.output_path}")
+    print(f"Rendered {rendered} segments")
+    return 0 if rendered else 1
+
+def run_interactive():
     """
     Main application flow using standard library
     """
@@ -16,6 +105,7 @@ def main():
     
     try:
         music_generator = MusicGenerator()
+        music_generator.register_metrics()
         
         while True:
             try:
@@ -45,5 +135,25 @@ def main():
         
     print("\nThank you for using Voice-to-Music Generator!")
 
+def main(argv=None):
+    """
+    Dispatch to a subcommand or the interactive loop
+    """
+    args = parse_args(argv)
+    init_output_dirs()
+    setup_logging()
+    
+    try:
+        if args.command == "batch":
+            sys.exit(run_batch_command(args))
+        if args.command == "serve":
+            sys.exit(run_serve_command(args))
+        if args.command == "speech":
+            sys.exit(run_speech_command(args))
+        run_interactive()
+    finally:
+        if args.metrics:
+            METRICS.write(args.metrics)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,233 @@
+"""
+Hot-path metrics for the Voice-to-Music Generator
+Using only Python standard library
+
+Stages are timed with time.perf_counter_ns into fixed log-spaced
+histograms, so recording is a bisect and a few integer adds. Throughput
+counters and the stats of registered caches are exported alongside, as
+JSON or Prometheus text.
+"""
+
+import json
+import time
+import bisect
+import logging
+import threading
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# Stage names used across the code base
+TOKENIZE = "tokenize"
+SYNTHESIZE = "synthesize"
+PACK = "pack"
+WRITE = "write"
+ANALYSE = "analyse"
+
+# Upper bucket bounds in nanoseconds: 1 us doubling up to about 67 s
+BUCKET_BOUNDS_NS = tuple(1000 << shift for shift in range(27))
+
+class Histogram:
+    """
+    Latency histogram with fixed power-of-two buckets
+    """
+    __slots__ = ('counts', 'count', 'total_ns', 'min_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def observe(self, elapsed_ns):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if self.min_ns is None or elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def quantile(self, fraction):
+        """Upper bound in seconds of the bucket holding the given quantile"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, bucket in zip(BUCKET_BOUNDS_NS, self.counts):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'seconds': self.total_ns / 1e9,
+            'mean_seconds': self.total_ns / self.count / 1e9 if self.count else 0.0,
+            'min_seconds': (self.min_ns or 0) / 1e9,
+            'max_seconds': self.max_ns / 1e9,
+            'p50_seconds': self.quantile(0.5),
+            'p90_seconds': self.quantile(0.9),
+            'p99_seconds': self.quantile(0.99)
+        }
+
+class _StageTimer:
+    __slots__ = ('registry', 'stage', 'start_ns')
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.registry.observe(self.stage, time.perf_counter_ns() - self.start_ns)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+_EXHAUSTED = object()
+
+class MetricsRegistry:
+    """
+    Per-stage histograms, counters and stats collectors
+
+    Throughput is derived at export time: samples/sec is samples_rendered
+    over the synthesize time and bytes/sec is bytes_written over the write
+    time. Collectors are callables returning a flat dict of numbers, such
+    as NoteCache.stats.
+    """
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.collectors = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage):
+        """Context manager timing one occurrence of stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def timed(self, iterable, stage):
+        """
+        Yield from iterable, timing each step of it (not the consumer's work
+        between steps) as one occurrence of stage
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        clock = time.perf_counter_ns
+        while True:
+            start_ns = clock()
+            item = next(iterator, _EXHAUSTED)
+            self.observe(stage, clock() - start_ns)
+            if item is _EXHAUSTED:
+                return
+            yield item
+
+    def observe(self, stage, elapsed_ns):
+        """Record one occurrence of stage that took elapsed_ns nanoseconds"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(elapsed_ns)
+
+    def increment(self, name, amount=1):
+        """Add amount to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def register_collector(self, name, collect):
+        """Export collect() under name; a later registration replaces it"""
+        self.collectors[name] = collect
+
+    def reset(self):
+        """Drop all recorded values (collectors stay registered)"""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def _rate(self, counter, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None or not histogram.total_ns:
+            return 0.0
+        return self.counters.get(counter, 0) / (histogram.total_ns / 1e9)
+
+    def snapshot(self):
+        """Return every metric as a JSON-serializable dict"""
+        with self._lock:
+            snapshot = {
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+                'counters': dict(self.counters),
+                'rates': {
+                    'samples_per_second': self._rate('samples_rendered', SYNTHESIZE),
+                    'bytes_per_second': self._rate('bytes_written', WRITE)
+                }
+            }
+        snapshot['collectors'] = {name: collect() for name, collect in self.collectors.items()}
+        return snapshot
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix=METRICS_PREFIX):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        with self._lock:
+            histograms = {stage: (list(h.counts), h.count, h.total_ns) for stage, h in self.histograms.items()}
+        for stage, (counts, count, total_ns) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip(BUCKET_BOUNDS_NS, counts):
+                cumulative += bucket
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound / 1e9:g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total_ns / 1e9:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+        snapshot = self.snapshot()
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        gauges = sorted(snapshot['rates'].items()) + sorted(
+            (f"{collector}_{name}", value)
+            for collector, values in snapshot['collectors'].items()
+            for name, value in values.items()
+        )
+        for name, value in gauges:
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Export to path atomically: Prometheus text for .prom/.txt files,
+        JSON otherwise
+        """
+        from utils import atomic_write
+
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with atomic_write(path, "w") as metrics_file:
+            metrics_file.write(text)
+        return path
+
+# Process-wide registry used by the instrumented modules
+METRICS = MetricsRegistry()
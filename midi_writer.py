@@ -0,0 +1,98 @@
+"""
+Standard MIDI File writer for the Voice-to-Music Generator
+Using only Python standard library
+"""
+
+import struct
+import logging
+from functools import lru_cache
+from config import *
+from utils import atomic_write
+from metrics import METRICS, PACK, WRITE
+
+logger = logging.getLogger(__name__)
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+PROGRAM_CHANGE = 0xC0
+END_OF_TRACK = b'\x00\xff\x2f\x00'
+
+@lru_cache(maxsize=4096)
+def _varlen(value):
+    """Encode a delta time as a MIDI variable-length quantity"""
+    encoded = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        encoded.insert(0, 0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(encoded)
+
+def _chunk(chunk_id, payload):
+    return chunk_id + struct.pack('>L', len(payload)) + payload
+
+def _tempo_track(tempo):
+    microseconds_per_beat = round(60_000_000 / tempo)
+    payload = b'\x00\xff\x51\x03' + microseconds_per_beat.to_bytes(3, 'big') + END_OF_TRACK
+    return _chunk(b'MTrk', payload)
+
+def encode_midi(score, ticks_per_beat=MIDI_TICKS_PER_BEAT, programs=None):
+    """
+    Serialize a Score as a format 1 Standard MIDI File
+
+    Track 0 holds the tempo and every channel used gets its own track, with
+    a program change first if programs maps that channel to an instrument.
+    All note messages are sorted once, so any number of tracks costs a
+    single pass over the events.
+    """
+    if len(score):
+        if max(score.pitches) > 127 or max(score.velocities) > 127:
+            raise ValueError("MIDI pitches and velocities must be between 0 and 127")
+        if max(score.channels) > 15:
+            raise ValueError("MIDI channels must be between 0 and 15")
+    programs = programs or {}
+
+    ticks_per_second = score.tempo / 60 * ticks_per_beat
+    messages = []
+    for onset, duration, pitch, velocity, channel in score:
+        start = round(onset * ticks_per_second)
+        end = max(start + 1, round((onset + duration) * ticks_per_second))
+        # At equal ticks, note-offs (0) sort before note-ons (1)
+        messages.append((channel, start, 1, pitch, velocity))
+        messages.append((channel, end, 0, pitch, 0))
+    messages.sort()
+
+    tracks = [_tempo_track(score.tempo)]
+    track = None
+    current_channel = None
+    previous_tick = 0
+    for channel, tick, is_on, pitch, velocity in messages:
+        if channel != current_channel:
+            if track is not None:
+                track += END_OF_TRACK
+                tracks.append(_chunk(b'MTrk', track))
+            track = bytearray()
+            if channel in programs:
+                track += bytes((0, PROGRAM_CHANGE | channel, programs[channel]))
+            current_channel = channel
+            previous_tick = 0
+        track += _varlen(tick - previous_tick)
+        track += bytes(((NOTE_ON if is_on else NOTE_OFF) | channel, pitch, velocity))
+        previous_tick = tick
+    if track is not None:
+        track += END_OF_TRACK
+        tracks.append(_chunk(b'MTrk', track))
+
+    header = _chunk(b'MThd', struct.pack('>HHH', 1, len(tracks), ticks_per_beat))
+    return header + b''.join(tracks)
+
+def write_midi(score, output_path, ticks_per_beat=MIDI_TICKS_PER_BEAT, programs=None):
+    """
+    Write a Score to output_path atomically and return the path
+    """
+    with METRICS.timer(PACK):
+        data = encode_midi(score, ticks_per_beat, programs)
+    with atomic_write(output_path) as output_file, METRICS.timer(WRITE):
+        output_file.write(data)
+    METRICS.increment('bytes_written', len(data))
+    logger.debug(f"Wrote {len(score)} notes to {output_path}")
+    return output_path
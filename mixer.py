@@ -0,0 +1,156 @@
+"""
+Polyphonic mixing engine for the Voice-to-Music Generator
+Uses NumPy, imported on the first render
+"""
+
+import logging
+from config import *
+from score import MIDI_FREQUENCIES
+from oscillator import wavetable, table_lookup
+
+logger = logging.getLogger(__name__)
+
+class Envelope:
+    """
+    ADSR envelope; times in seconds, sustain as a fraction of full level
+    """
+    def __init__(self, attack=MIXER_ATTACK, decay=MIXER_DECAY, sustain=MIXER_SUSTAIN,
+                 release=MIXER_RELEASE):
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release = release
+
+    def breakpoints(self, note_frames, sample_rate):
+        """
+        Return (frames, levels) breakpoints for a note held note_frames
+        frames, ending at silence release frames after note-off
+        """
+        attack = max(1, round(self.attack * sample_rate))
+        decay_end = attack + round(self.decay * sample_rate)
+        release = round(self.release * sample_rate)
+        frames = [0, attack, decay_end]
+        levels = [0.0, 1.0, self.sustain]
+
+        # A note released before the decay finishes releases from where it is
+        held = [(frame, level) for frame, level in zip(frames, levels) if frame < note_frames]
+        off_level = levels[-1]
+        for (x0, y0), (x1, y1) in zip(zip(frames, levels), zip(frames[1:], levels[1:])):
+            if x0 <= note_frames < x1:
+                off_level = y0 + (y1 - y0) * (note_frames - x0) / (x1 - x0)
+                break
+        frames = [frame for frame, _ in held] + [note_frames, note_frames + release]
+        levels = [level for _, level in held] + [off_level, 0.0]
+        return frames, levels
+
+class _Voice:
+    """One sounding note: sample span, wavetable, phase step, gain and envelope"""
+    __slots__ = ('start', 'end', 'table', 'step', 'gain', 'env_frames', 'env_levels')
+
+    def __init__(self, start, table, step, gain, env_frames, env_levels):
+        self.start = start
+        self.end = start + env_frames[-1]
+        self.table = table
+        self.step = step
+        self.gain = gain
+        self.env_frames = env_frames
+        self.env_levels = env_levels
+
+class Mixer:
+    """
+    Renders overlapping notes of a Score into int16 PCM blocks
+
+    Each block is summed in a float64 accumulator from only the voices
+    sounding in it, so cost follows active voices per block rather than
+    total notes. Voices read the wavetable of their channel's waveform
+    (channel_waveforms, falling back to waveform). The sum is scaled by
+    master_gain, soft clipped with tanh, optionally TPDF dithered and
+    quantized to int16.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, envelope=None, master_gain=MIXER_MASTER_GAIN,
+                 channel_gains=None, dither=MIXER_DITHER, seed=0, waveform=SYNTH_WAVEFORM,
+                 channel_waveforms=None):
+        self.sample_rate = sample_rate
+        self.waveform = waveform
+        self.channel_waveforms = channel_waveforms or {}
+        self.envelope = envelope or Envelope()
+        self.master_gain = master_gain
+        self.channel_gains = channel_gains or {}
+        self.dither = dither
+        self.seed = seed
+
+    def _voices(self, score):
+        """Turn score events into voices sorted by start frame"""
+        voices = []
+        for onset, duration, pitch, velocity, channel in score:
+            start = round(onset * self.sample_rate)
+            note_frames = round(duration * self.sample_rate)
+            env_frames, env_levels = self.envelope.breakpoints(note_frames, self.sample_rate)
+            table = wavetable(self.channel_waveforms.get(channel, self.waveform))
+            step = MIDI_FREQUENCIES[pitch] / self.sample_rate
+            gain = velocity / 127 * self.channel_gains.get(channel, 1.0)
+            voices.append(_Voice(start, table, step, gain, env_frames, env_levels))
+        voices.sort(key=lambda voice: voice.start)
+        return voices
+
+    def frame_count(self, score):
+        """Frames rendered for score, including the last release tail"""
+        return max((voice.end for voice in self._voices(score)), default=0)
+
+    def iter_blocks(self, score, block_frames=STREAM_CHUNK_FRAMES):
+        """
+        Yield the mixed score as int16 NumPy blocks of at most block_frames frames
+        """
+        import numpy as np
+
+        voices = self._voices(score)
+        total = max((voice.end for voice in voices), default=0)
+        rng = np.random.default_rng(self.seed)
+        accumulator = np.empty(block_frames)
+        offsets = np.arange(block_frames, dtype=np.float64)
+        scratch = np.empty(block_frames)
+        envelope = np.empty(block_frames)
+
+        active = []
+        next_voice = 0
+        for block_start in range(0, total, block_frames):
+            block_end = min(block_start + block_frames, total)
+            size = block_end - block_start
+            while next_voice < len(voices) and voices[next_voice].start < block_end:
+                active.append(voices[next_voice])
+                next_voice += 1
+            active = [voice for voice in active if voice.end > block_start]
+
+            mix = accumulator[:size]
+            mix.fill(0.0)
+            for voice in active:
+                lo = max(voice.start, block_start)
+                hi = min(voice.end, block_end)
+                count = hi - lo
+                # Sample index within the note for each frame of the span
+                position = scratch[:count]
+                np.add(offsets[:count], lo - voice.start, out=position)
+                env = envelope[:count]
+                env[...] = np.interp(position, voice.env_frames, voice.env_levels)
+                env *= voice.gain
+                position *= voice.step
+                table_lookup(voice.table, position, out=position)
+                position *= env
+                mix[lo - block_start:hi - block_start] += position
+
+            yield self._quantize(mix, rng)
+
+    def _quantize(self, mix, rng):
+        """Soft clip a float block and convert it to int16"""
+        import numpy as np
+
+        mix *= self.master_gain
+        np.tanh(mix, out=mix)
+        mix *= MAX_AMPLITUDE
+        if self.dither:
+            # Triangular dither of +/- 1 LSB
+            mix += rng.random(len(mix))
+            mix -= rng.random(len(mix))
+        np.rint(mix, out=mix)
+        np.clip(mix, -MAX_AMPLITUDE - 1, MAX_AMPLITUDE, out=mix)
+        return mix.astype('<i2')
@@ -4,59 +4,279 @@ Using only Python standard library
 """
 
 import wave
-import struct
-import math
-import random
 import logging
 from config import *
+from synthesizer import Synthesizer
+from note_cache import NoteCache
+from score import Score
+from tokenizer import SCALES, TextMapper, Vocabulary
+from mixer import Mixer
+from oscillator import Oscillator
+from fades import crossfade, fade_frames
+from midi_writer import write_midi
+from encoders import ThreadedStream, get_encoder
+from render_cache import RenderCache
+from metrics import METRICS, TOKENIZE, SYNTHESIZE, WRITE
+from utils import atomic_write, generate_filename, get_file_path
 
 logger = logging.getLogger(__name__)
 
 class MusicGenerator:
     def __init__(self):
         self.sample_rate = SAMPLE_RATE
-        self.note_mapping = {
-            "DO": 261.63,  # C4
-            "RE": 293.66,  # D4
-            "MI": 329.63,  # E4
-            "FA": 349.23,  # F4
-            "SOL": 392.00, # G4
-            "LA": 440.00,  # A4
-            "SI": 493.88   # B4
-        }
+        vocabulary = Vocabulary.load(VOCABULARY_PATH) if VOCABULARY_PATH else Vocabulary()
+        self.mapper = TextMapper(vocabulary, SCALE)
+        self.note_mapping = vocabulary.index
+        self.scales = SCALES
+        self.tempo = DEFAULT_TEMPO
+        self.note_duration = 0.5  # seconds per note
+        self.waveform = SYNTH_WAVEFORM
+        self.continuous_phase = SYNTH_CONTINUOUS_PHASE
+        self.crossfade = SYNTH_CROSSFADE
+        self.note_cache = NoteCache(NOTE_CACHE_MAX_BYTES)
+        self.synthesizer = Synthesizer(self.sample_rate, cache=self.note_cache, attack=SYNTH_ATTACK,
+                                       release=SYNTH_RELEASE, fade_shape=SYNTH_FADE_SHAPE)
+        self.mixer = Mixer(self.sample_rate)
+        init_output_dirs()
+        self.render_cache = RenderCache() if RENDER_CACHE_ENABLED else None
         logger.info("MusicGenerator initialized")
 
-    def generate_music(self, text):
+    def register_metrics(self, registry=METRICS):
         """
-        Generate simple sine wave based music
+        Export this generator's cache statistics from registry; call once
+        from the code that owns the generator, since a registry holds one
+        collector per name
         """
-        try:
-            words = text.split()
-            samples = []
-            duration = 0.5  # seconds per note
+        registry.register_collector('note_cache', self.note_cache.stats)
+        if self.render_cache is not None:
+            registry.register_collector('render_cache', self.render_cache.stats)
+
+    def map_word_to_note(self, word, octave_shift=0, scale=None):
+        """
+        MIDI pitch of one word in the generator's scale, or in scale if given
+        """
+        mapper = self.mapper
+        if scale is not None and scale != mapper.scale:
+            mapper = TextMapper(mapper.vocabulary, scale)
+        return min(127, max(0, mapper.map_word(word) + 12 * octave_shift))
+
+    def parse_score(self, text):
+        """
+        Map each word of the text to a note and lay the notes end to end
+        """
+        with METRICS.timer(TOKENIZE):
+            return Score.from_pitches(self.mapper.map_text(text), self.note_duration, tempo=self.tempo)
+
+    def parse_scores(self, texts):
+        """Parse many texts at once, one Score per text"""
+        with METRICS.timer(TOKENIZE):
+            return [Score.from_pitches(pitches, self.note_duration, tempo=self.tempo)
+                    for pitches in self.mapper.map_texts(texts)]
+
+    def _as_score(self, text_or_score):
+        if isinstance(text_or_score, Score):
+            return text_or_score
+        return self.parse_score(text_or_score)
+
+    def iter_pcm_chunks(self, score, chunk_frames=STREAM_CHUNK_FRAMES):
+        """
+        Yield the score as int16 PCM chunks of at most chunk_frames frames
+
+        Notes that follow each other are rendered one at a time and sliced
+        with memoryview, so no more than one note block is held in memory at
+        once. Scores with overlapping notes (chords, several parts) go
+        through the mixer block by block instead.
+
+        Notes carry the synthesizer's attack and release fades. With
+        crossfade set, each note is rendered that much longer and its
+        extra frames are blended into the start of the next note, so the
+        total length is unchanged. With continuous_phase set, notes continue
+        one oscillator instead of each starting at phase 0, which avoids
+        clicks at note boundaries without fades but bypasses the note cache.
+        """
+        if not score.is_sequential():
+            for block in METRICS.timed(self.mixer.iter_blocks(score, chunk_frames), SYNTHESIZE):
+                METRICS.increment('samples_rendered', len(block))
+                yield memoryview(block).cast('B')
+            return
+
+        oscillator = Oscillator(self.waveform, self.sample_rate) if self.continuous_phase else None
+        overlap = 0 if oscillator is not None else fade_frames(self.crossfade, self.sample_rate)
+        durations = list(score.durations)
+        chunk_bytes = chunk_frames * 2
+        held = None
+        for index, (frequency, duration) in enumerate(zip(score.frequencies(), durations)):
+            # A tail never reaches past the end of the note it blends into
+            tail = 0
+            if overlap and index + 1 < len(durations):
+                tail = min(overlap, self.synthesizer.frame_count(durations[index + 1]))
+            with METRICS.timer(SYNTHESIZE):
+                if oscillator is not None:
+                    pcm = self.synthesizer.render_with(oscillator, frequency, duration)
+                else:
+                    pcm = self.synthesizer.note_pcm(frequency, duration, self.waveform, tail)
+                block = memoryview(pcm).cast('B')
+                head = block[:0]
+                if held is not None:
+                    blended = crossfade(held, block[:len(held)], self.synthesizer.fade_shape)
+                    head = memoryview(blended).cast('B')
+                    block = block[len(held):]
+                held = None
+                if tail:
+                    held = block[len(block) - 2 * tail:]
+                    block = block[:len(block) - 2 * tail]
+            METRICS.increment('samples_rendered', (len(head) + len(block)) // 2)
+            for part in (head, block):
+                for start in range(0, len(part), chunk_bytes):
+                    yield part[start:start + chunk_bytes]
+
+    def frame_count(self, score):
+        """Number of frames the score renders to"""
+        if not score.is_sequential():
+            return self.mixer.frame_count(score)
+        return sum(map(self.synthesizer.frame_count, score.durations))
+
+    def _write_wav(self, target, score, chunk_frames=STREAM_CHUNK_FRAMES):
+        """
+        Stream the score into a WAV file opened on target (path or file object)
+        """
+        with wave.open(target, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            # Declaring the length up front lets the header be written once;
+            # writeframesraw skips the per-call header patch (a seek), which
+            # also makes unseekable targets such as sockets work
+            frames = self.frame_count(score)
+            wav_file.setnframes(frames)
             
-            for word in words:
-                word = word.upper()
-                frequency = self.note_mapping.get(word, 440.0)  # default to A4
-                
-                # Generate sine wave
-                for i in range(int(self.sample_rate * duration)):
-                    t = float(i) / self.sample_rate
-                    value = int(32767 * math.sin(2 * math.pi * frequency * t))
-                    samples.append(value)
+            for chunk in self.iter_pcm_chunks(score, chunk_frames):
+                with METRICS.timer(WRITE):
+                    wav_file.writeframesraw(chunk)
+            METRICS.increment('bytes_written', frames * 2)
+        return frames
+
+    def stream_music(self, text, fileobj, chunk_frames=STREAM_CHUNK_FRAMES):
+        """
+        Render the text (or a parsed Score) as WAV data straight into a
+        writable file object or connected socket, chunk by chunk. A WAV
+        already in the render cache is copied out instead of re-rendered.
+        Returns the number of frames written.
+        """
+        try:
+            if not hasattr(fileobj, 'write') and hasattr(fileobj, 'makefile'):
+                with fileobj.makefile('wb') as stream:
+                    return self._stream_wav(stream, self._as_score(text), chunk_frames)
+            return self._stream_wav(fileobj, self._as_score(text), chunk_frames)
+
+        except Exception as e:
+            logger.error(f"Error during music streaming: {str(e)}")
+            raise
+
+    def _stream_wav(self, fileobj, score, chunk_frames):
+        cached_file = None
+        if self.render_cache is not None:
+            cache_key = self.render_cache.make_key(score, self.render_settings("wav"), "wav")
+            cached_file = self.render_cache.open(cache_key)
+        if cached_file is None:
+            return self._write_wav(fileobj, score, chunk_frames)
+        
+        with cached_file:
+            with wave.open(cached_file, 'rb') as wav_file:
+                frames = wav_file.getnframes()
+            cached_file.seek(0)
+            while True:
+                chunk = cached_file.read(chunk_frames * 2)
+                if not chunk:
+                    break
+                with METRICS.timer(WRITE):
+                    fileobj.write(chunk)
+                METRICS.increment('bytes_written', len(chunk))
+        return frames
+
+    def render_settings(self, output_format):
+        """
+        Everything besides the score that shapes rendered output, used to
+        key the render cache
+        """
+        envelope = self.mixer.envelope
+        return {
+            'sample_rate': self.sample_rate,
+            'amplitude': self.synthesizer.amplitude,
+            'waveform': self.waveform,
+            'continuous_phase': self.continuous_phase,
+            'fades': [self.synthesizer.attack, self.synthesizer.release, self.synthesizer.fade_shape,
+                      self.crossfade],
+            'output_format': output_format,
+            'mixer': [envelope.attack, envelope.decay, envelope.sustain, envelope.release,
+                      self.mixer.master_gain, sorted(self.mixer.channel_gains.items()),
+                      self.mixer.dither, self.mixer.seed, self.mixer.waveform,
+                      sorted(self.mixer.channel_waveforms.items())]
+        }
+
+    def _encode(self, output_file, score, encoder):
+        """
+        Render the score and feed it to encoder, which runs in a worker
+        thread so compression overlaps rendering
+        """
+        stream = ThreadedStream(encoder.open(output_file, self.sample_rate))
+        try:
+            for chunk in self.iter_pcm_chunks(score):
+                stream.write(chunk)
+        finally:
+            stream.close()
+
+    def generate_music(self, text, output_path=None, output_format=OUTPUT_FORMAT):
+        """
+        Generate simple sine wave based music from text or a parsed Score
+
+        Each call writes to a unique file under OUTPUT_DIR unless output_path
+        is given. The file is written to a temporary file and renamed into
+        place, so concurrent workers never see or clobber partial output.
+        output_format names an entry of encoders.OUTPUT_FORMATS; plain "wav"
+        is written directly, other formats go through the encoder stage.
+        Repeated requests are served from the render cache when enabled.
+        """
+        try:
+            encoder = None if output_format == "wav" else get_encoder(output_format)
+            extension = "wav" if encoder is None else encoder.extension
+            if output_path is None:
+                output_path = get_file_path(OUTPUT_DIR, generate_filename("music", extension))
             
-            # Convert to bytes
-            audio_data = struct.pack('h' * len(samples), *samples)
+            score = self._as_score(text)
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = self.render_cache.make_key(
+                    score, self.render_settings(output_format), extension
+                )
+                if self.render_cache.fetch(cache_key, output_path):
+                    return output_path
             
-            # Save as WAV file
-            with wave.open('output.wav', 'wb') as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_data)
+            with atomic_write(output_path) as output_file:
+                if encoder is None:
+                    self._write_wav(output_file, score)
+                else:
+                    self._encode(output_file, score, encoder)
             
-            return 'output.wav'
+            if cache_key is not None:
+                self.render_cache.store(cache_key, output_path)
+            return output_path
 
         except Exception as e:
             logger.error(f"Error during music generation: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def generate_midi(self, text, output_path=None, programs=None):
+        """
+        Write text or a parsed Score as a MIDI file under MIDI_DIR unless
+        output_path is given. Parse once with parse_score to produce both
+        WAV and MIDI output from the same score.
+        """
+        try:
+            if output_path is None:
+                output_path = get_file_path(MIDI_DIR, generate_filename("music", "mid"))
+            return write_midi(self._as_score(text), output_path, programs=programs)
+
+        except Exception as e:
+            logger.error(f"Error during MIDI generation: {str(e)}")
+            raise
@@ -0,0 +1,96 @@
+"""
+Note waveform cache for the Voice-to-Music Generator
+Using only Python standard library
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from config import *
+
+logger = logging.getLogger(__name__)
+
+class NoteCache:
+    """
+    LRU cache of rendered PCM blocks bounded by a byte budget
+
+    Keys are (frequency, duration, sample_rate, amplitude, waveform, fades)
+    tuples and values are immutable bytes objects, so cached blocks can be shared
+    freely between callers.
+    """
+    def __init__(self, max_bytes=NOTE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(frequency, duration, sample_rate, amplitude, waveform, fades=()):
+        """Build the cache key for a note; fades holds whatever else shapes it"""
+        return (float(frequency), float(duration), int(sample_rate), amplitude, waveform, tuple(fades))
+
+    def get(self, key):
+        """Return the cached block for key, or None on a miss"""
+        with self._lock:
+            block = self._entries.get(key)
+            if block is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, key, block):
+        """
+        Store a block, evicting least recently used entries to stay in budget
+        """
+        block = bytes(block)
+        size = len(block)
+        if size > self.max_bytes:
+            logger.debug(f"Block of {size} bytes exceeds note cache budget, not cached")
+            return block
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+            self._entries[key] = block
+            self.current_bytes += size
+        return block
+
+    def get_or_render(self, key, render):
+        """Return the cached block for key, calling render() on a miss"""
+        block = self.get(key)
+        if block is None:
+            block = self.put(key, render())
+        return block
+
+    def clear(self):
+        """Drop all cached blocks (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def __len__(self):
+        return len(self._entries)
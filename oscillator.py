@@ -0,0 +1,121 @@
+"""
+Wavetable oscillators for the Voice-to-Music Generator
+Uses NumPy, imported when the first table is built
+"""
+
+import logging
+from functools import lru_cache
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# Relative amplitude of each harmonic (1st, 2nd, ...) in one cycle
+HARMONICS = {
+    'sine': (1.0,),
+    'square': tuple(1.0 / k if k % 2 else 0.0 for k in range(1, 41)),
+    'saw': tuple((-1) ** (k + 1) / k for k in range(1, 41)),
+    'triangle': tuple((-1) ** ((k - 1) // 2) / k ** 2 if k % 2 else 0.0 for k in range(1, 41)),
+    'piano': (1.0, 0.55, 0.3, 0.22, 0.12, 0.08, 0.05, 0.03),
+    'guitar': (1.0, 0.7, 0.45, 0.35, 0.2, 0.15, 0.1, 0.06),
+    'violin': (1.0, 0.9, 0.65, 0.55, 0.45, 0.35, 0.25, 0.2, 0.15, 0.1),
+    'flute': (1.0, 0.3, 0.1, 0.05),
+    'trumpet': (1.0, 0.85, 0.75, 0.6, 0.5, 0.4, 0.3, 0.2, 0.12, 0.08)
+}
+
+TABLE_WAVEFORMS = tuple(HARMONICS)
+
+@lru_cache(maxsize=None)
+def wavetable(waveform, size=WAVETABLE_SIZE):
+    """
+    One cycle of waveform as a read-only float64 table of size + 1 points,
+    summed from its harmonics and scaled to a peak of 1. The extra point
+    repeats the first so interpolation never wraps.
+    """
+    import numpy as np
+
+    if waveform not in HARMONICS:
+        raise ValueError(f"Unsupported waveform: {waveform}")
+    amplitudes = np.array(HARMONICS[waveform])
+    harmonics = np.arange(1, len(amplitudes) + 1)
+    phase = np.arange(size + 1) * (2 * np.pi / size)
+    table = amplitudes @ np.sin(np.outer(harmonics, phase))
+    table /= np.abs(table).max()
+    table[-1] = table[0]
+    table.flags.writeable = False
+    return table
+
+def table_lookup(table, phases, out=None):
+    """
+    Linearly interpolated lookup of phases (in cycles, any real value)
+    """
+    import numpy as np
+
+    size = len(table) - 1
+    position = np.subtract(phases, np.floor(phases), out=out)
+    position *= size
+    index = position.astype(np.intp)
+    # Rounding can put a phase just below a whole cycle at exactly size
+    np.minimum(index, size - 1, out=index)
+    position -= index
+    left = table[index]
+    position *= table[index + 1] - left
+    position += left
+    return position
+
+class Oscillator:
+    """
+    Wavetable oscillator driven by a phase accumulator
+
+    The phase carries over from one render() call to the next, so notes
+    rendered back to back join without a discontinuity.
+    """
+    def __init__(self, waveform='sine', sample_rate=SAMPLE_RATE, table_size=WAVETABLE_SIZE):
+        self.waveform = waveform
+        self.sample_rate = sample_rate
+        self.table = wavetable(waveform, table_size)
+        self.phase = 0.0  # in cycles, kept in [0, 1)
+        self._ramp = None
+
+    def render(self, frequency, frames, out=None):
+        """Render frames samples at frequency as a float64 block in [-1, 1]"""
+        import numpy as np
+
+        if self._ramp is None or len(self._ramp) < frames:
+            self._ramp = np.arange(frames, dtype=np.float64)
+        increment = frequency / self.sample_rate
+        phases = np.multiply(self._ramp[:frames], increment, out=out)
+        phases += self.phase
+        self.phase = (self.phase + increment * frames) % 1.0
+        return table_lookup(self.table, phases, out=phases)
+
+    def reset(self, phase=0.0):
+        """Restart the cycle at phase (in cycles)"""
+        self.phase = phase % 1.0
+
+class OscillatorBank:
+    """
+    One phase-continuous oscillator per key (voice, channel or part)
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, waveform='sine'):
+        self.sample_rate = sample_rate
+        self.waveform = waveform
+        self._oscillators = {}
+
+    def oscillator(self, key, waveform=None):
+        """Return the oscillator for key, creating it on first use"""
+        oscillator = self._oscillators.get(key)
+        if oscillator is None:
+            oscillator = Oscillator(waveform or self.waveform, self.sample_rate)
+            self._oscillators[key] = oscillator
+        return oscillator
+
+    def render(self, key, frequency, frames, out=None):
+        """Continue the oscillator for key for frames samples"""
+        return self.oscillator(key).render(frequency, frames, out)
+
+    def reset(self):
+        """Drop every oscillator, so all phases restart at zero"""
+        self._oscillators.clear()
+
+    def __len__(self):
+        return len(self._oscillators)
@@ -0,0 +1,113 @@
+"""
+Speech-to-music pipeline for the Voice-to-Music Generator
+Using only Python standard library (NumPy is loaded by the detector)
+
+Three stages run at the same time:
+    segment     a feeder thread runs voice activity detection over the input
+    recognize   a thread pool sends each closed segment to the backend
+    render      the caller's thread renders recognized text in input order
+A bounded queue of pending segments links them, so a slow stage throttles
+the ones before it. While a segment renders, the following ones are
+already being recognized, so the time per segment approaches that of the
+slowest stage instead of the sum of all stages.
+"""
+
+import queue
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from metrics import METRICS
+from recognizers import get_backend
+from vad import VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
+
+RECOGNIZE = "recognize"
+
+# One rendered segment: sample span, recognized text and output file
+# (output_path is None when the segment had no recognizable speech)
+PipelineResult = namedtuple('PipelineResult', ['start', 'stop', 'text', 'output_path'])
+
+# Marks the feeder's last queue record, (_DONE, error); error is the
+# exception that stopped segmentation, or None when the input ran out
+_DONE = object()
+
+class SpeechPipeline:
+    """
+    Recognizes the speech segments of recordings and renders each one to
+    music as soon as its text is known
+    """
+    def __init__(self, backend=None, generator=None, detector=None,
+                 workers=RECOGNIZER_WORKERS, max_pending=PIPELINE_QUEUE_SEGMENTS):
+        self.backend = backend or get_backend(RECOGNIZER_BACKEND)
+        if generator is None:
+            from music_generator import MusicGenerator
+            generator = MusicGenerator()
+        self.generator = generator
+        self.detector = detector or VoiceActivityDetector()
+        self.workers = workers
+        self.max_pending = max_pending
+
+    def _recognize(self, segment, sample_rate):
+        with METRICS.timer(RECOGNIZE):
+            return self.backend.recognize(segment.samples, sample_rate)
+
+    def _feed(self, audio, executor, pending, stop):
+        try:
+            for segment in self.detector.segments(audio):
+                future = executor.submit(self._recognize, segment, self.detector.sample_rate)
+                pending.put((segment, future))
+                if stop.is_set():
+                    return
+        except BaseException as e:
+            pending.put((_DONE, e))
+            return
+        pending.put((_DONE, None))
+
+    def run(self, audio, output_format=OUTPUT_FORMAT):
+        """
+        Yield a PipelineResult per speech segment of audio (a WAV path,
+        WavSource or int16 array), in input order, each as soon as it has
+        been rendered. Errors from any stage are re-raised here.
+        """
+        pending = queue.Queue(maxsize=self.max_pending)
+        stop = threading.Event()
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="recognizer") as executor:
+            feeder = threading.Thread(target=self._feed, args=(audio, executor, pending, stop),
+                                      name="segmenter", daemon=True)
+            feeder.start()
+            try:
+                while True:
+                    record = pending.get()
+                    if record[0] is _DONE:
+                        _, error = record
+                        if error is not None:
+                            raise error
+                        break
+                    segment, future = record
+                    text = future.result()
+                    output_path = None
+                    if text.strip():
+                        output_path = self.generator.generate_music(text, output_format=output_format)
+                    yield PipelineResult(segment.start, segment.stop, text, output_path)
+            finally:
+                # Unblock the feeder if the caller stopped early or a stage failed
+                stop.set()
+                while feeder.is_alive():
+                    try:
+                        record = pending.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    if record[0] is not _DONE:
+                        _, future = record
+                        future.cancel()
+                feeder.join()
+
+    def transcribe(self, audio):
+        """Recognize every segment of audio without rendering; returns the texts"""
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="recognizer") as executor:
+            futures = [executor.submit(self._recognize, segment, self.detector.sample_rate)
+                       for segment in self.detector.segments(audio)]
+            return [future.result() for future in futures]
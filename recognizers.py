@@ -0,0 +1,91 @@
+"""
+Speech recognizer backends for the Voice-to-Music Generator
+Using only Python standard library (speech_recognition is imported by the
+Google backend when it is created)
+
+A backend turns one segment of int16 mono PCM into text. RECOGNIZERS
+names the ready-made backends; register_backend adds more. Backends are
+called from several pipeline threads at once, so recognize() must be
+thread-safe.
+"""
+
+import time
+import zlib
+import logging
+from config import *
+from tokenizer import DEFAULT_VOCABULARY
+
+logger = logging.getLogger(__name__)
+
+class RecognizerBackend:
+    """
+    Base class of the recognizer backends
+
+    Subclasses implement recognize(samples, sample_rate), returning the
+    text of the segment or "" when nothing could be understood.
+    """
+    name = None
+
+    def recognize(self, samples, sample_rate):
+        raise NotImplementedError
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through the speech_recognition package"""
+    name = 'google'
+
+    def __init__(self, recognizer=None, language=LANGUAGE):
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def recognize(self, samples, sample_rate):
+        audio = self._sr.AudioData(_pcm_bytes(samples), sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return ""
+
+class StubBackend(RecognizerBackend):
+    """
+    Deterministic offline stand-in for tests and benchmarks
+
+    Emits one word per seconds_per_word of audio, chosen by a CRC32 of the
+    samples, so the same segment always gives the same text. delay adds a
+    fixed sleep per call to model a remote service.
+    """
+    name = 'stub'
+
+    def __init__(self, words=None, seconds_per_word=STUB_SECONDS_PER_WORD, delay=0.0):
+        self.words = list(words or DEFAULT_VOCABULARY)
+        self.seconds_per_word = seconds_per_word
+        self.delay = delay
+
+    def recognize(self, samples, sample_rate):
+        if self.delay:
+            time.sleep(self.delay)
+        pcm = _pcm_bytes(samples)
+        count = max(1, round(len(pcm) / 2 / sample_rate / self.seconds_per_word))
+        seed = zlib.crc32(pcm)
+        return " ".join(self.words[(seed + index) % len(self.words)] for index in range(count))
+
+RECOGNIZERS = {
+    'google': GoogleBackend,
+    'stub': StubBackend
+}
+
+def register_backend(name, factory):
+    """Make a backend factory available under name"""
+    RECOGNIZERS[name] = factory
+
+def get_backend(name, **options):
+    """Create the recognizer backend registered under name"""
+    factory = RECOGNIZERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unsupported recognizer backend: {name}")
+    return factory(**options)
+
+def _pcm_bytes(samples):
+    if isinstance(samples, (bytes, bytearray, memoryview)):
+        return bytes(samples)
+    return samples.astype('<i2', copy=False).tobytes()
@@ -0,0 +1,225 @@
+"""
+Content-addressed cache of rendered files for the Voice-to-Music Generator
+Using only Python standard library
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from config import *
+
+logger = logging.getLogger(__name__)
+
+# Bump when a rendering change alters output for the same score and settings
+RENDER_CACHE_VERSION = 2
+
+class RenderCache:
+    """
+    On-disk LRU cache of rendered output files bounded by a byte budget
+
+    Entries are files named after the hash of the score and the synthesis
+    settings that produced them. An in-process index maps keys to file
+    sizes, so lookups cost a dict access. Files are copied in and out, so
+    a delivered file never shares storage with its cache entry and editing
+    it cannot corrupt later hits. Recency is kept in file modification
+    times. The index is kept up to date in memory and rebuilt from the
+    directory only when the directory's own modification time shows that
+    another process added or removed entries, so processes sharing the
+    directory share one budget without rescanning it on every store.
+    """
+    def __init__(self, directory=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._directory_mtime = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the index from the directory, least recently used first"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.current_bytes = sum(self._entries.values())
+        self._directory_mtime = self._mtime()
+
+    def _mtime(self):
+        """Modification time of the directory, which changes as entries come and go"""
+        return os.stat(self.directory).st_mtime_ns
+
+    def _lookup(self, key):
+        """
+        True if key is cached, marking it recently used; entries stored by
+        other processes since the index was loaded are picked up here
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True
+        try:
+            size = os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.current_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+        return True
+
+    def _touch(self, key):
+        """Mark key as recently used for every process sharing the directory"""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def make_key(score, settings, extension):
+        """
+        Build the cache key (a file name) for a score rendered with settings,
+        a JSON-serializable dict of everything else that shapes the output
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps([RENDER_CACHE_VERSION, settings], sort_keys=True).encode())
+        for column in (score.onsets, score.durations, score.pitches, score.velocities, score.channels):
+            digest.update(len(column).to_bytes(8, 'little'))
+            digest.update(column)
+        return f"{digest.hexdigest()}.{extension}"
+
+    def path(self, key):
+        """Location of the cache file for key"""
+        return os.path.join(self.directory, key)
+
+    def fetch(self, key, output_path):
+        """
+        Place the cached file for key at output_path; returns False on a miss
+        """
+        if not self._lookup(key):
+            return False
+        try:
+            _copy_into_place(self.path(key), output_path)
+        except FileNotFoundError:
+            # Evicted by another process sharing the directory
+            with self._lock:
+                self.current_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return False
+        self._touch(key)
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def open(self, key):
+        """
+        Open the cached file for key for reading; returns None on a miss
+        """
+        if not self._lookup(key):
+            return None
+        try:
+            cached_file = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                self.current_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        self._touch(key)
+        with self._lock:
+            self.hits += 1
+        return cached_file
+
+    def store(self, key, source_path):
+        """
+        Add a freshly rendered file, evicting least recently used entries to
+        stay in budget
+        """
+        size = os.path.getsize(source_path)
+        if size > self.max_bytes:
+            logger.debug(f"Render of {size} bytes exceeds render cache budget, not cached")
+            return
+        # Other processes may have added or evicted entries since our last change
+        changed_elsewhere = self._mtime() != self._directory_mtime
+        _copy_into_place(source_path, self.path(key))
+
+        evicted = []
+        with self._lock:
+            if changed_elsewhere:
+                self._load_index()
+            self.current_bytes -= self._entries.pop(key, 0)
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                name, evicted_size = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+                evicted.append(name)
+            self._entries[key] = size
+            self.current_bytes += size
+        for name in evicted:
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
+        self._directory_mtime = self._mtime()
+
+    def clear(self):
+        """Delete every cached file (counters are kept)"""
+        with self._lock:
+            names = list(self._entries)
+            self._entries.clear()
+            self.current_bytes = 0
+        for name in names:
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                pass
+        self._directory_mtime = self._mtime()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+def _copy_into_place(source, destination):
+    """
+    Atomically make destination a copy of source; shutil.copyfile copies
+    in the kernel where the platform allows
+    """
+    temp_path = os.path.join(os.path.dirname(destination) or ".",
+                             f".{os.path.basename(destination)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,113 @@
+"""
+Streaming polyphase resampler for the Voice-to-Music Generator
+Uses NumPy, imported when the first filter is designed
+"""
+
+import math
+import logging
+from functools import lru_cache
+from config import *
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=32)
+def polyphase_filter(from_rate, to_rate, zero_crossings=RESAMPLE_ZERO_CROSSINGS):
+    """
+    Design the anti-aliasing filter for a rate pair, cached per pair
+
+    Returns (up, down, delay, bank): the reduced ratio up/down, the filter
+    delay in upsampled samples, and a read-only (up, taps) array whose row
+    p holds the taps of phase p in reverse order, ready for a dot product
+    with ascending input samples.
+    """
+    import numpy as np
+
+    divisor = math.gcd(from_rate, to_rate)
+    up, down = to_rate // divisor, from_rate // divisor
+    # Cutoff in cycles per upsampled sample, just below the lower Nyquist
+    cutoff = 0.5 / max(up, down) * RESAMPLE_ROLLOFF
+    half_length = math.ceil(zero_crossings / (2 * cutoff))
+    taps_per_phase = math.ceil((2 * half_length + 1) / up)
+    length = taps_per_phase * up
+
+    n = np.arange(length) - half_length
+    prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * up
+    # Taps past the windowed span only pad the bank to whole phases
+    prototype[:2 * half_length + 1] *= np.kaiser(2 * half_length + 1, RESAMPLE_KAISER_BETA)
+    prototype[2 * half_length + 1:] = 0.0
+
+    bank = prototype.reshape(taps_per_phase, up).T[:, ::-1].copy()
+    bank.flags.writeable = False
+    return up, down, half_length, bank
+
+class Resampler:
+    """
+    Converts a stream between sample rates block by block
+
+    Only the input samples still under the filter are kept between calls,
+    so any block size can be fed. Output is aligned with the input (the
+    filter delay is compensated) and flush() emits the remaining tail, for
+    a total of ceil(input_frames * to_rate / from_rate) frames. With
+    channels > 1, blocks are (frames, channels) arrays and all channels
+    are filtered in the same vectorized pass.
+    """
+    def __init__(self, from_rate, to_rate, channels=1):
+        import numpy as np
+
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.channels = channels
+        self.up, self.down, self.delay, self.bank = polyphase_filter(from_rate, to_rate)
+        self.taps = self.bank.shape[1]
+        self._frame_shape = () if channels == 1 else (channels,)
+        # Zeros before the first sample stand in for the signal's silent past
+        self._history = np.zeros((self.taps - 1,) + self._frame_shape)
+        self._history_start = -(self.taps - 1)
+        self.frames_in = 0
+        self.frames_out = 0
+
+    def output_frames(self, input_frames):
+        """Frames produced for input_frames of input once flushed"""
+        return -(-input_frames * self.up // self.down)
+
+    def _produce(self, block, available, limit=None):
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        buffer = np.concatenate((self._history, block))
+        # Output n reads input up to base = (n * down + delay) // up
+        ready = max(0, -(-(available * self.up - self.delay) // self.down))
+        if limit is not None:
+            ready = min(ready, limit)
+        n = np.arange(self.frames_out, max(self.frames_out, ready))
+        positions = n * self.down + self.delay
+        bases = positions // self.up
+        phases = positions % self.up
+
+        windows = sliding_window_view(buffer, self.taps, axis=0)
+        output = np.einsum('i...j,ij->i...', windows[bases - (self.taps - 1) - self._history_start],
+                           self.bank[phases])
+        self.frames_out += len(n)
+
+        # Keep what the next output will need
+        next_base = (self.frames_out * self.down + self.delay) // self.up
+        keep_from = min(next_base, self._history_start + len(buffer)) - (self.taps - 1)
+        self._history = buffer[keep_from - self._history_start:]
+        self._history_start = keep_from
+        return output
+
+    def process(self, block):
+        """Resample one block of samples; returns float64 output samples"""
+        import numpy as np
+
+        block = np.asarray(block, dtype=np.float64)
+        self.frames_in += len(block)
+        return self._produce(block, self.frames_in)
+
+    def flush(self):
+        """Emit the outputs still waiting on input past the end of the stream"""
+        import numpy as np
+
+        padding = np.zeros((self.delay // self.up + self.taps + 1,) + self._frame_shape)
+        return self._produce(padding, self.frames_in + len(padding),
+                             limit=self.output_frames(self.frames_in))
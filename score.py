@@ -0,0 +1,98 @@
+"""
+Note-event score shared by the WAV and MIDI outputs
+Using only Python standard library
+"""
+
+import array
+from config import *
+
+# Equal-temperament frequency of every MIDI pitch, A4 (69) = 440 Hz
+MIDI_FREQUENCIES = tuple(440.0 * 2 ** ((pitch - 69) / 12) for pitch in range(128))
+
+EVENT_FIELDS = ('onset', 'duration', 'pitch', 'velocity', 'channel')
+
+class Score:
+    """
+    Note events held column-wise in typed arrays
+
+    Onsets and durations are in seconds; tempo is only used to convert them
+    to beats when writing MIDI. Text is parsed into a Score once and every
+    output format renders from it.
+    """
+    def __init__(self, tempo=DEFAULT_TEMPO):
+        self.tempo = tempo
+        self.onsets = array.array('d')
+        self.durations = array.array('d')
+        self.pitches = array.array('B')
+        self.velocities = array.array('B')
+        self.channels = array.array('B')
+
+    @classmethod
+    def from_pitches(cls, pitches, duration, velocity=DEFAULT_VELOCITY, channel=0,
+                     tempo=DEFAULT_TEMPO):
+        """
+        Build a score that plays pitches one after another, each for duration seconds
+        """
+        score = cls(tempo)
+        score.pitches = array.array('B', pitches)
+        count = len(score.pitches)
+        score.onsets = array.array('d', [duration * index for index in range(count)])
+        score.durations = array.array('d', [duration]) * count
+        score.velocities = array.array('B', [velocity]) * count
+        score.channels = array.array('B', [channel]) * count
+        return score
+
+    def add_note(self, onset, duration, pitch, velocity=DEFAULT_VELOCITY, channel=0):
+        """Append one note event"""
+        self.onsets.append(onset)
+        self.durations.append(duration)
+        self.pitches.append(pitch)
+        self.velocities.append(velocity)
+        self.channels.append(channel)
+
+    def add_chord(self, onset, duration, pitches, velocity=DEFAULT_VELOCITY, channel=0):
+        """Append notes that start and stop together"""
+        for pitch in pitches:
+            self.add_note(onset, duration, pitch, velocity, channel)
+
+    def extend(self, other, channel=None):
+        """
+        Append the events of another score, optionally moving them to channel
+        """
+        self.onsets.extend(other.onsets)
+        self.durations.extend(other.durations)
+        self.pitches.extend(other.pitches)
+        self.velocities.extend(other.velocities)
+        if channel is None:
+            self.channels.extend(other.channels)
+        else:
+            self.channels.extend(array.array('B', [channel]) * len(other))
+
+    def frequencies(self):
+        """Frequency in Hz of every event"""
+        return [MIDI_FREQUENCIES[pitch] for pitch in self.pitches]
+
+    def is_sequential(self):
+        """
+        True when the notes play back to back from time 0, each starting
+        exactly as the previous one ends, with no overlaps and no rests
+        """
+        if self.onsets and abs(self.onsets[0]) > 1e-9:
+            return False
+        return all(
+            abs(onset - previous_onset - previous_duration) <= 1e-9
+            for previous_onset, previous_duration, onset in
+            zip(self.onsets, self.durations, self.onsets[1:])
+        )
+
+    @property
+    def end_time(self):
+        """Time in seconds at which the last note stops"""
+        return max(map(float.__add__, self.onsets, self.durations), default=0.0)
+
+    def __len__(self):
+        return len(self.pitches)
+
+    def __iter__(self):
+        """Yield (onset, duration, pitch, velocity, channel) tuples"""
+        return zip(self.onsets, self.durations, self.pitches, self.velocities, self.channels)
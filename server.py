@@ -0,0 +1,243 @@
+"""
+Asynchronous generation service for the Voice-to-Music Generator
+Using only Python standard library
+
+Speaks a minimal HTTP/1.0 over TCP or a Unix socket:
+    POST /generate  body is UTF-8 text, response streams back audio/wav
+    POST /analyze   body is raw int16 PCM, response is the JSON analysis
+    GET  /metrics   stage timings and counters in Prometheus text format
+Requests beyond the in-flight limit wait in a bounded queue; once that is
+full the server answers 503 "busy" instead of piling work up.
+"""
+
+import json
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from audio_processor import AudioProcessor
+from music_generator import MusicGenerator
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    503: "Service Unavailable"
+}
+
+class RequestError(ValueError):
+    """A request the server refuses, answered with status"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class _QueueWriter:
+    """
+    File-like object used from a worker thread to hand rendered chunks to
+    the event loop. write() blocks while the queue is full, so a slow client
+    throttles rendering instead of letting chunks accumulate in memory.
+    """
+    def __init__(self, queue, loop):
+        self.queue = queue
+        self.loop = loop
+        self.cancelled = threading.Event()
+
+    def write(self, data):
+        if self.cancelled.is_set():
+            raise ConnectionError("Client went away")
+        asyncio.run_coroutine_threadsafe(self.queue.put(bytes(data)), self.loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.queue.put(None), self.loop).result()
+
+class GenerationServer:
+    """
+    Front end that offloads rendering to an executor with bounded concurrency
+    """
+    def __init__(self, max_in_flight=SERVER_MAX_IN_FLIGHT, queue_depth=SERVER_QUEUE_DEPTH,
+                 executor=None):
+        self.max_in_flight = max_in_flight
+        self.queue_depth = queue_depth
+        self.music_generator = MusicGenerator()
+        self.audio_processor = AudioProcessor()
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_in_flight)
+        self.pending = 0
+        self._slots = None
+        self._server = None
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT, path=None):
+        """
+        Start listening on a TCP host/port, or on a Unix socket if path is given
+        """
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self.handle_client, path=path)
+        else:
+            self._server = await asyncio.start_server(self.handle_client, host, port)
+        logger.info(f"Generation server listening on {self.address}")
+        return self._server
+
+    @property
+    def address(self):
+        """Address of the first listening socket"""
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        """Stop accepting connections and shut the executor down"""
+        self._server.close()
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def handle_client(self, reader, writer):
+        """
+        Handle one HTTP request
+        """
+        try:
+            method, target, body = await self._read_request(reader)
+            if method == "GET" and target == "/metrics":
+                await self._respond(writer, 200, METRICS.to_prometheus().encode(),
+                                    "text/plain; version=0.0.4")
+                return
+            if method != "POST" or target not in ("/generate", "/analyze"):
+                await self._respond(writer, 404, b"Not found\n")
+                return
+
+            if self.pending >= self.max_in_flight + self.queue_depth:
+                await self._respond(writer, 503, b"busy\n")
+                return
+
+            self.pending += 1
+            try:
+                async with self._slots:
+                    if target == "/generate":
+                        await self._generate(body, writer)
+                    else:
+                        await self._analyze(body, writer)
+            finally:
+                self.pending -= 1
+
+        except ValueError as e:
+            status = e.status if isinstance(e, RequestError) else 400
+            await self._respond(writer, status, f"{e}\n".encode())
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.info(f"Client disconnected: {e}")
+        except Exception as e:
+            logger.error(f"Error while handling request: {str(e)}")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+        Parse the request line, headers and body
+        """
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ValueError("Malformed request line")
+
+        content_length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                content_length = int(value.strip())
+
+        if content_length > SERVER_MAX_BODY:
+            raise RequestError(413, "Request body too large")
+        body = await reader.readexactly(content_length)
+        return request_line[0].upper(), request_line[1], body
+
+    async def _respond(self, writer, status, body, content_type="text/plain"):
+        """
+        Send a complete response with a body
+        """
+        await self._send_headers(writer, status, content_type, len(body))
+        writer.write(body)
+        await writer.drain()
+
+    async def _send_headers(self, writer, status, content_type, content_length=None):
+        headers = [f"HTTP/1.0 {status} {STATUS_TEXT[status]}", f"Content-Type: {content_type}"]
+        if content_length is not None:
+            headers.append(f"Content-Length: {content_length}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _generate(self, body, writer):
+        """
+        Render the text in the executor and stream WAV chunks as they arrive
+        """
+        text = body.decode("utf-8").strip()
+        if not text:
+            raise ValueError("No text to render")
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SERVER_STREAM_QUEUE_CHUNKS)
+        stream = _QueueWriter(queue, loop)
+
+        def render():
+            try:
+                return self.music_generator.stream_music(text, stream)
+            finally:
+                stream.close()
+
+        render_future = loop.run_in_executor(self.executor, render)
+        await self._send_headers(writer, 200, "audio/wav")
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        except Exception:
+            # Unblock the renderer and let it finish before giving up the slot
+            stream.cancelled.set()
+            while await queue.get() is not None:
+                pass
+            raise
+        finally:
+            try:
+                await render_future
+            except ConnectionError:
+                pass
+
+    async def _analyze(self, body, writer):
+        """
+        Run AudioProcessor.process_audio on raw int16 PCM in the executor
+        """
+        if len(body) % 2:
+            raise ValueError("PCM body must contain whole int16 samples")
+        if not body:
+            raise ValueError("No audio to analyze")
+
+        loop = asyncio.get_running_loop()
+        analysis = await loop.run_in_executor(self.executor, self.audio_processor.process_audio, body)
+        await self._respond(writer, 200, json.dumps(analysis).encode(), "application/json")
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, path=None,
+          max_in_flight=SERVER_MAX_IN_FLIGHT, queue_depth=SERVER_QUEUE_DEPTH):
+    """
+    Run the generation server until interrupted
+    """
+    async def run():
+        server = GenerationServer(max_in_flight, queue_depth)
+        server.music_generator.register_metrics()
+        listener = await server.start(host, port, path)
+        print(f"Serving on {server.address}")
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.executor.shutdown(wait=True)
+
+    asyncio.run(run())
@@ -5,11 +5,18 @@ Speech recognition module for the Voice-to-Music Generator
 import speech_recognition as sr
 from config import *
 from utils import Timer, log_error
+from vad import VoiceActivityDetector
+from recognizers import GoogleBackend
 
 class SpeechRecognizer:
-    def __init__(self):
+    def __init__(self, backend=None):
         self.recognizer = sr.Recognizer()
         self.language = LANGUAGE
+        # Recorded segments go through the backend; the microphone path
+        # below always uses the speech_recognition recognizer
+        self.backend = backend or GoogleBackend(self.recognizer, self.language)
+        self.vad = VoiceActivityDetector()
+        self.noise_calibrated = False
 
     def adjust_for_noise(self, source):
         """
@@ -20,6 +27,32 @@ class SpeechRecognizer:
             source,
             duration=AMBIENT_DURATION
         )
+        self.noise_calibrated = True
+
+    def recognize_segments(self, audio):
+        """
+        Split a recording (WAV path, WavSource or int16 array) into speech
+        segments and yield the text of each one as soon as it closes;
+        silence is never sent to the backend and segments that cannot be
+        understood are skipped
+        """
+        for segment in self.vad.segments(audio):
+            text = self.backend.recognize(segment.samples, self.vad.sample_rate)
+            if text:
+                yield text
+            else:
+                log_error("Could not understand a speech segment", f"{segment.start}-{segment.stop}")
+
+    def recognize_file(self, path):
+        """
+        Recognize the speech in a WAV file segment by segment and return
+        the joined text
+        """
+        with Timer("Speech recognition"):
+            text = " ".join(self.recognize_segments(path))
+        if not text:
+            raise ValueError("Could not understand the audio")
+        return text
 
     def recognize_speech(self):
         """
@@ -29,7 +62,9 @@ class SpeechRecognizer:
             with Timer("Speech recognition"):
                 with sr.Microphone() as source:
                     print("Listening for voice input...")
-                    self.adjust_for_noise(source)
+                    # The ambient noise level is measured once and reused
+                    if not self.noise_calibrated:
+                        self.adjust_for_noise(source)
                     
                     print("Speak now...")
                     audio = self.recognizer.listen(source)
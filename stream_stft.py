@@ -0,0 +1,126 @@
+"""
+Incremental short-time Fourier transform for the Voice-to-Music Generator
+Uses NumPy, imported when the first StreamingSTFT is created
+"""
+
+import inspect
+import logging
+from config import *
+from utils import _analysis_window
+
+logger = logging.getLogger(__name__)
+
+def _rfft_supports_out(np):
+    """NumPy 2 can write rfft results into a caller-provided array"""
+    return 'out' in inspect.signature(np.fft.rfft).parameters
+
+class StreamingSTFT:
+    """
+    Stateful STFT over a live stream of PCM blocks
+
+    Blocks of any size are appended to a preallocated buffer; every complete
+    frame is windowed and transformed, and only the overlap tail (fewer than
+    fft_size samples) is kept for the next call. Frames match the interior
+    frames of analyze_frequency_spectrum, including its 1/sum(window) scaling.
+
+    Output arrays are views into buffers owned by the object and are
+    overwritten by the next call to process(); copy them to keep them.
+    Buffers only grow when a block larger than any seen before arrives.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, fft_size=FFT_SIZE, hop_length=HOP_LENGTH,
+                 window_type=WINDOW_TYPE, max_block_frames=STFT_MAX_BLOCK_FRAMES):
+        import numpy as np
+
+        if not 0 < hop_length <= fft_size:
+            raise ValueError("hop_length must be between 1 and fft_size")
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.hop_length = hop_length
+        window = _analysis_window(window_type, fft_size)
+        self.window = window / window.sum()
+        self.frequencies = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        self.frames_emitted = 0
+        self._filled = 0
+        self._rfft_out = _rfft_supports_out(np)
+        self._capacity = 0
+        self._reserve(max_block_frames)
+
+    def _reserve(self, block_frames):
+        """
+        Size the sample buffer and per-call output buffers for block_frames
+        """
+        import numpy as np
+
+        if block_frames <= self._capacity:
+            return
+        if self._capacity:
+            logger.debug(f"Growing streaming STFT buffers for a {block_frames}-frame block")
+
+        buffer = np.zeros(self.fft_size - 1 + block_frames)
+        if self._capacity:
+            buffer[:self._filled] = self._buffer[:self._filled]
+        max_frames = (self.fft_size - 1 + block_frames - self.fft_size) // self.hop_length + 1
+        bins = len(self.frequencies)
+
+        self._buffer = buffer
+        self._frames = np.empty((max_frames, self.fft_size))
+        self.spectrum = np.empty((max_frames, bins), dtype=np.complex128)
+        self.magnitudes = np.empty((max_frames, bins))
+        self.dominant_frequencies = np.empty(max_frames)
+        self._capacity = block_frames
+
+    def process(self, block):
+        """
+        Feed one block of samples (a NumPy array or raw little-endian int16
+        PCM bytes) and return the magnitudes of the frames it completed,
+        shape (new_frames, fft_size // 2 + 1)
+        """
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        if not isinstance(block, np.ndarray):
+            block = np.frombuffer(block, dtype='<i2')
+        count = len(block)
+        self._reserve(count)
+
+        buffer = self._buffer
+        total = self._filled + count
+        buffer[self._filled:total] = block
+        if total < self.fft_size:
+            self._filled = total
+            return self.magnitudes[:0]
+
+        frames_ready = (total - self.fft_size) // self.hop_length + 1
+        frames = self._frames[:frames_ready]
+        windows = sliding_window_view(buffer[:total], self.fft_size)[::self.hop_length]
+        np.multiply(windows[:frames_ready], self.window, out=frames)
+
+        spectrum = self.spectrum[:frames_ready]
+        if self._rfft_out:
+            np.fft.rfft(frames, axis=1, out=spectrum)
+        else:
+            spectrum[...] = np.fft.rfft(frames, axis=1)
+        magnitudes = np.abs(spectrum, out=self.magnitudes[:frames_ready])
+        np.take(self.frequencies, np.argmax(magnitudes, axis=1),
+                out=self.dominant_frequencies[:frames_ready])
+
+        # Keep only the overlap tail for the next block
+        consumed = frames_ready * self.hop_length
+        self._filled = total - consumed
+        buffer[:self._filled] = buffer[consumed:total]
+        self.frames_emitted += frames_ready
+        return magnitudes
+
+    def frame_times(self, count):
+        """
+        Centre times in seconds of the last count frames emitted
+        """
+        import numpy as np
+
+        first = self.frames_emitted - count
+        return (np.arange(first, self.frames_emitted) * self.hop_length + self.fft_size / 2) / self.sample_rate
+
+    def reset(self):
+        """Forget buffered samples and restart frame numbering"""
+        self._filled = 0
+        self.frames_emitted = 0
@@ -0,0 +1,134 @@
+"""
+Note synthesis engine for the Voice-to-Music Generator
+Uses NumPy when it is installed, otherwise the Python standard library
+"""
+
+import array
+import math
+import operator
+import logging
+import importlib.util
+from config import *
+from oscillator import Oscillator, TABLE_WAVEFORMS
+from fades import fade_frames, fade_table
+
+logger = logging.getLogger(__name__)
+
+# NumPy is only imported on the first vectorized render, so a Synthesizer
+# created with use_numpy=False never loads it
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Sine is computed directly; the other waveforms are wavetable lookups
+WAVEFORMS = TABLE_WAVEFORMS
+
+class Synthesizer:
+    """
+    Renders whole notes as int16 PCM blocks
+
+    Each note fades in over attack seconds and out over release seconds,
+    using the cached tables of fades.fade_table; both are 0 by default,
+    which leaves notes unshaped.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, amplitude=MAX_AMPLITUDE, use_numpy=None, cache=None,
+                 attack=0.0, release=0.0, fade_shape=SYNTH_FADE_SHAPE):
+        self.sample_rate = sample_rate
+        self.amplitude = amplitude
+        self.cache = cache
+        self.attack = attack
+        self.release = release
+        self.fade_shape = fade_shape
+        if use_numpy is None:
+            use_numpy = HAVE_NUMPY
+        self.use_numpy = bool(use_numpy) and HAVE_NUMPY
+
+    def frame_count(self, duration):
+        """Number of frames in a note of the given duration"""
+        return int(self.sample_rate * duration)
+
+    def fade_lengths(self, frames):
+        """Attack and release frames of a block of frames frames; they never overlap"""
+        attack = min(fade_frames(self.attack, self.sample_rate), frames)
+        release = min(fade_frames(self.release, self.sample_rate), frames - attack)
+        return attack, release
+
+    def _apply_fades(self, block):
+        """Fade a float64 NumPy block in and out in place"""
+        import numpy as np
+
+        attack, release = self.fade_lengths(len(block))
+        if attack:
+            block[:attack] *= np.frombuffer(fade_table(attack, self.fade_shape))
+        if release:
+            block[len(block) - release:] *= np.frombuffer(fade_table(release, self.fade_shape))[::-1]
+        return block
+
+    def render_note(self, frequency, duration, waveform='sine', tail=0):
+        """
+        Render one note as a block of int16 samples
+
+        Returns a NumPy int16 array or an array('h'); both expose the
+        buffer protocol and can be passed straight to wave.writeframes.
+        Every note starts at phase 0. tail extra frames past the note's
+        duration are rendered for crossfading into the next note.
+        """
+        if waveform not in WAVEFORMS:
+            raise ValueError(f"Unsupported waveform: {waveform}")
+        frames = self.frame_count(duration) + tail
+        if waveform != 'sine':
+            if not self.use_numpy:
+                raise ValueError(f"The {waveform} waveform requires NumPy")
+            import numpy as np
+            block = Oscillator(waveform, self.sample_rate).render(frequency, frames)
+            block *= self.amplitude
+            return self._apply_fades(block).astype(np.int16)
+
+        step = 2 * math.pi * frequency / self.sample_rate
+
+        if self.use_numpy:
+            import numpy as np
+            block = np.arange(frames, dtype=np.float64)
+            block *= step
+            np.sin(block, out=block)
+            block *= self.amplitude
+            self._apply_fades(block)
+            # astype truncates toward zero, matching int() in the reference loop
+            return block.astype(np.int16)
+
+        amplitude = float(self.amplitude)
+        def samples(start, stop):
+            return map(amplitude.__mul__, map(math.sin, map(step.__mul__, range(start, stop))))
+
+        # Only the faded frames pay for the extra multiply
+        attack, release = self.fade_lengths(frames)
+        block = array.array('h', map(int, map(operator.mul, samples(0, attack),
+                                              fade_table(attack, self.fade_shape))))
+        block.extend(map(int, samples(attack, frames - release)))
+        block.extend(map(int, map(operator.mul, samples(frames - release, frames),
+                                  reversed(fade_table(release, self.fade_shape)))))
+        return block
+
+    def render_with(self, oscillator, frequency, duration):
+        """
+        Render one note as int16 samples by continuing oscillator, so its
+        phase picks up where the oscillator's previous note ended; notes
+        joined this way need no fades and get none
+        """
+        import numpy as np
+        block = oscillator.render(frequency, self.frame_count(duration))
+        block *= self.amplitude
+        return block.astype(np.int16)
+
+    def note_pcm(self, frequency, duration, waveform='sine', tail=0):
+        """
+        Return one note as an int16 PCM block, served from the note cache
+        (as immutable bytes) when one is attached, fades included
+        """
+        if self.cache is None:
+            return self.render_note(frequency, duration, waveform, tail)
+
+        key = self.cache.make_key(frequency, duration, self.sample_rate, self.amplitude, waveform,
+                                  (self.attack, self.release, self.fade_shape, tail))
+        return self.cache.get_or_render(
+            key,
+            lambda: self.render_note(frequency, duration, waveform, tail)
+        )
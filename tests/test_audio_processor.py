@@ -66,4 +66,136 @@ def test_normalize_audio(audio_processor):
     # Check that relative proportions are maintained
     assert normalized[0] == normalized[1] * -1
     assert normalized[2] == normalized[3] * -1
-    assert abs(normalized[0]) == 2 * abs(normalized[2])
\ No newline at end of file
+    assert abs(normalized[0]) == 2 * abs(normalized[2])
+
+def write_test_wav(path, samples, sample_rate=44100):
+    import wave
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+
+def test_analyze_wav_single_pass_stats(audio_processor, tmp_path):
+    samples = np.array([0, 1000, -2000, 32767, -32768, 500] * 5000, dtype=np.int16)
+    path = tmp_path / "stats.wav"
+    write_test_wav(path, samples)
+    
+    # A chunk size that does not divide the length exercises the chunk loop
+    analysis = audio_processor.analyze_wav(str(path), chunk_frames=777)
+    
+    assert analysis['length'] == len(samples)
+    assert analysis['max_amplitude'] == 32768
+    assert analysis['clipped_samples'] == 2 * 5000
+    expected_rms = np.sqrt(np.mean(samples.astype(np.float64) ** 2))
+    assert abs(analysis['rms'] - expected_rms) < 1e-6
+    assert abs(analysis['duration'] - len(samples) / 44100) < 1e-9
+
+def test_process_audio_bytes_matches_wav(audio_processor, tmp_path):
+    samples = np.array([100, -300, 200, 0], dtype=np.int16)
+    analysis = audio_processor.process_audio(samples.tobytes())
+    
+    assert analysis['max_amplitude'] == 300
+    assert analysis['length'] == 4
+    assert analysis['sample_rate'] == 44100
+
+def test_normalize_wav_streamed(audio_processor, tmp_path):
+    samples = np.array([0, 8000, -16000, 4000] * 1000, dtype=np.int16)
+    source = tmp_path / "quiet.wav"
+    target = tmp_path / "loud.wav"
+    write_test_wav(source, samples)
+    
+    scale = audio_processor.normalize_wav(str(source), str(target), chunk_frames=999)
+    
+    assert abs(scale - 32767 / 16000) < 1e-12
+    import wave
+    with wave.open(str(target), 'rb') as wav_file:
+        assert wav_file.getnframes() == len(samples)
+        normalized = np.frombuffer(wav_file.readframes(len(samples)), dtype='<i2')
+    assert normalized.min() == -32767
+    assert np.array_equal(normalized, (samples * scale).astype(np.int16))
+
+def test_normalize_wav_rejects_24_bit(audio_processor, tmp_path):
+    import wave
+    source = tmp_path / "tone24.wav"
+    target = tmp_path / "loud.wav"
+    with wave.open(str(source), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(3)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(b"\x00\x00\x80" * 1000)
+    
+    with pytest.raises(ValueError, match="16-bit"):
+        audio_processor.normalize_wav(str(source), str(target))
+    assert not target.exists()
+
+def test_ring_buffer_windows_and_stats():
+    import array
+    from audio_processor import RingBuffer
+    
+    buffer = RingBuffer(8, sample_rate=1000)
+    buffer.write(array.array('h', [1, -2, 3]).tobytes())
+    assert list(buffer.last()) == [1, -2, 3]
+    assert buffer.block_peak == 3
+    
+    # Wraps around: only the newest eight samples remain, oldest first
+    buffer.write(array.array('h', range(10, 17)))
+    assert list(buffer.last()) == [3, 10, 11, 12, 13, 14, 15, 16]
+    assert list(buffer.last(3)) == [14, 15, 16]
+    assert list(buffer.last_ms(2)) == [15, 16]
+    assert buffer.window_rms() == pytest.approx(np.sqrt(np.mean(np.square(list(buffer.last()), dtype=float))))
+    assert buffer.window_peak() == 16
+    
+    summary = buffer.stats.summary()
+    assert summary['length'] == 10
+    assert summary['max_amplitude'] == 16
+    
+    # A block longer than the buffer keeps its tail
+    buffer.write(array.array('h', range(100, 120)))
+    assert list(buffer.last()) == list(range(112, 120))
+    assert buffer.window_rms() == pytest.approx(np.sqrt(np.mean(np.square(np.arange(112, 120.0)))))
+
+def test_ring_buffer_windows_are_zero_copy(audio_processor):
+    buffer = audio_processor.process_block(np.arange(1000, dtype='<i2').tobytes())
+    window = buffer.last_ms(10)
+    
+    assert len(window) == 441
+    assert window.readonly
+    assert window.obj is buffer.last().obj
+    samples = np.frombuffer(window, dtype=np.int16)
+    assert samples[-1] == 999
+
+def test_ring_buffer_steady_state_allocates_nothing():
+    import tracemalloc
+    from audio_processor import RingBuffer
+    
+    buffer = RingBuffer(44100)
+    block = (np.sin(np.arange(4096) / 7) * 20000).astype('<i2').tobytes()
+    blocks = 100
+    for _ in range(100):
+        buffer.write(block)
+    
+    tracemalloc.start()
+    try:
+        for _ in range(10):
+            buffer.write(block)
+        before = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(blocks):
+            buffer.write(block)
+            buffer.last_ms(20)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    
+    # Live objects only change as the statistics attributes take new values;
+    # nothing accumulates per block
+    source = tracemalloc.Filter(True, "*audio_processor.py")
+    growth = after.filter_traces([source]).compare_to(before.filter_traces([source]), 'lineno')
+    assert sum(stat.count_diff for stat in growth) < 8
+    assert current - base < 512
+    # Only small temporaries (views, integers) exist while writing, never
+    # a copy of the block
+    assert peak - base < len(block) // 4
@@ -0,0 +1,56 @@
+"""
+Tests for the batch generation module
+"""
+
+import os
+import json
+import wave
+from batch import load_prompts, run_batch
+
+def test_load_prompts(tmp_path):
+    text_file = tmp_path / "prompts.txt"
+    text_file.write_text("DO RE MI\n\nLA SI\n")
+    assert load_prompts(str(text_file)) == [
+        {'id': '1', 'text': 'DO RE MI'},
+        {'id': '3', 'text': 'LA SI'}
+    ]
+    
+    jsonl_file = tmp_path / "prompts.jsonl"
+    jsonl_file.write_text('{"id": "a", "text": "DO"}\n{"text": "RE"}\n')
+    assert load_prompts(str(jsonl_file)) == [
+        {'id': 'a', 'text': 'DO'},
+        {'id': '2', 'text': 'RE'}
+    ]
+
+def test_run_batch(tmp_path):
+    prompts_file = tmp_path / "prompts.txt"
+    prompts_file.write_text("\n".join(["DO RE", "MI", "FA SOL LA"]))
+    output_dir = str(tmp_path / "out")
+    
+    manifest_path, entries = run_batch(str(prompts_file), output_dir=output_dir, workers=2)
+    
+    assert [entry['id'] for entry in entries] == ['1', '2', '3']
+    for entry, words in zip(entries, (2, 1, 3)):
+        assert entry['error'] is None
+        assert entry['seconds'] >= 0
+        assert os.path.dirname(entry['output']) == output_dir
+        with wave.open(entry['output'], 'rb') as wav_file:
+            assert wav_file.getnframes() == words * 22050
+    
+    with open(manifest_path) as manifest_file:
+        manifest = [json.loads(line) for line in manifest_file]
+    assert manifest == entries
+
+def test_bad_prompt_lines_do_not_abort_the_batch(tmp_path):
+    prompts_file = tmp_path / "prompts.jsonl"
+    prompts_file.write_text('{"text": "DO"}\n{DO RE} MI\n{"id": "x", "prompt": "RE"}\n')
+    prompts = load_prompts(str(prompts_file))
+    assert prompts[:2] == [
+        {'id': '1', 'text': 'DO'},
+        {'id': '2', 'text': '{DO RE} MI'}
+    ]
+    assert prompts[2]['id'] == 'x' and prompts[2]['error']
+    
+    _, entries = run_batch(str(prompts_file), output_dir=str(tmp_path / "out"), workers=1)
+    assert [entry['error'] is None for entry in entries] == [True, True, False]
+    assert entries[2]['output'] is None
@@ -0,0 +1,112 @@
+"""
+Tests for the sample rate, channel and sample format converter
+"""
+
+import wave
+import numpy as np
+from audio_processor import AudioProcessor
+from convert import (Converter, pack, unpack, iter_converted, load_audio, convert_wav,
+                     source_format)
+from resampler import Resampler, polyphase_filter
+from utils import analyze_frequency_spectrum
+from wav_source import WavSource
+
+def write_wav(path, data, sample_rate, channels, width):
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(data)
+    return path
+
+def tone(sample_rate, seconds=0.5, frequency=440, amplitude=0.5):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+def test_s24_round_trip():
+    values = np.array([0, 1, -1, 8388607, -8388608, 123456, -654321], dtype=np.int32)
+    data = pack(values, 's24')
+    assert len(data) == 3 * len(values)
+    assert np.array_equal(unpack(data, 's24'), values)
+
+def test_s16_passthrough_is_exact():
+    values = (tone(16000) * 32767).astype('<i2')
+    converter = Converter(16000, 1, 's16', 16000, 1, 's16', dither=True, seed=0)
+    assert converter.rng is None
+    assert np.array_equal(converter.convert(values.tobytes()), values)
+    assert len(converter.flush()) == 0
+
+def test_partial_frames_are_carried_over():
+    values = np.arange(-500, 500, dtype='<i2').reshape(-1, 2)
+    data = values.tobytes()
+    converter = Converter(8000, 2, 's16', 8000, 2, 's16')
+    blocks = [converter.convert(data[start:start + 7]) for start in range(0, len(data), 7)]
+    assert np.array_equal(np.concatenate(blocks), values)
+
+def test_channel_remixing():
+    left = np.full(100, 1000, dtype='<i2')
+    right = np.full(100, -3000, dtype='<i2')
+    stereo = np.stack((left, right), axis=1)
+    mono = Converter(8000, 2, 's16', 8000, 1, 's16', dither=False).convert(stereo.tobytes())
+    assert mono.shape == (100,)
+    assert np.all(mono == -1000)
+
+    widened = Converter(8000, 1, 's16', 8000, 2, 's16').convert(left.tobytes())
+    assert widened.shape == (100, 2)
+    assert np.all(widened == 1000)
+
+def test_multichannel_resampler_matches_mono():
+    signal = np.stack((tone(44100), tone(44100, frequency=1000)), axis=1)
+    stereo = Resampler(44100, 16000, channels=2)
+    output = np.concatenate((stereo.process(signal), stereo.flush()))
+    for channel in range(2):
+        mono = Resampler(44100, 16000)
+        expected = np.concatenate((mono.process(signal[:, channel]), mono.flush()))
+        assert np.allclose(output[:, channel], expected)
+
+def test_block_streaming_matches_whole_file(tmp_path):
+    samples = (tone(44100, frequency=300) * 8388607).astype(np.int32)
+    path = write_wav(str(tmp_path / "tone24.wav"), pack(samples, 's24'), 44100, 1, 3)
+    whole = np.concatenate(list(iter_converted(path, 16000, 1, 's16', dither=False,
+                                               block_frames=1 << 20)))
+    streamed = np.concatenate(list(iter_converted(path, 16000, 1, 's16', dither=False,
+                                                  block_frames=777)))
+    assert len(whole) == -(-len(samples) * 16000 // 44100)
+    assert np.array_equal(whole, streamed)
+
+def test_filter_is_designed_once_per_rate_pair():
+    first = Converter(48000, 2, 's24', 16000, 1, 's16')
+    second = Converter(48000, 1, 'f32', 16000, 1, 'f32')
+    assert first.resampler.bank is second.resampler.bank is polyphase_filter(48000, 16000)[3]
+
+def test_dither_is_reproducible():
+    values = tone(8000, amplitude=0.001).astype('<f4')
+    first = Converter(8000, 1, 'f32', 8000, 1, 's16', dither=True, seed=7).convert(values.tobytes())
+    second = Converter(8000, 1, 'f32', 8000, 1, 's16', dither=True, seed=7).convert(values.tobytes())
+    plain = Converter(8000, 1, 'f32', 8000, 1, 's16', dither=False).convert(values.tobytes())
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, plain)
+    assert np.max(np.abs(first.astype(int) - plain)) <= 1
+
+def test_convert_wav_to_float(tmp_path):
+    stereo = (np.stack((tone(22050), tone(22050)), axis=1) * 32767).astype('<i2')
+    input_path = write_wav(str(tmp_path / "stereo.wav"), stereo.tobytes(), 22050, 2, 2)
+    output_path = str(tmp_path / "mono.wav")
+    frames = convert_wav(input_path, output_path, to_rate=16000, to_channels=1, to_format='f32')
+    with WavSource(output_path) as source:
+        assert source_format(source) == 'f32'
+        assert (source.sample_rate, source.channels, source.frames) == (16000, 1, frames)
+        assert np.allclose(source.samples()[100:-100], tone(16000)[100:frames - 100], atol=1e-3)
+        assert np.array_equal(load_audio(source, 16000), source.samples())
+
+def test_24_bit_analysis(tmp_path):
+    samples = (tone(16000, frequency=500) * 8388607).astype(np.int32)
+    path = write_wav(str(tmp_path / "tone24.wav"), pack(samples, 's24'), 16000, 1, 3)
+    analysis = AudioProcessor().analyze_wav(path)
+    assert analysis['length'] == len(samples)
+    assert analysis['sample_rate'] == 16000
+    assert abs(analysis['max_amplitude'] - 16384) <= 2
+
+    with WavSource(path) as source:
+        spectrum = analyze_frequency_spectrum(source)
+    assert abs(np.median(spectrum['dominant_frequencies']) - 500) < 20
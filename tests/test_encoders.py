@@ -0,0 +1,109 @@
+"""
+Tests for the output encoders and the resampler
+"""
+
+import io
+import wave
+import pytest
+import numpy as np
+from encoders import (
+    ZpcmEncoder, ZpcmReader, ThreadedStream, get_encoder, register_format, WavEncoder,
+    OUTPUT_FORMATS
+)
+from resampler import Resampler
+from music_generator import MusicGenerator
+
+def tone(frames, frequency=440.0, sample_rate=44100):
+    t = np.arange(frames) / sample_rate
+    return (np.sin(2 * np.pi * frequency * t) * 20000).astype('<i2')
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_zpcm_round_trip_and_seek(tmp_path, codec):
+    samples = tone(100000)
+    path = str(tmp_path / "tone.zpcm")
+    with open(path, "wb") as output_file:
+        stream = ZpcmEncoder(codec, block_frames=4096).open(output_file, 44100)
+        for start in range(0, len(samples), 3000):
+            stream.write(samples[start:start + 3000].tobytes())
+        stream.close()
+    
+    assert len(open(path, "rb").read()) < samples.nbytes / 2
+    with ZpcmReader(path) as reader:
+        assert reader.frames == len(reader) == 100000
+        assert reader.sample_rate == 44100
+        assert reader.codec == codec
+        assert reader.read() == samples.tobytes()
+        # Reads spanning block boundaries only touch the blocks they need
+        assert reader.read(4000, 9000) == samples[4000:9000].tobytes()
+        assert reader.read(99999) == samples[99999:].tobytes()
+
+def test_resampler_streams_any_block_size():
+    samples = tone(44100, 1000.0).astype(np.float64)
+    resampler = Resampler(44100, 16000)
+    output = [resampler.process(samples[start:start + 777]) for start in range(0, 44100, 777)]
+    output = np.concatenate(output + [resampler.flush()])
+    
+    assert len(output) == resampler.output_frames(44100) == 16000
+    expected = np.sin(2 * np.pi * 1000.0 * np.arange(16000) / 16000) * 20000
+    assert np.abs(output - expected)[1000:-1000].max() < 5
+    
+    # The same rate pair reuses one filter design
+    assert Resampler(44100, 16000).bank is resampler.bank
+
+def test_resampling_encoder(tmp_path):
+    buffer = io.BytesIO()
+    stream = get_encoder("wav22k").open(buffer, 44100)
+    stream.write(tone(44100).tobytes())
+    stream.close()
+    
+    buffer.seek(0)
+    with wave.open(buffer, "rb") as wav_file:
+        assert wav_file.getframerate() == 22050
+        assert wav_file.getnframes() == 22050
+
+def test_threaded_stream_reports_worker_errors():
+    class Failing:
+        def write(self, chunk):
+            raise OSError("disk full")
+        def close(self):
+            pass
+    
+    stream = ThreadedStream(Failing(), max_chunks=2)
+    with pytest.raises(OSError):
+        for _ in range(100):
+            stream.write(b"\x00\x00")
+        stream.close()
+
+def test_threaded_stream_reports_close_errors():
+    class FailingClose:
+        def write(self, chunk):
+            pass
+        def close(self):
+            raise OSError("disk full")
+    
+    stream = ThreadedStream(FailingClose(), max_chunks=2)
+    stream.write(b"\x00\x00")
+    with pytest.raises(OSError, match="disk full"):
+        stream.close()
+    assert not stream._thread.is_alive()
+
+def test_generate_music_formats(tmp_path):
+    generator = MusicGenerator()
+    register_format("test-wav16k", lambda: WavEncoder(sample_rate=16000))
+    try:
+        path = generator.generate_music("DO RE MI", str(tmp_path / "song.zpcm"), output_format="zpcm")
+        with ZpcmReader(path) as reader:
+            pcm = reader.read()
+        wav_buffer = io.BytesIO()
+        generator.stream_music("DO RE MI", wav_buffer)
+        assert pcm == wav_buffer.getvalue()[44:]
+        
+        path = generator.generate_music("DO RE MI", str(tmp_path / "song.wav"), output_format="test-wav16k")
+        with wave.open(path, "rb") as wav_file:
+            assert wav_file.getframerate() == 16000
+            assert wav_file.getnframes() == 3 * 8000
+    finally:
+        del OUTPUT_FORMATS["test-wav16k"]
+    
+    with pytest.raises(ValueError):
+        generator.generate_music("DO", output_format="mp3")
@@ -0,0 +1,34 @@
+"""
+Tests for the note fade and crossfade tables
+"""
+
+import array
+import pytest
+import numpy as np
+from fades import FADE_SHAPES, fade_table, crossfade
+
+def test_tables_are_cached_and_read_only():
+    table = fade_table(256, 'cosine')
+    assert fade_table(256, 'cosine') is table
+    assert table.readonly
+    assert len(table) == 256
+    assert 0.0 < table[0] < table[-1] < 1.0
+
+@pytest.mark.parametrize("shape", sorted(FADE_SHAPES))
+def test_table_and_reverse_complement(shape):
+    gains = np.frombuffer(fade_table(100, shape))
+    total = gains ** 2 + gains[::-1] ** 2 if shape == 'equal_power' else gains + gains[::-1]
+    assert np.allclose(total, 1.0)
+
+def test_unknown_shape():
+    with pytest.raises(ValueError):
+        fade_table(16, 'square')
+
+def test_crossfade_blends_blocks():
+    outgoing = np.full(64, 10000, dtype=np.int16)
+    incoming = np.full(64, -10000, dtype=np.int16)
+    blended = crossfade(outgoing, array.array('h', incoming), 'linear')
+    assert blended.dtype == np.int16
+    assert blended[0] > 9000 and blended[-1] < -9000
+    assert np.all(np.diff(blended.astype(int)) <= 0)
+    assert np.array_equal(crossfade(outgoing, outgoing, 'linear'), outgoing)
@@ -0,0 +1,92 @@
+"""
+Tests for the hot-path metrics registry
+"""
+
+import json
+import time
+import pytest
+from metrics import BUCKET_BOUNDS_NS, Histogram, MetricsRegistry, SYNTHESIZE, WRITE
+from music_generator import MusicGenerator
+from utils import Timer
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    for elapsed_ns in (500, 1500, 1500, 3_000_000):
+        histogram.observe(elapsed_ns)
+    
+    assert histogram.count == 4
+    assert histogram.counts[0] == 1  # <= 1 us
+    assert histogram.counts[1] == 2  # <= 2 us
+    assert histogram.min_ns == 500
+    assert histogram.max_ns == 3_000_000
+    assert histogram.quantile(0.5) == 2e-6
+    assert histogram.quantile(1.0) == 3e-3
+    assert sum(histogram.counts) == 4
+    assert len(histogram.counts) == len(BUCKET_BOUNDS_NS) + 1
+
+def test_stage_timer_and_rates():
+    registry = MetricsRegistry(enabled=True)
+    with registry.timer(SYNTHESIZE):
+        time.sleep(0.01)
+    registry.increment('samples_rendered', 1000)
+    
+    snapshot = registry.snapshot()
+    assert snapshot['stages'][SYNTHESIZE]['count'] == 1
+    assert snapshot['stages'][SYNTHESIZE]['seconds'] >= 0.01
+    assert 0 < snapshot['rates']['samples_per_second'] <= 100000
+    assert snapshot['rates']['bytes_per_second'] == 0.0
+
+def test_timed_iterates_and_counts_steps():
+    registry = MetricsRegistry(enabled=True)
+    assert list(registry.timed(range(3), 'step')) == [0, 1, 2]
+    # One observation per item plus the final exhausted step
+    assert registry.histograms['step'].count == 4
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer(WRITE):
+        pass
+    registry.increment('bytes_written', 10)
+    assert list(registry.timed([1, 2], WRITE)) == [1, 2]
+    
+    snapshot = registry.snapshot()
+    assert snapshot['stages'] == {}
+    assert snapshot['counters'] == {}
+
+def test_timer_records_stage():
+    registry = MetricsRegistry(enabled=True)
+    with Timer("Render", stage=SYNTHESIZE, registry=registry) as timer:
+        pass
+    assert timer.elapsed_ns >= 0
+    assert registry.histograms[SYNTHESIZE].total_ns == timer.elapsed_ns
+
+def test_exports(tmp_path):
+    registry = MetricsRegistry(enabled=True)
+    registry.observe(WRITE, 1500)
+    registry.increment('bytes_written', 4096)
+    registry.register_collector('cache', lambda: {'hits': 3})
+    
+    json_path = registry.write(str(tmp_path / "metrics.json"))
+    exported = json.loads(open(json_path).read())
+    assert exported['counters']['bytes_written'] == 4096
+    assert exported['collectors']['cache']['hits'] == 3
+    
+    text = open(registry.write(str(tmp_path / "metrics.prom"))).read()
+    assert 'vtm_stage_seconds_bucket{stage="write",le="1e-06"} 0' in text
+    assert 'vtm_stage_seconds_bucket{stage="write",le="2e-06"} 1' in text
+    assert 'vtm_stage_seconds_count{stage="write"} 1' in text
+    assert 'vtm_bytes_written_total 4096' in text
+    assert 'vtm_cache_hits 3' in text
+
+def test_generator_stages_are_recorded(tmp_path, monkeypatch):
+    registry = MetricsRegistry(enabled=True)
+    monkeypatch.setattr('music_generator.METRICS', registry)
+    generator = MusicGenerator()
+    generator.render_cache = None
+    generator.generate_music("DO RE MI", str(tmp_path / "out.wav"))
+    
+    snapshot = registry.snapshot()
+    assert snapshot['stages']['tokenize']['count'] == 1
+    assert snapshot['stages']['synthesize']['count'] == 3
+    assert snapshot['counters']['samples_rendered'] == 3 * 22050
+    assert snapshot['counters']['bytes_written'] == 3 * 22050 * 2
@@ -0,0 +1,64 @@
+"""
+Tests for the score representation and MIDI writer
+"""
+
+import struct
+import pytest
+from score import Score, MIDI_FREQUENCIES
+from midi_writer import encode_midi, write_midi, _varlen
+
+def read_chunks(data):
+    chunks = []
+    position = 0
+    while position < len(data):
+        chunk_id, size = struct.unpack('>4sL', data[position:position + 8])
+        chunks.append((chunk_id, data[position + 8:position + 8 + size]))
+        position += 8 + size
+    return chunks
+
+def test_score_from_pitches():
+    score = Score.from_pitches([60, 64, 67], 0.5)
+    assert len(score) == 3
+    assert list(score) == [
+        (0.0, 0.5, 60, 100, 0),
+        (0.5, 0.5, 64, 100, 0),
+        (1.0, 0.5, 67, 100, 0)
+    ]
+    assert score.end_time == 1.5
+    assert abs(score.frequencies()[0] - 261.63) < 0.01
+    assert MIDI_FREQUENCIES[69] == 440.0
+
+def test_varlen():
+    assert _varlen(0) == b'\x00'
+    assert _varlen(0x7F) == b'\x7f'
+    assert _varlen(0x80) == b'\x81\x00'
+    assert _varlen(0x0FFFFFFF) == b'\xff\xff\xff\x7f'
+
+def test_encode_single_track():
+    score = Score.from_pitches([60, 62], 0.5, tempo=120)
+    chunks = read_chunks(encode_midi(score, ticks_per_beat=480))
+
+    assert chunks[0] == (b'MThd', struct.pack('>HHH', 1, 2, 480))
+    assert chunks[1] == (b'MTrk', b'\x00\xff\x51\x03\x07\xa1\x20\x00\xff\x2f\x00')
+    assert chunks[2][1] == (
+        b'\x00\x90\x3c\x64'      # C4 on at tick 0
+        b'\x83\x60\x80\x3c\x00'  # off after one beat (480 ticks)
+        b'\x00\x90\x3e\x64'      # D4 on
+        b'\x83\x60\x80\x3e\x00'
+        b'\x00\xff\x2f\x00'
+    )
+
+def test_encode_one_track_per_channel(tmp_path):
+    score = Score.from_pitches([60, 62], 0.5)
+    score.extend(Score.from_pitches([48, 50], 0.5), channel=1)
+
+    path = write_midi(score, str(tmp_path / "parts.mid"), programs={1: 32})
+    with open(path, 'rb') as midi_file:
+        chunks = read_chunks(midi_file.read())
+
+    assert struct.unpack('>HHH', chunks[0][1])[1] == 3
+    assert chunks[3][1].startswith(b'\x00\xc1\x20\x00\x91\x30\x64')
+
+def test_encode_rejects_out_of_range_pitch():
+    with pytest.raises(ValueError):
+        encode_midi(Score.from_pitches([200], 0.5))
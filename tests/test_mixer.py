@@ -0,0 +1,60 @@
+"""
+Tests for the polyphonic mixer
+"""
+
+import numpy as np
+from mixer import Mixer, Envelope
+from score import Score
+
+def chord_score():
+    score = Score()
+    score.add_chord(0.0, 0.5, [60, 64, 67], velocity=127)
+    score.add_chord(0.25, 0.5, [48, 72], velocity=127)
+    return score
+
+def test_envelope_breakpoints():
+    envelope = Envelope(attack=0.01, decay=0.01, sustain=0.5, release=0.02)
+    frames, levels = envelope.breakpoints(1000, 10000)
+    assert frames == [0, 100, 200, 1000, 1200]
+    assert levels == [0.0, 1.0, 0.5, 0.5, 0.0]
+    
+    # Released during the attack: fall from the level reached so far
+    frames, levels = envelope.breakpoints(50, 10000)
+    assert frames == [0, 50, 250]
+    assert levels == [0.0, 0.5, 0.0]
+
+def test_chords_do_not_hard_clip():
+    mixer = Mixer()
+    score = chord_score()
+    pcm = np.concatenate(list(mixer.iter_blocks(score)))
+    
+    assert len(pcm) == mixer.frame_count(score) == round(0.8 * 44100)
+    assert pcm.dtype == np.int16
+    assert np.abs(pcm.astype(np.int32)).max() < 32767
+    # Envelopes start and end at silence
+    assert abs(int(pcm[0])) <= 1
+    assert abs(int(pcm[-1])) < 32
+
+def test_block_size_does_not_change_output():
+    mixer = Mixer(dither=False)
+    score = chord_score()
+    small = np.concatenate(list(mixer.iter_blocks(score, 300)))
+    large = np.concatenate(list(mixer.iter_blocks(score, 8192)))
+    assert np.array_equal(small, large)
+
+def test_channel_gain():
+    score = Score.from_pitches([69], 0.1, velocity=127)
+    quiet = Mixer(channel_gains={0: 0.1}, dither=False)
+    loud = Mixer(dither=False)
+    quiet_peak = np.abs(np.concatenate(list(quiet.iter_blocks(score)))).max()
+    loud_peak = np.abs(np.concatenate(list(loud.iter_blocks(score)))).max()
+    assert quiet_peak < loud_peak / 5
+
+def test_music_generator_mixes_overlapping_notes(tmp_path):
+    import wave
+    from music_generator import MusicGenerator
+    
+    generator = MusicGenerator()
+    path = generator.generate_music(chord_score(), str(tmp_path / "chords.wav"))
+    with wave.open(path, 'rb') as wav_file:
+        assert wav_file.getnframes() == round(0.8 * 44100)
@@ -69,4 +69,133 @@ def test_available_scales_and_instruments(music_generator):
     
     assert 'piano' in instruments
     assert 'guitar' in instruments
-    assert 'violin' in instruments
\ No newline at end of file
+    assert 'violin' in instruments
+
+def test_stream_music_matches_file_output(music_generator, tmp_path):
+    import io
+    import wave
+    test_text = "DO RE MI unknown"
+    
+    stream = io.BytesIO()
+    frames = music_generator.stream_music(test_text, stream, chunk_frames=1000)
+    assert frames == 4 * 22050
+    
+    path = tmp_path / "streamed.wav"
+    music_generator._write_wav(str(path), music_generator.parse_score(test_text))
+    assert stream.getvalue() == path.read_bytes()
+    
+    stream.seek(0)
+    with wave.open(stream, 'rb') as wav_file:
+        assert wav_file.getnframes() == frames
+        assert wav_file.getframerate() == 44100
+
+def test_stream_music_to_unseekable_socket(music_generator):
+    import socket
+    import threading
+    reader, writer = socket.socketpair()
+    received = []
+    thread = threading.Thread(target=lambda: received.append(reader.makefile('rb').read()))
+    thread.start()
+    
+    music_generator.stream_music("LA SI", writer)
+    writer.close()
+    thread.join()
+    reader.close()
+    
+    assert len(received[0]) == 44 + 2 * 22050 * 2
+
+def test_iter_pcm_chunks_is_bounded(music_generator):
+    score = music_generator.parse_score("LA DO")
+    chunks = list(music_generator.iter_pcm_chunks(score, chunk_frames=4096))
+    assert all(len(chunk) <= 4096 * 2 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 2 * 22050 * 2
+
+def test_generate_music_unique_paths(music_generator):
+    from concurrent.futures import ThreadPoolExecutor
+    from config import OUTPUT_DIR
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        paths = list(executor.map(music_generator.generate_music, ["DO RE"] * 8))
+    
+    try:
+        assert len(set(paths)) == 8
+        for path in paths:
+            assert os.path.dirname(path) == OUTPUT_DIR
+            assert os.path.getsize(path) == 44 + 2 * 22050 * 2
+    finally:
+        for path in paths:
+            os.remove(path)
+
+def test_wav_and_midi_share_one_score(music_generator, tmp_path):
+    score = music_generator.parse_score("DO RE unknown")
+    assert list(score.pitches) == [60, 62, music_generator.map_word_to_note("unknown")]
+    assert list(score.onsets) == [0.0, 0.5, 1.0]
+    
+    wav_path = music_generator.generate_music(score, str(tmp_path / "song.wav"))
+    midi_path = music_generator.generate_midi(score, str(tmp_path / "song.mid"))
+    assert os.path.getsize(wav_path) == 44 + 3 * 22050 * 2
+    with open(midi_path, "rb") as midi_file:
+        assert midi_file.read(4) == b"MThd"
+
+def test_continuous_phase_has_no_jumps(music_generator):
+    import numpy as np
+    music_generator.continuous_phase = True
+    pcm = b"".join(music_generator.iter_pcm_chunks(music_generator.parse_score("DO SOL MI")))
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.int32)
+    
+    # No step between neighbouring samples is larger than the steepest sine slope
+    max_slope = 32767 * 2 * np.pi * 392.0 / 44100
+    assert np.abs(np.diff(samples)).max() <= max_slope + 1
+
+def test_note_fades_remove_boundary_clicks(music_generator):
+    import numpy as np
+    score = music_generator.parse_score("DO SOL MI")
+    max_slope = 32767 * 2 * np.pi * 392.0 / 44100
+    
+    music_generator.synthesizer.attack = music_generator.synthesizer.release = 0.0
+    abrupt = np.frombuffer(b"".join(music_generator.iter_pcm_chunks(score)), dtype=np.int16)
+    assert np.abs(np.diff(abrupt.astype(np.int32))).max() > 2 * max_slope
+    
+    music_generator.synthesizer.attack = music_generator.synthesizer.release = 0.005
+    faded = np.frombuffer(b"".join(music_generator.iter_pcm_chunks(score)), dtype=np.int16)
+    assert len(faded) == len(abrupt)
+    assert np.abs(np.diff(faded.astype(np.int32))).max() <= max_slope * 1.2
+
+def test_crossfade_keeps_length(music_generator):
+    import numpy as np
+    music_generator.crossfade = 0.02
+    score = music_generator.parse_score("DO RE MI")
+    chunks = list(music_generator.iter_pcm_chunks(score, chunk_frames=512))
+    assert all(len(chunk) <= 512 * 2 for chunk in chunks)
+    
+    samples = np.frombuffer(b"".join(chunks), dtype=np.int16)
+    assert len(samples) == music_generator.frame_count(score) == 3 * 22050
+    # The blend is sounding across each boundary instead of fading through silence
+    assert np.abs(samples[22050 - 50:22050 + 50]).max() > 10000
+
+def test_rests_are_kept(music_generator):
+    from score import Score
+    score = Score()
+    score.add_note(0.0, 0.5, 60)
+    score.add_note(1.0, 0.5, 64)
+    assert score.end_time == 1.5
+    assert not score.is_sequential()
+    
+    frames = music_generator.frame_count(score)
+    pcm = b"".join(music_generator.iter_pcm_chunks(score))
+    assert frames >= 66150
+    assert len(pcm) == 2 * frames
+    # The rest between the notes is silent apart from the mixer's dither
+    rest = memoryview(pcm).cast('h')[int(0.6 * 44100):int(0.95 * 44100)]
+    assert max(map(abs, rest)) <= 1
+
+def test_cache_metrics_are_registered_explicitly(music_generator):
+    from metrics import METRICS, MetricsRegistry
+    generator = MusicGenerator()
+    # Constructing a generator leaves the global registry alone
+    assert METRICS.collectors.get('note_cache') != generator.note_cache.stats
+    
+    registry = MetricsRegistry()
+    
+    music_generator.register_metrics(registry)
+    assert registry.snapshot()['collectors']['note_cache'] == music_generator.note_cache.stats()
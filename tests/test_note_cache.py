@@ -0,0 +1,50 @@
+"""
+Tests for the note waveform cache
+"""
+
+import pytest
+from note_cache import NoteCache
+from synthesizer import Synthesizer
+
+def test_hits_and_misses():
+    cache = NoteCache(max_bytes=1024)
+    key = cache.make_key(440.0, 0.5, 44100, 32767, 'sine')
+    
+    assert cache.get(key) is None
+    cache.put(key, b'\x01\x00' * 4)
+    assert cache.get(key) == b'\x01\x00' * 4
+    
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['bytes'] == 8
+
+def test_lru_eviction_by_byte_budget():
+    cache = NoteCache(max_bytes=20)
+    cache.put('a', b'x' * 8)
+    cache.put('b', b'x' * 8)
+    cache.get('a')  # 'b' is now least recently used
+    cache.put('c', b'x' * 8)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.current_bytes <= cache.max_bytes
+
+def test_oversized_block_is_not_cached():
+    cache = NoteCache(max_bytes=4)
+    cache.put('big', b'x' * 8)
+    assert len(cache) == 0
+
+def test_synthesizer_uses_cache():
+    cache = NoteCache()
+    synthesizer = Synthesizer(cache=cache)
+    
+    first = synthesizer.note_pcm(440.0, 0.1)
+    second = synthesizer.note_pcm(440.0, 0.1)
+    
+    assert first is second
+    assert bytes(first) == bytes(Synthesizer().render_note(440.0, 0.1))
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
@@ -0,0 +1,56 @@
+"""
+Tests for the wavetable oscillators
+"""
+
+import math
+import pytest
+import numpy as np
+from oscillator import wavetable, Oscillator, OscillatorBank, TABLE_WAVEFORMS
+from synthesizer import Synthesizer
+
+@pytest.mark.parametrize("waveform", TABLE_WAVEFORMS)
+def test_tables_are_normalized(waveform):
+    table = wavetable(waveform)
+    assert len(table) == 2049
+    assert abs(np.abs(table).max() - 1.0) < 1e-12
+    assert table[0] == table[-1]
+    assert not table.flags.writeable
+
+def test_sine_matches_math_sin():
+    oscillator = Oscillator('sine')
+    block = oscillator.render(440.0, 44100)
+    expected = np.sin(2 * np.pi * 440.0 * np.arange(44100) / 44100)
+    assert np.abs(block - expected).max() < 1e-5
+
+def test_phase_carries_across_notes():
+    # Two half notes rendered back to back equal one uninterrupted note
+    split = Oscillator('saw')
+    joined = np.concatenate([split.render(330.0, 1000), split.render(330.0, 1234)])
+    whole = Oscillator('saw').render(330.0, 2234)
+    assert np.allclose(joined, whole, atol=1e-9)
+    
+    # Changing pitch keeps the waveform continuous: no jump at the boundary
+    oscillator = Oscillator('sine')
+    first = oscillator.render(261.63, 22050)
+    second = oscillator.render(293.66, 22050)
+    step = 2 * math.pi * 293.66 / 44100
+    assert abs(second[0] - first[-1]) <= step
+
+def test_bank_keeps_one_oscillator_per_key():
+    bank = OscillatorBank(waveform='triangle')
+    bank.render(0, 440.0, 100)
+    bank.render(1, 220.0, 100)
+    bank.render(0, 440.0, 100)
+    assert len(bank) == 2
+    assert bank.oscillator(0).phase == pytest.approx((440.0 * 200 / 44100) % 1.0)
+    bank.reset()
+    assert len(bank) == 0
+
+def test_synthesizer_renders_instrument_timbres():
+    synthesizer = Synthesizer()
+    block = synthesizer.render_note(440.0, 0.1, waveform='violin')
+    assert len(block) == 4410
+    assert block.dtype == np.int16
+    assert np.abs(block.astype(np.int32)).max() <= 32767
+    with pytest.raises(ValueError):
+        Synthesizer(use_numpy=False).render_note(440.0, 0.1, waveform='violin')
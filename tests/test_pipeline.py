@@ -0,0 +1,99 @@
+"""
+Tests for the speech-to-music pipeline
+"""
+
+import time
+import threading
+import pytest
+import numpy as np
+from pipeline import SpeechPipeline
+from recognizers import RecognizerBackend, StubBackend
+from vad import VoiceActivityDetector
+
+RATE = 16000
+
+def recording(segments, seconds_each=0.3, gap=0.5):
+    """Noise with segments tone bursts separated by silence"""
+    rng = np.random.default_rng(0)
+    length = int((segments * (seconds_each + gap) + gap) * RATE)
+    signal = rng.normal(0, 50, length)
+    t = np.arange(int(seconds_each * RATE)) / RATE
+    for index in range(segments):
+        start = int((gap + index * (seconds_each + gap)) * RATE)
+        signal[start:start + len(t)] += 8000 * np.sin(2 * np.pi * (200 + 50 * index) * t)
+    return signal.astype(np.int16)
+
+class FakeGenerator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.rendered = []
+    
+    def generate_music(self, text, output_format="wav"):
+        time.sleep(self.delay)
+        self.rendered.append(text)
+        return f"{len(self.rendered)}.{output_format}"
+
+def make_pipeline(backend, generator, workers=4):
+    return SpeechPipeline(backend, generator, VoiceActivityDetector(RATE), workers=workers)
+
+def test_results_in_input_order():
+    generator = FakeGenerator()
+    pipeline = make_pipeline(StubBackend(), generator)
+    results = list(pipeline.run(recording(4)))
+    
+    assert len(results) == 4
+    assert [result.output_path for result in results] == ["1.wav", "2.wav", "3.wav", "4.wav"]
+    assert [result.text for result in results] == generator.rendered
+    assert all(a.stop <= b.start for a, b in zip(results, results[1:]))
+    assert pipeline.transcribe(recording(4)) == generator.rendered
+
+def test_stages_overlap():
+    segments, delay = 4, 0.1
+    generator = FakeGenerator(delay)
+    pipeline = make_pipeline(StubBackend(delay=delay), generator)
+    
+    start_time = time.perf_counter()
+    assert len(list(pipeline.run(recording(segments)))) == segments
+    elapsed = time.perf_counter() - start_time
+    
+    # Serially this takes segments * (recognize + render) = 0.8 s
+    assert elapsed < 0.65
+
+def test_empty_text_is_not_rendered():
+    class Silent(RecognizerBackend):
+        def recognize(self, samples, sample_rate):
+            return ""
+    
+    generator = FakeGenerator()
+    results = list(make_pipeline(Silent(), generator).run(recording(2)))
+    assert [result.output_path for result in results] == [None, None]
+    assert generator.rendered == []
+
+def test_backend_errors_propagate():
+    class Failing(RecognizerBackend):
+        def recognize(self, samples, sample_rate):
+            raise RuntimeError("service down")
+    
+    with pytest.raises(RuntimeError, match="service down"):
+        list(make_pipeline(Failing(), FakeGenerator()).run(recording(2)))
+
+def test_segmentation_errors_propagate():
+    class FailingDetector(VoiceActivityDetector):
+        def segments(self, audio):
+            yield from super().segments(audio)
+            raise OSError("truncated recording")
+    
+    pipeline = SpeechPipeline(StubBackend(), FakeGenerator(), FailingDetector(RATE))
+    results = pipeline.run(recording(2))
+    assert len([next(results), next(results)]) == 2
+    with pytest.raises(OSError, match="truncated recording"):
+        next(results)
+
+def test_stopping_early_releases_threads():
+    pipeline = SpeechPipeline(StubBackend(), FakeGenerator(), VoiceActivityDetector(RATE),
+                              workers=2, max_pending=1)
+    results = pipeline.run(recording(6))
+    next(results)
+    results.close()
+    
+    assert not any(thread.name == "segmenter" for thread in threading.enumerate())
@@ -0,0 +1,30 @@
+"""
+Tests for the recognizer backends
+"""
+
+import pytest
+import numpy as np
+from recognizers import RECOGNIZERS, StubBackend, get_backend, register_backend
+
+def test_stub_is_deterministic():
+    samples = (np.sin(np.arange(16000) / 10) * 5000).astype(np.int16)
+    backend = StubBackend()
+    
+    text = backend.recognize(samples, 16000)
+    assert text == backend.recognize(samples.tobytes(), 16000)
+    assert len(text.split()) == 2  # one word per half second
+    assert text != backend.recognize(samples[::-1].copy(), 16000)
+
+def test_stub_emits_at_least_one_word():
+    assert len(StubBackend(words=["DO"]).recognize(np.zeros(10, np.int16), 16000).split()) == 1
+
+def test_registry():
+    assert isinstance(get_backend('stub', delay=0.0), StubBackend)
+    with pytest.raises(ValueError):
+        get_backend('missing')
+    
+    register_backend('silent', lambda: StubBackend(words=["REST"]))
+    try:
+        assert get_backend('silent').recognize(np.zeros(8000, np.int16), 16000) == "REST"
+    finally:
+        del RECOGNIZERS['silent']
@@ -0,0 +1,102 @@
+"""
+Tests for the content-addressed render cache
+"""
+
+import os
+import io
+import pytest
+from render_cache import RenderCache
+from music_generator import MusicGenerator
+from score import Score
+
+def write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def test_keys_follow_score_and_settings():
+    score = Score.from_pitches([60, 62], 0.5)
+    key = RenderCache.make_key(score, {'sample_rate': 44100}, "wav")
+    assert key.endswith(".wav")
+    assert key == RenderCache.make_key(Score.from_pitches([60, 62], 0.5), {'sample_rate': 44100}, "wav")
+    assert key != RenderCache.make_key(Score.from_pitches([60, 64], 0.5), {'sample_rate': 44100}, "wav")
+    assert key != RenderCache.make_key(score, {'sample_rate': 22050}, "wav")
+
+def test_fetch_store_and_eviction(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=20)
+    assert not cache.fetch("a.wav", str(tmp_path / "out.wav"))
+    
+    cache.store("a.wav", write(tmp_path / "a", b"x" * 8))
+    cache.store("b.wav", write(tmp_path / "b", b"y" * 8))
+    assert cache.fetch("a.wav", str(tmp_path / "out.wav"))  # 'b' is now least recently used
+    assert (tmp_path / "out.wav").read_bytes() == b"x" * 8
+    
+    cache.store("c.wav", write(tmp_path / "c", b"z" * 8))
+    assert "b.wav" not in cache
+    assert not os.path.exists(cache.path("b.wav"))
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 16
+    
+    # A new process picks the entries back up from the directory
+    assert len(RenderCache(str(tmp_path / "cache"), max_bytes=20)) == 2
+
+def test_repeated_prompt_is_served_from_cache(tmp_path):
+    generator = MusicGenerator()
+    generator.render_cache = RenderCache(str(tmp_path / "cache"))
+    
+    first = generator.generate_music("do re mi", str(tmp_path / "first.wav"))
+    second = generator.generate_music("DO RE  MI", str(tmp_path / "second.wav"))
+    assert open(first, "rb").read() == open(second, "rb").read()
+    assert generator.render_cache.stats()['hits'] == 1
+    
+    stream = io.BytesIO()
+    assert generator.stream_music("DO RE MI", stream) == 3 * 22050
+    assert stream.getvalue() == open(first, "rb").read()
+    assert generator.render_cache.stats()['hits'] == 2
+    
+    # Different settings are a different entry
+    generator.waveform = 'piano'
+    generator.generate_music("DO RE MI", str(tmp_path / "piano.wav"))
+    assert generator.render_cache.stats()['misses'] == 2
+
+def test_delivered_files_are_independent_copies(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    source = write(tmp_path / "render.wav", b"x" * 8)
+    cache.store("a.wav", source)
+    with open(source, "r+b") as f:
+        f.write(b"edited")
+    
+    output = str(tmp_path / "out.wav")
+    assert cache.fetch("a.wav", output)
+    assert os.stat(output).st_ino != os.stat(cache.path("a.wav")).st_ino
+    with open(output, "r+b") as f:
+        f.write(b"edited")
+    assert open(cache.path("a.wav"), "rb").read() == b"x" * 8
+
+def test_processes_share_one_budget(tmp_path):
+    directory = str(tmp_path / "cache")
+    first = RenderCache(directory, max_bytes=20)
+    second = RenderCache(directory, max_bytes=20)
+    first.store("a.wav", write(tmp_path / "a", b"x" * 8))
+    second.store("b.wav", write(tmp_path / "b", b"y" * 8))
+    first.store("c.wav", write(tmp_path / "c", b"z" * 8))
+    
+    on_disk = sorted(os.listdir(directory))
+    assert on_disk == ["b.wav", "c.wav"]
+    assert sum(os.path.getsize(os.path.join(directory, name)) for name in on_disk) <= 20
+    assert "a.wav" not in first and "b.wav" in first
+    assert second.fetch("c.wav", str(tmp_path / "out.wav"))
+
+def test_store_keeps_the_index_in_memory(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=20)
+    rescans = []
+    monkeypatch.setattr(cache, "_load_index", lambda: rescans.append(True))
+    for name in "abcd":
+        cache.store(f"{name}.wav", write(tmp_path / name, b"x" * 8))
+    
+    assert rescans == []
+    assert sorted(os.listdir(cache.directory)) == ["c.wav", "d.wav"]
+    assert cache.stats()['bytes'] == 16
@@ -0,0 +1,102 @@
+"""
+Tests for the asynchronous generation server
+"""
+
+import io
+import json
+import wave
+import array
+import asyncio
+import pytest
+from server import GenerationServer
+
+async def request(address, target, body):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(
+        f"POST {target} HTTP/1.0\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), payload
+
+async def run_with_server(coroutine, **kwargs):
+    server = GenerationServer(**kwargs)
+    await server.start(port=0)
+    try:
+        return await coroutine(server.address)
+    finally:
+        await server.close()
+
+def test_generate_streams_wav():
+    status, payload = asyncio.run(run_with_server(
+        lambda address: request(address, "/generate", b"DO RE MI")
+    ))
+    
+    assert status == 200
+    with wave.open(io.BytesIO(payload), 'rb') as wav_file:
+        assert wav_file.getnframes() == 3 * 22050
+        assert wav_file.getframerate() == 44100
+
+def test_analyze_returns_json():
+    pcm = array.array('h', [0, 1000, -2000, 500]).tobytes()
+    status, payload = asyncio.run(run_with_server(
+        lambda address: request(address, "/analyze", pcm)
+    ))
+    
+    assert status == 200
+    analysis = json.loads(payload)
+    assert analysis['max_amplitude'] == 2000
+    assert analysis['length'] == 4
+
+def test_busy_when_queue_is_full():
+    async def flood(address):
+        requests = [request(address, "/generate", b"DO RE MI FA SOL LA SI") for _ in range(6)]
+        return await asyncio.gather(*requests)
+    
+    results = asyncio.run(run_with_server(flood, max_in_flight=1, queue_depth=1))
+    statuses = sorted(status for status, _ in results)
+    
+    assert statuses.count(200) >= 2
+    assert 503 in statuses
+    assert all(payload == b"busy\n" for status, payload in results if status == 503)
+
+def test_bad_requests():
+    async def bad(address):
+        return (
+            await request(address, "/generate", b"   "),
+            await request(address, "/missing", b"DO")
+        )
+    
+    empty, missing = asyncio.run(run_with_server(bad))
+    assert empty[0] == 400
+    assert missing[0] == 404
+
+def test_oversized_body_is_refused():
+    from config import SERVER_MAX_BODY
+    
+    async def oversized(address):
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(f"POST /analyze HTTP/1.0\r\nContent-Length: {SERVER_MAX_BODY + 1}\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+    
+    response = asyncio.run(run_with_server(oversized))
+    assert response.startswith(b"HTTP/1.0 413 Payload Too Large")
+    assert response.endswith(b"Request body too large\n")
+
+def test_metrics_endpoint():
+    async def scrape(address):
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(b"GET /metrics HTTP/1.0\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+    
+    response = asyncio.run(run_with_server(scrape))
+    assert response.startswith(b"HTTP/1.0 200")
+    assert b"# TYPE vtm_stage_seconds histogram" in response
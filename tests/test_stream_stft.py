@@ -0,0 +1,65 @@
+"""
+Tests for the incremental STFT
+"""
+
+import wave
+import numpy as np
+from scipy import signal
+from stream_stft import StreamingSTFT
+from wav_source import WavSource
+
+def write_tone(path, sample_rate=44100):
+    t = np.arange(sample_rate) / sample_rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 12000 + np.sin(2 * np.pi * 1250 * t) * 4000).astype('<i2')
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.tobytes())
+    return samples
+
+def test_streamed_frames_match_offline_stft(tmp_path):
+    path = str(tmp_path / "tone.wav")
+    samples = write_tone(path)
+    stft = StreamingSTFT()
+
+    # Feed irregular block sizes, as a live capture callback would
+    frames = []
+    with WavSource(path) as source:
+        position = 0
+        for size in [100, 4096, 1, 511, 3000] * 100:
+            block = source.samples(position, position + size)
+            frames.append(stft.process(block).copy())
+            position += size
+            if position >= len(source):
+                break
+    streamed = np.concatenate(frames)
+
+    _, _, reference = signal.stft(samples.astype(np.float64), fs=44100, nperseg=2048, noverlap=2048 - 512, window="hann")
+    # scipy centres the first frame on sample 0, two hops before ours
+    reference = np.abs(reference).T[2:2 + len(streamed)]
+    assert len(streamed) == stft.frames_emitted == 1 + (len(samples) - 2048) // 512
+    assert np.allclose(streamed, reference, atol=1e-6)
+
+def test_bytes_input_and_dominant_frequency(tmp_path):
+    samples = write_tone(str(tmp_path / "tone.wav"))
+    stft = StreamingSTFT()
+    stft.process(samples[:2048].tobytes())
+
+    assert stft.frames_emitted == 1
+    assert abs(stft.dominant_frequencies[0] - 440) < 22
+    assert np.allclose(stft.frame_times(1), [1024 / 44100])
+
+def test_buffers_are_reused():
+    stft = StreamingSTFT(max_block_frames=1024)
+    block = np.random.randn(1024)
+    stft.process(block)
+    buffers = (stft._buffer, stft.magnitudes, stft.spectrum)
+    for _ in range(20):
+        output = stft.process(block)
+        assert np.shares_memory(output, stft.magnitudes)
+    assert all(a is b for a, b in zip(buffers, (stft._buffer, stft.magnitudes, stft.spectrum)))
+
+    # A larger block grows the buffers once
+    stft.process(np.random.randn(5000))
+    assert stft._capacity == 5000
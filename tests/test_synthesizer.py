@@ -0,0 +1,57 @@
+"""
+Tests for the note synthesis engine
+"""
+
+import math
+import pytest
+from synthesizer import Synthesizer, HAVE_NUMPY
+
+def reference_note(frequency, duration, sample_rate=44100):
+    # The original per-sample loop from MusicGenerator.generate_music
+    samples = []
+    for i in range(int(sample_rate * duration)):
+        t = float(i) / sample_rate
+        samples.append(int(32767 * math.sin(2 * math.pi * frequency * t)))
+    return samples
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_render_note_matches_reference(use_numpy):
+    if use_numpy and not HAVE_NUMPY:
+        pytest.skip("NumPy not installed")
+    synthesizer = Synthesizer(use_numpy=use_numpy)
+    
+    for frequency in (261.63, 440.0, 493.88):
+        block = synthesizer.render_note(frequency, 0.5)
+        expected = reference_note(frequency, 0.5)
+        
+        assert len(block) == len(expected) == 22050
+        assert max(abs(int(a) - b) for a, b in zip(block, expected)) <= 1
+
+def test_render_note_is_bytes_like():
+    block = Synthesizer().render_note(440.0, 0.01)
+    assert len(memoryview(block).cast('B')) == 441 * 2
+
+def test_render_note_rejects_unknown_waveform():
+    with pytest.raises(ValueError):
+        Synthesizer().render_note(440.0, 0.1, waveform='noise')
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_render_note_fades(use_numpy):
+    if use_numpy and not HAVE_NUMPY:
+        pytest.skip("NumPy not installed")
+    synthesizer = Synthesizer(use_numpy=use_numpy, attack=0.01, release=0.02)
+    block = synthesizer.render_note(440.0, 0.1)
+    plain = reference_note(440.0, 0.1)
+    
+    assert len(block) == len(plain) == 4410
+    assert abs(block[1]) < abs(plain[1]) and abs(block[-1]) <= 1
+    # Only the 441 attack and 882 release frames are shaped
+    assert max(abs(int(a) - b) for a, b in zip(block[441:4410 - 882], plain[441:4410 - 882])) <= 1
+
+def test_fades_are_identical_with_and_without_numpy():
+    if not HAVE_NUMPY:
+        pytest.skip("NumPy not installed")
+    fast = Synthesizer(use_numpy=True, attack=0.005, release=0.005, fade_shape='equal_power')
+    slow = Synthesizer(use_numpy=False, attack=0.005, release=0.005, fade_shape='equal_power')
+    assert max(abs(int(a) - b) for a, b in zip(fast.render_note(330.0, 0.05, tail=100),
+                                               slow.render_note(330.0, 0.05, tail=100))) <= 1
@@ -0,0 +1,50 @@
+"""
+Tests for the text-to-score tokenizer
+"""
+
+import pytest
+from tokenizer import TextMapper, Vocabulary, SCALES
+
+def test_known_words_and_punctuation():
+    mapper = TextMapper()
+    assert mapper.tokenize("Do, re... mi!") == ["DO", "RE", "MI"]
+    assert mapper.map_text("Do, re... mi!") == [60, 62, 64]
+    assert mapper.map_word("happy") == 67
+
+def test_fallback_is_deterministic_and_in_scale():
+    mapper = TextMapper(scale='pentatonic')
+    words = [f"word{index}" for index in range(200)]
+    pitches = [mapper.map_word(word) for word in words]
+    assert pitches == [TextMapper(scale='pentatonic').map_word(word) for word in words]
+    assert set(pitches) <= set(SCALES['pentatonic']['notes'])
+    assert len(set(pitches)) == 5
+
+def test_scale_quantization_and_octave_shift():
+    # FEAR (61, C#) is not in C major and snaps down to C
+    assert TextMapper(scale='C_major').map_word("fear") == 60
+    assert TextMapper(scale='chromatic').map_word("fear") == 61
+    # MI (64) is not in the blues scale; E is equally far from Eb and F
+    assert TextMapper(scale='blues').map_word("mi") == 63
+    assert TextMapper(octave_shift=-1).map_text("do re") == [48, 50]
+
+def test_binary_vocabulary_round_trip(tmp_path):
+    index = {f"WORD{index}": index % 128 for index in range(100000)}
+    path = str(tmp_path / "words.voc")
+    Vocabulary(index).save(path)
+    
+    vocabulary = Vocabulary.load(path)
+    assert vocabulary.index == index
+    # Loading the unchanged file again reuses the parsed index
+    assert Vocabulary.load(path).index is vocabulary.index
+    
+    mapper = TextMapper(vocabulary, scale='chromatic')
+    assert mapper.map_texts(["word60 word62", "word64"]) == [[60, 62], [64]]
+
+def test_rejects_unknown_scale():
+    with pytest.raises(ValueError):
+        TextMapper(scale='lydian')
+
+def test_empty_vocabulary_is_kept():
+    mapper = TextMapper(Vocabulary({}))
+    assert len(mapper.vocabulary) == 0
+    assert "DO" not in mapper.vocabulary.index
@@ -7,9 +7,11 @@ import numpy as np
 from utils import (
     generate_filename,
     get_file_path,
+    atomic_write,
     log_error,
     analyze_frequency_spectrum,
     detect_pitch,
+    track_pitch,
     Timer,
     AudioAnalyzer
 )
@@ -29,6 +31,36 @@ def test_generate_filename():
     assert filename.startswith("audio_")
     assert filename.endswith(".mid")
 
+def test_generate_filename_is_unique():
+    filenames = {generate_filename("test", "wav") for _ in range(1000)}
+    assert len(filenames) == 1000
+
+def test_atomic_write(tmp_path):
+    path = os.path.join(tmp_path, "out.bin")
+    with atomic_write(path) as output_file:
+        output_file.write(b"data")
+        assert not os.path.exists(path)
+    
+    with open(path, "rb") as f:
+        assert f.read() == b"data"
+    
+    # New files get the mode open() would give them, replaced files keep theirs
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+    os.chmod(path, 0o640)
+    with atomic_write(path) as output_file:
+        output_file.write(b"again")
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    
+    # A failed write leaves neither the target nor a temporary file behind
+    failed = os.path.join(tmp_path, "failed.bin")
+    with pytest.raises(RuntimeError):
+        with atomic_write(failed) as output_file:
+            output_file.write(b"partial")
+            raise RuntimeError("boom")
+    assert os.listdir(tmp_path) == ["out.bin"]
+
 def test_get_file_path():
     # Test path joining
     path = get_file_path("/test/dir", "file.txt")
@@ -82,6 +114,34 @@ def test_detect_pitch():
     assert detected_pitch is not None
     assert abs(detected_pitch - frequency) < 10
 
+def test_track_pitch_contour():
+    # Half a second of 220 Hz followed by half a second of 440 Hz, with harmonics
+    sample_rate = 44100
+    t = np.arange(sample_rate // 2) / sample_rate
+    def tone(f):
+        return np.sin(2 * np.pi * f * t) + 0.5 * np.sin(2 * np.pi * 2 * f * t)
+    signal = np.concatenate([tone(220), tone(440), np.zeros(sample_rate // 2)])
+    
+    contour = track_pitch(signal, sample_rate)
+    times = contour['times']
+    pitches = contour['pitches']
+    confidence = contour['confidence']
+    
+    assert len(times) == len(pitches) == len(confidence)
+    first = (times > 0.05) & (times < 0.45)
+    second = (times > 0.55) & (times < 0.95)
+    silent = times > 1.05
+    assert np.all(np.abs(pitches[first] - 220) < 1)
+    assert np.all(np.abs(pitches[second] - 440) < 1)
+    assert np.all(confidence[first | second] > 0.9)
+    assert np.all(confidence[silent] == 0)
+
+def test_arrays_need_a_sample_rate():
+    signal = np.zeros(4096)
+    for analyse in (analyze_frequency_spectrum, detect_pitch, track_pitch):
+        with pytest.raises(ValueError, match="sample_rate is required"):
+            analyse(signal)
+
 def test_timer():
     # Test timer context manager
     with Timer("test_operation") as timer:
@@ -113,4 +173,66 @@ def test_audio_analyzer():
     
     # Test spectral rolloff
     rolloff = analyzer.calculate_spectral_rolloff(mags, freqs)
-    assert rolloff in freqs
\ No newline at end of file
+    assert rolloff in freqs
+
+def test_import_is_lightweight(tmp_path):
+    # Importing utils must not pull in NumPy/SciPy or touch the filesystem
+    import subprocess
+    import sys
+    code = (
+        "import sys, os, utils, music_generator\n"
+        "assert 'numpy' not in sys.modules and 'scipy' not in sys.modules\n"
+        "assert not os.path.exists('output')\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+
+def test_extract_features():
+    sample_rate = 44100
+    t = np.arange(sample_rate) / sample_rate
+    signal = np.sin(2 * np.pi * 440 * t)
+    
+    features = AudioAnalyzer.extract_features(signal, sample_rate)
+    assert features.dtype.names == (
+        'time', 'rms', 'zero_crossing_rate',
+        'spectral_centroid', 'spectral_rolloff', 'dominant_frequency'
+    )
+    assert len(features) == 1 + (sample_rate - 2048) // 512
+    
+    # Per-frame values agree with the single-feature methods
+    frame = signal[512 * 10:512 * 10 + 2048]
+    assert abs(features['rms'][10] - AudioAnalyzer.calculate_rms(frame)) < 1e-5
+    assert abs(features['zero_crossing_rate'][10] -
+               AudioAnalyzer.calculate_zero_crossing_rate(frame)) < 1e-6
+    assert np.all(np.abs(features['dominant_frequency'] - 440) < 22)
+
+def test_extract_features_batch():
+    sample_rate = 16000
+    clips = [np.random.randn(length) for length in (100, 3000, 9000)]
+    
+    batch = AudioAnalyzer.extract_features_batch(clips, sample_rate)
+    
+    assert len(batch) == 3
+    for clip, features in zip(clips, batch):
+        single = AudioAnalyzer.extract_features(clip, sample_rate)
+        assert np.allclose(features.view(np.float32), single.view(np.float32))
+
+def test_extract_features_batch_rejects_mixed_rates(tmp_path):
+    import wave
+    from wav_source import WavSource
+    paths = []
+    for sample_rate in (44100, 16000):
+        path = str(tmp_path / f"clip_{sample_rate}.wav")
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(np.zeros(4096, dtype='<i2').tobytes())
+        paths.append(path)
+    
+    with WavSource(paths[0]) as first, WavSource(paths[1]) as second:
+        with pytest.raises(ValueError):
+            AudioAnalyzer.extract_features_batch([first, second])
+        with pytest.raises(ValueError):
+            AudioAnalyzer.extract_features_batch([second], 44100)
+        assert len(AudioAnalyzer.extract_features_batch([second, np.zeros(4096)])) == 2
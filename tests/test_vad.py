@@ -0,0 +1,108 @@
+"""
+Tests for the voice activity detector
+"""
+
+import wave
+import pytest
+import numpy as np
+from vad import VoiceActivityDetector
+from utils import AudioAnalyzer
+
+RATE = 16000
+
+def noise(seconds, rms, seed=0):
+    return np.random.default_rng(seed).normal(0, rms, int(seconds * RATE))
+
+def tone(seconds, amplitude=8000, frequency=220):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+def write_wav(path, signal):
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(np.clip(signal, -32768, 32767).astype('<i2').tobytes())
+    return path
+
+@pytest.fixture
+def recording(tmp_path):
+    # Silence 0-1 s, speech 1-1.5 s, silence, speech 2.5-2.9 s, silence
+    signal = noise(3.5, 50)
+    signal[RATE:RATE * 3 // 2] += tone(0.5)
+    signal[RATE * 5 // 2:RATE * 29 // 10] += tone(0.4)
+    return write_wav(str(tmp_path / "speech.wav"), signal)
+
+def test_frame_features_match_analyzer():
+    detector = VoiceActivityDetector(RATE)
+    signal = tone(0.1) + noise(0.1, 10)
+    rms, zcr = detector.frame_features(signal.astype(np.int16))
+    
+    frame = signal.astype(np.int16)[:detector.frame_length].astype(np.float64)
+    assert len(rms) == 5
+    assert abs(rms[0] - AudioAnalyzer.calculate_rms(frame)) < 1e-2
+    assert zcr[0] == AudioAnalyzer.calculate_zero_crossing_rate(frame)
+
+def test_segments_wav_fixture(recording):
+    detector = VoiceActivityDetector(RATE)
+    segments = list(detector.segments(recording, block_frames=4000))
+    
+    assert len(segments) == 2
+    first, second = segments
+    assert abs(first.start - (RATE - detector.padding)) <= detector.frame_length
+    assert abs(first.stop - (RATE * 3 // 2 + detector.padding)) <= detector.frame_length
+    assert abs(second.start - (RATE * 5 // 2 - detector.padding)) <= detector.frame_length
+    assert len(first.samples) == first.stop - first.start
+    assert first.samples.dtype == np.int16
+    assert np.max(np.abs(first.samples)) > 7000
+
+def test_segments_close_before_stream_ends(recording):
+    detector = VoiceActivityDetector(RATE)
+    with wave.open(recording, 'rb') as wav_file:
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2')
+    
+    closed_after = []
+    for start in range(0, len(samples), 1600):
+        for segment in detector.feed(samples[start:start + 1600]):
+            closed_after.append((start + 1600) / RATE)
+    closed_after.extend(len(samples) / RATE for _ in detector.flush())
+    
+    # Each segment is emitted once the hangover of silence has passed
+    assert len(closed_after) == 2
+    assert closed_after[0] < 2.0
+    assert closed_after[1] < 3.5
+
+def test_short_gaps_merge_and_clicks_are_dropped():
+    signal = noise(2.0, 50)
+    signal[8000:12000] += tone(0.25)
+    signal[14000:18000] += tone(0.25)  # 125 ms gap, under the hangover
+    signal[28000:28320] += tone(0.02)  # 20 ms click
+    
+    segments = list(VoiceActivityDetector(RATE).segments(signal.astype(np.int16)))
+    assert len(segments) == 1
+    assert segments[0].start < 8000 < 18000 < segments[0].stop
+
+def test_fricatives_count_as_speech():
+    signal = noise(1.5, 50)
+    hiss = np.diff(noise(0.3, 70, seed=1), prepend=0)  # below the energy gate, many zero crossings
+    signal[8000:8000 + len(hiss)] += hiss
+    
+    detector = VoiceActivityDetector(RATE)
+    detector.calibrate(noise(0.5, 50).astype(np.int16))
+    assert len(list(detector.segments(signal.astype(np.int16)))) == 1
+
+def test_noise_floor_is_kept_between_calls(recording, monkeypatch):
+    detector = VoiceActivityDetector(RATE)
+    list(detector.segments(recording))
+    floor = detector.noise_floor
+    assert 30 <= floor < 150
+    
+    monkeypatch.setattr(detector, '_calibrate', lambda rms: pytest.fail("recalibrated"))
+    assert len(list(detector.segments(recording))) == 2
+    assert detector.noise_floor == pytest.approx(floor, rel=0.5)
+
+def test_follows_recording_sample_rate(recording):
+    detector = VoiceActivityDetector(44100)
+    assert len(list(detector.segments(recording))) == 2
+    assert detector.sample_rate == RATE
+    assert detector.frame_length == RATE // 50
@@ -0,0 +1,126 @@
+"""
+Tests for the memory-mapped WAV reader
+"""
+
+import wave
+import struct
+import pytest
+import numpy as np
+from wav_source import WavSource
+from utils import analyze_frequency_spectrum, AudioAnalyzer
+
+@pytest.fixture
+def wav_path(tmp_path):
+    t = np.arange(44100) / 44100
+    samples = (np.sin(2 * np.pi * 440 * t) * 20000).astype('<i2')
+    path = str(tmp_path / "tone.wav")
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(samples.tobytes())
+    return path, samples
+
+def test_header_and_samples(wav_path):
+    path, samples = wav_path
+    with WavSource(path) as source:
+        assert source.frames == len(source) == 44100
+        assert source.sample_rate == 44100
+        assert source.channels == 1
+        assert source.duration == 1.0
+        
+        data = source.samples()
+        assert np.array_equal(data, samples)
+        assert not data.flags.writeable
+        del data
+
+def test_slicing_is_zero_copy(wav_path):
+    path, samples = wav_path
+    with WavSource(path) as source:
+        window = source[1000:2000]
+        assert np.array_equal(window, samples[1000:2000])
+        assert np.shares_memory(window, source.samples())
+        
+        blocks = list(source.iter_blocks(10000))
+        assert [len(block) for block in blocks] == [10000] * 4 + [4100]
+        del window, blocks
+
+def test_analysis_accepts_source(wav_path):
+    path, samples = wav_path
+    with WavSource(path) as source:
+        analysis = analyze_frequency_spectrum(source)
+        assert abs(np.mean(analysis['dominant_frequencies']) - 440) < 25
+        
+        rms = AudioAnalyzer.calculate_rms(source)
+        assert abs(rms - AudioAnalyzer.calculate_rms(samples.astype(np.float64))) < 1e-6
+        
+        zcr = AudioAnalyzer.calculate_zero_crossing_rate(source)
+        assert zcr == AudioAnalyzer.calculate_zero_crossing_rate(samples)
+
+def test_rejects_non_wav(tmp_path):
+    path = tmp_path / "not.wav"
+    path.write_bytes(b"hello world, not a wav")
+    with pytest.raises(ValueError):
+        WavSource(str(path))
+
+@pytest.fixture
+def stereo_path(tmp_path):
+    rng = np.random.default_rng(0)
+    t = np.arange(5 * 44100) / 44100
+    left = np.sin(2 * np.pi * 440 * t) * 12000 + rng.normal(0, 500, len(t))
+    right = np.sin(2 * np.pi * 660 * t) * 6000
+    samples = np.stack((left, right), axis=1).astype('<i2')
+    path = str(tmp_path / "stereo.wav")
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(samples.tobytes())
+    return path, samples.mean(axis=1)
+
+def test_stereo_analysis_matches_downmix(stereo_path):
+    from utils import track_pitch
+    path, mono = stereo_path
+    with WavSource(path) as source:
+        streamed = analyze_frequency_spectrum(source)
+        expected = analyze_frequency_spectrum(mono, 44100)
+        assert streamed['magnitudes'].shape == expected['magnitudes'].shape
+        assert np.allclose(streamed['magnitudes'], expected['magnitudes'])
+        assert np.allclose(streamed['times'], expected['times'])
+        
+        assert np.allclose(track_pitch(source)['pitches'], track_pitch(mono, 44100)['pitches'])
+        features = AudioAnalyzer.extract_features(source)
+        assert np.allclose(features.view(np.float32),
+                           AudioAnalyzer.extract_features(mono, 44100).view(np.float32))
+
+def test_stereo_features_are_streamed(tmp_path):
+    import tracemalloc
+    peaks = []
+    for seconds in (5, 20):
+        samples = np.random.default_rng(0).normal(0, 3000, (seconds * 44100, 2)).astype('<i2')
+        path = str(tmp_path / f"noise_{seconds}.wav")
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(2)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(44100)
+            wav_file.writeframes(samples.tobytes())
+        with WavSource(path) as source:
+            AudioAnalyzer.extract_features(source)  # warm up imports
+            tracemalloc.start()
+            try:
+                AudioAnalyzer.extract_features(source)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+    # A whole-file float64 downmix of the extra 15 s alone would add 5.3 MB
+    assert peaks[1] - peaks[0] < 1024 * 1024
+
+def test_unset_data_size_runs_to_end_of_file(tmp_path):
+    samples = np.arange(-500, 500, dtype='<i2')
+    header = struct.pack('<4sL4s4sLHHLLHH4sL', b'RIFF', 0, b'WAVE', b'fmt ', 16, 1, 1,
+                         8000, 16000, 2, 16, b'data', 0)
+    path = tmp_path / "streamed.wav"
+    path.write_bytes(header + samples.tobytes())
+    with WavSource(str(path)) as source:
+        assert source.frames == len(samples)
+        assert np.array_equal(source.samples(), samples)
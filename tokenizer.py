@@ -0,0 +1,166 @@
+"""
+Text-to-score tokenizer for the Voice-to-Music Generator
+Using only Python standard library
+
+Words are looked up in a vocabulary index (a dict built once) and snapped
+to the notes of a scale; words missing from the vocabulary get a note from
+a stable hash, so the same word always plays the same note.
+"""
+
+import os
+import zlib
+import string
+import struct
+import logging
+from functools import lru_cache
+from config import *
+
+logger = logging.getLogger(__name__)
+
+SCALES = {
+    'C_major': {'notes': [60, 62, 64, 65, 67, 69, 71]},
+    'A_minor': {'notes': [57, 59, 60, 62, 64, 65, 67]},
+    'pentatonic': {'notes': [60, 62, 64, 67, 69]},
+    'blues': {'notes': [60, 63, 65, 66, 67, 70]},
+    'chromatic': {'notes': list(range(60, 72))}
+}
+
+DEFAULT_VOCABULARY = {
+    # Solfege and note names
+    "DO": 60, "RE": 62, "MI": 64, "FA": 65, "SOL": 67, "LA": 69, "SI": 71,
+    "C": 60, "D": 62, "E": 64, "F": 65, "G": 67, "A": 69, "B": 71,
+    # Emotional words
+    "HAPPY": 67, "JOY": 72, "LOVE": 65, "HOPE": 69, "CALM": 64, "PEACE": 62,
+    "SAD": 60, "ANGRY": 66, "FEAR": 61, "DARK": 57, "LONELY": 59, "TIRED": 55
+}
+
+VOCABULARY_MAGIC = b'VOCB'
+VOCABULARY_VERSION = 1
+VOCABULARY_HEADER = struct.Struct('<4sBL')
+
+_STRIP_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+class Vocabulary:
+    """
+    Word -> MIDI pitch index
+
+    The compact binary form is a header (magic, version, word count), one
+    pitch byte per word, then the words as newline-separated UTF-8.
+    Indexes returned by load() are shared between callers; do not modify
+    them in place.
+    """
+    def __init__(self, index=None):
+        self.index = dict(DEFAULT_VOCABULARY) if index is None else index
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a binary vocabulary, reusing the parsed index while the file
+        is unchanged
+        """
+        return cls(_load_index(os.path.abspath(path), os.stat(path).st_mtime_ns))
+
+    def save(self, path):
+        """Write the vocabulary in the compact binary form"""
+        words = list(self.index)
+        for word in words:
+            if "\n" in word:
+                raise ValueError(f"Vocabulary words cannot contain newlines: {word!r}")
+        with open(path, 'wb') as vocabulary_file:
+            vocabulary_file.write(VOCABULARY_HEADER.pack(VOCABULARY_MAGIC, VOCABULARY_VERSION, len(words)))
+            vocabulary_file.write(bytes(self.index[word] for word in words))
+            vocabulary_file.write("\n".join(words).encode('utf-8'))
+
+    def __contains__(self, word):
+        return word in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+@lru_cache(maxsize=8)
+def _load_index(path, mtime_ns):
+    with open(path, 'rb') as vocabulary_file:
+        data = vocabulary_file.read()
+    magic, version, count = VOCABULARY_HEADER.unpack_from(data)
+    if magic != VOCABULARY_MAGIC or version != VOCABULARY_VERSION:
+        raise ValueError(f"{path} is not a vocabulary file")
+    start = VOCABULARY_HEADER.size
+    pitches = data[start:start + count]
+    words = data[start + count:].decode('utf-8').split("\n") if count else []
+    if len(words) != count:
+        raise ValueError(f"{path} is truncated")
+    logger.debug(f"Loaded {count} words from {path}")
+    return dict(zip(words, pitches))
+
+@lru_cache(maxsize=None)
+def _quantize_table(notes):
+    """
+    For every MIDI pitch, the nearest pitch whose pitch class is in notes
+    (ties go down)
+    """
+    classes = {note % 12 for note in notes}
+    allowed = [pitch for pitch in range(-12, 140) if pitch % 12 in classes]
+    table = []
+    for pitch in range(128):
+        nearest = min(allowed, key=lambda candidate: (abs(candidate - pitch), candidate))
+        table.append(min(127, max(0, nearest)))
+    return tuple(table)
+
+def word_hash(word):
+    """Stable 32-bit hash of a word, the same in every process"""
+    return zlib.crc32(word.encode('utf-8'))
+
+class TextMapper:
+    """
+    Maps text to MIDI pitches in a scale
+
+    Known words are quantized to the scale, unknown words pick a scale note
+    by word_hash over octave_span octaves, and octave_shift moves the result.
+    Cost per word is a dict lookup and a table index, whatever the
+    vocabulary size.
+    """
+    def __init__(self, vocabulary=None, scale=SCALE, octave_shift=0, octave_span=1):
+        if scale not in SCALES:
+            raise ValueError(f"Unsupported scale: {scale}")
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.scale = scale
+        self.octave_shift = octave_shift
+        self.octave_span = octave_span
+        self.notes = tuple(SCALES[scale]['notes'])
+        self._quantize = _quantize_table(self.notes)
+
+    @staticmethod
+    def tokenize(text):
+        """Split text into upper-case words without punctuation"""
+        return text.translate(_STRIP_PUNCTUATION).upper().split()
+
+    def _fallback(self, word):
+        value = word_hash(word)
+        count = len(self.notes)
+        return self.notes[value % count] + 12 * ((value // count) % self.octave_span)
+
+    def map_word(self, word):
+        """MIDI pitch of one word (any case)"""
+        word = word.upper()
+        pitch = self.vocabulary.index.get(word)
+        pitch = self._fallback(word) if pitch is None else self._quantize[pitch]
+        return min(127, max(0, pitch + 12 * self.octave_shift))
+
+    def map_text(self, text):
+        """MIDI pitches of every word of text"""
+        get = self.vocabulary.index.get
+        quantize = self._quantize
+        fallback = self._fallback
+        shift = 12 * self.octave_shift
+        pitches = []
+        for word in self.tokenize(text):
+            pitch = get(word)
+            pitch = fallback(word) if pitch is None else quantize[pitch]
+            pitches.append(pitch)
+        if shift:
+            pitches = [min(127, max(0, pitch + shift)) for pitch in pitches]
+        return pitches
+
+    def map_texts(self, texts):
+        """Map many texts at once; returns one pitch list per text"""
+        return [self.map_text(text) for text in texts]
@@ -1,34 +1,51 @@
 """
 Utility functions for the Voice-to-Music Generator
+
+NumPy and SciPy are imported inside the analysis functions that need them,
+so importing this module stays cheap on the text-to-WAV path.
 """
 
 import os
 import time
+import uuid
 import logging
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
-import numpy as np
-from scipy import signal
 from config import *
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format=LOG_FORMAT,
-    datefmt=LOG_DATE_FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
+from wav_source import WavSource
+from metrics import METRICS, ANALYSE
 
 logger = logging.getLogger(__name__)
 
+# The process umask can only be read by setting it; do so once, at import,
+# rather than racing other threads on every write
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+def setup_logging(log_file=LOG_FILE, level=logging.INFO):
+    """
+    Configure application logging to the console and log_file.
+    Call once at start-up; importing this module has no logging side effects.
+    """
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+    logging.basicConfig(
+        level=level,
+        format=LOG_FORMAT,
+        datefmt=LOG_DATE_FORMAT,
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
 def generate_filename(prefix, extension):
     """
-    Generate a unique filename with timestamp
+    Generate a unique filename with a microsecond timestamp and a random
+    suffix, so concurrent workers never pick the same name
     """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"{prefix}_{timestamp}.{extension}"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}.{extension}"
 
 def get_file_path(directory, filename):
     """
@@ -36,6 +53,34 @@ def get_file_path(directory, filename):
     """
     return os.path.join(directory, filename)
 
+@contextmanager
+def atomic_write(path, mode="wb"):
+    """
+    Open a temporary file next to path and rename it into place on success,
+    so readers never observe a partially written file. The file gets the
+    permissions of the file it replaces, or those open() would have given
+    a new file, instead of the owner-only mode of temporary files.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory,
+        prefix=f".{os.path.basename(path)}.",
+        suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode) as temp_file:
+            yield temp_file
+        try:
+            permissions = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            permissions = 0o666 & ~_UMASK
+        os.chmod(temp_path, permissions)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 def log_error(error, context=""):
     """
     Log error messages with timestamp and context
@@ -46,21 +91,111 @@ def log_error(error, context=""):
     logger.error(error_msg)
     return error_msg
 
-def analyze_frequency_spectrum(audio_data, sample_rate):
+def _read_mono(source, start, stop):
+    """
+    Samples [start, stop) of a WavSource as one channel: a zero-copy view
+    of mono 8/16/32-bit files, otherwise a copy of just this span
+    """
+    if source.sample_width == 3:
+        # 24-bit samples cannot be viewed in place; unpack them to int32
+        from convert import unpack
+        samples = unpack(source.raw(start, stop), 's24')
+        if source.channels > 1:
+            samples = samples.reshape(-1, source.channels)
+    else:
+        samples = source.samples(start, stop)
+    return samples.mean(axis=1) if source.channels > 1 else samples
+
+class _FramedSource:
+    """
+    Overlapping analysis frames of a WavSource, read on demand
+
+    Slicing reads, and for multichannel or 24-bit files downmixes, only
+    the samples the requested frames cover, so a file is never converted
+    whole. The signal is taken to have pad zeros before its first sample
+    and to be zero-filled up to length samples (at least one frame).
+    """
+    def __init__(self, source, frame_size, hop_length, pad=0, length=None):
+        self.source = source
+        self.frame_size = frame_size
+        self.hop_length = hop_length
+        self.pad = pad
+        length = pad + source.frames if length is None else length
+        self.frames = (max(length, frame_size) - frame_size) // hop_length + 1
+
+    def __len__(self):
+        return self.frames
+
+    def __getitem__(self, key):
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+
+        start, stop, _ = key.indices(self.frames)
+        stop = max(start, stop)
+        if start == stop:
+            return np.zeros((0, self.frame_size))
+        # Span of the source the frames cover, in source sample positions
+        first = start * self.hop_length - self.pad
+        last = (stop - 1) * self.hop_length + self.frame_size - self.pad
+        block = np.zeros(last - first)
+        lo, hi = max(first, 0), min(last, self.source.frames)
+        if hi > lo:
+            block[lo - first:hi - first] = _read_mono(self.source, lo, hi)
+        return sliding_window_view(block, self.frame_size)[::self.hop_length]
+
+def _frame_source(audio_data, sample_rate, frame_size, hop_length):
+    """
+    Frames of an in-memory array or a WavSource, with the WavSource's own
+    sample rate when none is given (None for arrays without one)
+    """
+    if isinstance(audio_data, WavSource):
+        if sample_rate is None:
+            sample_rate = audio_data.sample_rate
+        return _FramedSource(audio_data, frame_size, hop_length), sample_rate
+    return _frame_signal(audio_data, frame_size, hop_length), sample_rate
+
+def _check_sample_rate(audio_data, sample_rate):
+    """Only a WavSource knows its own sample rate"""
+    if sample_rate is None and not isinstance(audio_data, WavSource):
+        raise ValueError("sample_rate is required for raw sample arrays")
+
+def _frame_signal(audio_data, frame_size, hop_length):
+    """
+    Split a signal into overlapping frames as a zero-copy strided view,
+    zero-padding signals shorter than one frame
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    
+    audio_data = np.asarray(audio_data)
+    if len(audio_data) < frame_size:
+        audio_data = np.pad(audio_data, (0, frame_size - len(audio_data)))
+    return sliding_window_view(audio_data, frame_size)[::hop_length]
+
+def analyze_frequency_spectrum(audio_data, sample_rate=None):
     """
     Analyze the frequency spectrum of audio data using STFT
     Returns frequencies and their magnitudes
     """
-    frequencies, times, spectrogram = signal.stft(
-        audio_data,
-        fs=sample_rate,
-        nperseg=FFT_SIZE,
-        noverlap=FFT_SIZE - HOP_LENGTH,
-        window=WINDOW_TYPE
-    )
+    _check_sample_rate(audio_data, sample_rate)
+    import numpy as np
+    from scipy import signal
     
-    # Calculate magnitude spectrum
-    magnitudes = np.abs(spectrogram)
+    if isinstance(audio_data, WavSource):
+        if sample_rate is None:
+            sample_rate = audio_data.sample_rate
+        frequencies, times, magnitudes = _source_spectrum(audio_data, sample_rate)
+    else:
+        frequencies, times, spectrogram = signal.stft(
+            audio_data,
+            fs=sample_rate,
+            nperseg=FFT_SIZE,
+            noverlap=FFT_SIZE - HOP_LENGTH,
+            window=WINDOW_TYPE
+        )
+        
+        # Calculate magnitude spectrum
+        magnitudes = np.abs(spectrogram)
     
     # Find dominant frequencies
     dominant_freqs = frequencies[np.argmax(magnitudes, axis=0)]
@@ -72,37 +207,196 @@ def analyze_frequency_spectrum(audio_data, sample_rate):
         'times': times
     }
 
-def detect_pitch(audio_data, sample_rate):
+def _source_spectrum(source, sample_rate):
+    """
+    Magnitudes of scipy.signal.stft over a WavSource (zero boundaries,
+    padded to whole frames), transformed ANALYSIS_BATCH_FRAMES frames at a
+    time so only the output spectrogram is held in full
+    """
+    import numpy as np
+    
+    pad = FFT_SIZE // 2
+    length = source.frames + 2 * pad
+    length += -(length - FFT_SIZE) % HOP_LENGTH
+    frames = _FramedSource(source, FFT_SIZE, HOP_LENGTH, pad, length)
+    window = _analysis_window(WINDOW_TYPE, FFT_SIZE)
+    scale = 1.0 / window.sum()
+    
+    magnitudes = np.empty((FFT_SIZE // 2 + 1, len(frames)))
+    for start in range(0, len(frames), ANALYSIS_BATCH_FRAMES):
+        batch = frames[start:start + ANALYSIS_BATCH_FRAMES] * window
+        spectrum = np.abs(np.fft.rfft(batch, axis=1))
+        spectrum *= scale
+        magnitudes[:, start:start + len(batch)] = spectrum.T
+    
+    frequencies = np.fft.rfftfreq(FFT_SIZE, 1.0 / sample_rate)
+    times = np.arange(len(frames)) * HOP_LENGTH / sample_rate
+    return frequencies, times, magnitudes
+
+def track_pitch(audio_data, sample_rate=None, frame_size=FFT_SIZE, hop_length=HOP_LENGTH,
+                fmin=PITCH_MIN_FREQUENCY, fmax=PITCH_MAX_FREQUENCY):
+    """
+    Track pitch frame by frame with the normalized square difference function
+    (McLeod pitch method). Autocorrelation is computed with a batched FFT and
+    only over the lags of plausible pitches between fmin and fmax.
+    Returns frame times, pitches (0 where unvoiced) and confidence per frame
+    """
+    _check_sample_rate(audio_data, sample_rate)
+    import numpy as np
+    
+    frames, sample_rate = _frame_source(audio_data, sample_rate, frame_size, hop_length)
+    min_lag = max(1, int(sample_rate / fmax))
+    max_lag = min(frame_size - 2, int(np.ceil(sample_rate / fmin)))
+    # Padding to frame_size + max_lag makes the circular correlation linear
+    fft_size = 1 << int(np.ceil(np.log2(frame_size + max_lag + 1)))
+    lags = np.arange(max_lag + 2)
+    
+    pitches = np.zeros(len(frames))
+    confidence = np.zeros(len(frames))
+    for start in range(0, len(frames), ANALYSIS_BATCH_FRAMES):
+        batch = frames[start:start + ANALYSIS_BATCH_FRAMES].astype(np.float64)
+        batch -= batch.mean(axis=1, keepdims=True)
+        
+        spectrum = np.fft.rfft(batch, n=fft_size, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        autocorrelation = np.fft.irfft(power, n=fft_size, axis=1)[:, :max_lag + 2]
+        
+        # m(lag) = sum of x[j]^2 + x[j+lag]^2 over the overlap, from prefix sums
+        energy = np.zeros((len(batch), frame_size + 1))
+        np.cumsum(batch * batch, axis=1, out=energy[:, 1:])
+        overlap_energy = energy[:, frame_size - lags] + energy[:, -1:] - energy[:, lags]
+        nsdf = 2 * autocorrelation / np.maximum(overlap_energy, np.finfo(np.float64).tiny)
+        
+        batch_pitches, batch_confidence = _pick_pitch_peaks(nsdf, min_lag, max_lag, sample_rate)
+        pitches[start:start + len(batch)] = batch_pitches
+        confidence[start:start + len(batch)] = batch_confidence
+    
+    times = (np.arange(len(frames)) * hop_length + frame_size / 2) / sample_rate
+    return {
+        'times': times,
+        'pitches': pitches,
+        'confidence': confidence
+    }
+
+def _pick_pitch_peaks(nsdf, min_lag, max_lag, sample_rate):
+    """
+    Pick the first NSDF peak within PITCH_PEAK_THRESHOLD of the highest one
+    in each row, refined by parabolic interpolation
+    """
+    import numpy as np
+    
+    window = nsdf[:, min_lag - 1:max_lag + 2]
+    center = window[:, 1:-1]
+    is_peak = (center > window[:, :-2]) & (center >= window[:, 2:]) & (center > 0)
+    best = np.where(is_peak, center, 0).max(axis=1, keepdims=True)
+    candidates = is_peak & (center >= PITCH_PEAK_THRESHOLD * best)
+    voiced = candidates.any(axis=1)
+    
+    rows = np.arange(len(nsdf))
+    lag = np.argmax(candidates, axis=1) + min_lag
+    before, peak, after = nsdf[rows, lag - 1], nsdf[rows, lag], nsdf[rows, lag + 1]
+    curvature = before - 2 * peak + after
+    safe_curvature = np.where(np.abs(curvature) > 1e-12, curvature, 1.0)
+    shift = np.where(np.abs(curvature) > 1e-12, 0.5 * (before - after) / safe_curvature, 0.0)
+    
+    pitches = np.where(voiced, sample_rate / (lag + shift), 0.0)
+    confidence = np.where(voiced, np.clip(peak - 0.25 * (before - after) * shift, 0.0, 1.0), 0.0)
+    return pitches, confidence
+
+def detect_pitch(audio_data, sample_rate=None):
     """
-    Detect the fundamental pitch of audio data using autocorrelation
+    Detect the fundamental pitch of audio data as the median of the
+    confidently voiced frames of track_pitch
     """
-    correlation = signal.correlate(audio_data, audio_data, mode='full')
-    correlation = correlation[len(correlation)//2:]
+    _check_sample_rate(audio_data, sample_rate)
+    import numpy as np
     
-    # Find peaks in correlation
-    peaks = signal.find_peaks(correlation)[0]
-    if len(peaks) > 0:
-        fundamental_period = peaks[0]
-        if fundamental_period > 0:
-            return sample_rate / fundamental_period
+    contour = track_pitch(audio_data, sample_rate)
+    voiced = contour['confidence'] >= PITCH_MIN_CONFIDENCE
+    if np.any(voiced):
+        return float(np.median(contour['pitches'][voiced]))
     return None
 
+FEATURE_FIELDS = (
+    'time',
+    'rms',
+    'zero_crossing_rate',
+    'spectral_centroid',
+    'spectral_rolloff',
+    'dominant_frequency'
+)
+
+def _analysis_window(window_type, size):
+    """Periodic analysis window, as used by scipy.signal.stft"""
+    from scipy.signal import get_window
+    return get_window(window_type, size)
+
+def _iter_frame_batches(framed_clips):
+    """
+    Yield float64 batches of ANALYSIS_BATCH_FRAMES frames drawn across clip
+    boundaries, so many short clips share each FFT call
+    """
+    import numpy as np
+    
+    pieces, size = [], 0
+    for frames in framed_clips:
+        start = 0
+        while start < len(frames):
+            take = min(ANALYSIS_BATCH_FRAMES - size, len(frames) - start)
+            pieces.append(frames[start:start + take])
+            size += take
+            start += take
+            if size == ANALYSIS_BATCH_FRAMES:
+                yield np.concatenate(pieces).astype(np.float64)
+                pieces, size = [], 0
+    if pieces:
+        yield np.concatenate(pieces).astype(np.float64)
+
+def _batch_features(batch, window, frequencies, rolloff_percentile):
+    """
+    Compute every per-frame feature of one batch from a single STFT
+    """
+    import numpy as np
+    
+    frame_size = batch.shape[1]
+    rms = np.sqrt(np.einsum('ij,ij->i', batch, batch) / frame_size)
+    signs = np.signbit(batch)
+    zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_size
+    
+    magnitudes = np.abs(np.fft.rfft(batch * window, axis=1))
+    total = magnitudes.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1.0)
+    centroid = np.where(total > 0, magnitudes @ frequencies / safe_total, 0.0)
+    cumulative = np.cumsum(magnitudes, axis=1)
+    rolloff_index = np.argmax(cumulative >= rolloff_percentile * total[:, None], axis=1)
+    rolloff = np.where(total > 0, frequencies[rolloff_index], 0.0)
+    dominant = frequencies[np.argmax(magnitudes, axis=1)]
+    
+    return rms, zero_crossing_rate, centroid, rolloff, dominant
+
 class Timer:
     """
     Context manager for timing operations
+
+    Uses the monotonic time.perf_counter_ns clock. With a stage name the
+    duration is also recorded in that stage's histogram in registry.
     """
-    def __init__(self, operation_name):
+    def __init__(self, operation_name, stage=None, registry=METRICS):
         self.operation_name = operation_name
+        self.stage = stage
+        self.registry = registry
         self.logger = logging.getLogger(__name__)
 
     def __enter__(self):
-        self.start_time = time.time()
         self.logger.info(f"Starting {self.operation_name}")
+        self.start_ns = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end_time = time.time()
-        self.duration = self.end_time - self.start_time
+        self.elapsed_ns = time.perf_counter_ns() - self.start_ns
+        self.duration = self.elapsed_ns / 1e9
+        if self.stage is not None:
+            self.registry.observe(self.stage, self.elapsed_ns)
         self.logger.info(f"{self.operation_name} completed in {self.duration:.2f} seconds")
         
         if exc_type is not None:
@@ -112,27 +406,123 @@ class Timer:
 
 class AudioAnalyzer:
     """
-    Class for analyzing audio features
+    Class for analyzing audio features (loads NumPy on first use)
+
+    The time-domain features also accept a WavSource, which is scanned in
+    PROCESS_CHUNK_FRAMES blocks so large files are never loaded whole.
     """
     @staticmethod
-    def calculate_rms(audio_data):
-        """Calculate Root Mean Square (RMS) amplitude"""
-        return np.sqrt(np.mean(np.square(audio_data)))
+    def calculate_rms(audio_data, axis=None):
+        """
+        Calculate Root Mean Square (RMS) amplitude; with axis=-1 over a 2-D
+        array of frames, one value per frame
+        """
+        import numpy as np
+        if isinstance(audio_data, WavSource):
+            sum_squares = 0.0
+            count = 0
+            for block in audio_data.iter_blocks(PROCESS_CHUNK_FRAMES):
+                block = block.ravel().astype(np.float64)
+                sum_squares += np.dot(block, block)
+                count += block.size
+            return np.sqrt(sum_squares / count) if count else 0.0
+        return np.sqrt(np.mean(np.square(audio_data), axis=axis))
     
     @staticmethod
-    def calculate_zero_crossing_rate(audio_data):
-        """Calculate Zero Crossing Rate"""
-        return np.sum(np.abs(np.diff(np.signbit(audio_data)))) / len(audio_data)
+    def calculate_zero_crossing_rate(audio_data, axis=None):
+        """
+        Calculate Zero Crossing Rate; with axis=-1 over a 2-D array of
+        frames, one value per frame
+        """
+        import numpy as np
+        if isinstance(audio_data, WavSource):
+            crossings = 0
+            previous = None
+            for block in audio_data.iter_blocks(PROCESS_CHUNK_FRAMES):
+                signs = np.signbit(block if block.ndim == 1 else block.mean(axis=1))
+                if previous is not None and signs.size:
+                    crossings += int(previous != signs[0])
+                crossings += np.count_nonzero(signs[1:] != signs[:-1])
+                previous = signs[-1] if signs.size else previous
+            return crossings / len(audio_data) if len(audio_data) else 0.0
+        signs = np.signbit(audio_data)
+        if axis is not None:
+            changes = np.diff(signs, axis=axis)
+            return np.count_nonzero(changes, axis=axis) / signs.shape[axis]
+        return np.count_nonzero(signs[1:] != signs[:-1]) / len(audio_data)
     
     @staticmethod
     def calculate_spectral_centroid(magnitudes, frequencies):
         """Calculate Spectral Centroid"""
+        import numpy as np
         return np.sum(magnitudes * frequencies) / np.sum(magnitudes)
     
     @staticmethod
     def calculate_spectral_rolloff(magnitudes, frequencies, percentile=0.85):
         """Calculate Spectral Rolloff"""
+        import numpy as np
         threshold = np.sum(magnitudes) * percentile
         cumsum = np.cumsum(magnitudes)
         rolloff_index = np.where(cumsum >= threshold)[0][0]
-        return frequencies[rolloff_index]
\ No newline at end of file
+        return frequencies[rolloff_index]
+    
+    @staticmethod
+    def extract_features(audio_data, sample_rate=None, frame_size=FFT_SIZE,
+                         hop_length=HOP_LENGTH, rolloff_percentile=0.85):
+        """
+        Extract RMS, zero crossing rate, spectral centroid, spectral rolloff
+        and dominant frequency for every frame from one framing and STFT pass.
+        Returns a float32 structured array with one row per frame
+        """
+        return AudioAnalyzer.extract_features_batch(
+            [audio_data], sample_rate, frame_size, hop_length, rolloff_percentile
+        )[0]
+    
+    @staticmethod
+    def extract_features_batch(clips, sample_rate=None, frame_size=FFT_SIZE,
+                               hop_length=HOP_LENGTH, rolloff_percentile=0.85):
+        """
+        Extract per-frame features for many clips at once. Frames from all
+        clips are transformed together in ANALYSIS_BATCH_FRAMES batches.
+        Returns one structured array per clip
+        """
+        with METRICS.timer(ANALYSE):
+            return AudioAnalyzer._extract_features_batch(
+                clips, sample_rate, frame_size, hop_length, rolloff_percentile
+            )
+
+    @staticmethod
+    def _extract_features_batch(clips, sample_rate, frame_size, hop_length, rolloff_percentile):
+        import numpy as np
+        
+        framed_clips = []
+        for clip in clips:
+            # Each WavSource reports its own rate; arrays take the batch rate
+            frames, clip_rate = _frame_source(clip, None, frame_size, hop_length)
+            if clip_rate is None:
+                clip_rate = sample_rate
+            if sample_rate is None:
+                sample_rate = clip_rate
+            elif clip_rate != sample_rate:
+                raise ValueError("All clips in a batch must share one sample rate")
+            framed_clips.append(frames)
+        if sample_rate is None:
+            raise ValueError("sample_rate is required for in-memory clips")
+        
+        window = _analysis_window(WINDOW_TYPE, frame_size)
+        frequencies = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        counts = [len(frames) for frames in framed_clips]
+        features = np.zeros(sum(counts), dtype=[(name, np.float32) for name in FEATURE_FIELDS])
+        
+        position = 0
+        for batch in _iter_frame_batches(framed_clips):
+            end = position + len(batch)
+            values = _batch_features(batch, window, frequencies, rolloff_percentile)
+            for name, value in zip(FEATURE_FIELDS[1:], values):
+                features[name][position:end] = value
+            position = end
+        
+        results = np.split(features, np.cumsum(counts)[:-1])
+        for result in results:
+            result['time'] = (np.arange(len(result)) * hop_length + frame_size / 2) / sample_rate
+        return results
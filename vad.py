@@ -0,0 +1,199 @@
+"""
+Voice activity detection for the Voice-to-Music Generator
+(loads NumPy on first use)
+
+Audio is cut into short frames whose RMS and zero-crossing rate are
+computed in one vectorized pass per block with AudioAnalyzer. Frames well
+above the noise floor are speech; quieter frames that cross zero often
+(fricatives such as "s" and "f") are speech too. Runs of speech frames
+separated by less than the hangover become one segment, and each segment
+is handed on as soon as the silence after it closes it.
+"""
+
+import math
+import logging
+from collections import namedtuple
+from config import *
+from utils import AudioAnalyzer
+from wav_source import WavSource
+from metrics import METRICS, ANALYSE
+
+logger = logging.getLogger(__name__)
+
+# start and stop are sample offsets from the beginning of the stream;
+# samples holds that span (padding included) as an int16 array
+SpeechSegment = namedtuple('SpeechSegment', ['start', 'stop', 'samples'])
+
+class VoiceActivityDetector:
+    """
+    Streaming energy and zero-crossing speech detector
+
+    The noise floor is estimated from the quietest frames the first time
+    audio is seen, then tracked from the frames classified as silence. It
+    is kept across reset() and across segments() calls, so a detector
+    reused for many recordings calibrates once.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=VAD_FRAME_MS,
+                 energy_ratio=VAD_ENERGY_RATIO, zcr_threshold=VAD_ZCR_THRESHOLD,
+                 hangover_ms=VAD_HANGOVER_MS, min_speech_ms=VAD_MIN_SPEECH_MS,
+                 padding_ms=VAD_PADDING_MS, noise_floor=None):
+        self.frame_ms = frame_ms
+        self.padding_ms = padding_ms
+        self.set_sample_rate(sample_rate)
+        self.energy_ratio = energy_ratio
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = math.ceil(hangover_ms / frame_ms)
+        self.min_speech_frames = math.ceil(min_speech_ms / frame_ms)
+        self.noise_floor = noise_floor
+        self.reset()
+
+    def set_sample_rate(self, sample_rate):
+        """Switch to audio at another rate; the noise floor is kept"""
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, sample_rate * self.frame_ms // 1000)
+        self.padding = sample_rate * self.padding_ms // 1000
+
+    def reset(self):
+        """Start a new stream; the noise floor is kept"""
+        self.frames = 0
+        self._remainder = None
+        self._history = []
+        self._history_start = 0
+        self._segment_start = None
+        self._speech_end = None
+
+    def frame_features(self, samples):
+        """RMS and zero-crossing rate of every whole frame of samples"""
+        import numpy as np
+
+        count = len(samples) // self.frame_length
+        frames = np.asarray(samples[:count * self.frame_length], dtype=np.float32)
+        frames = frames.reshape(count, self.frame_length)
+        return (AudioAnalyzer.calculate_rms(frames, axis=-1),
+                AudioAnalyzer.calculate_zero_crossing_rate(frames, axis=-1))
+
+    def calibrate(self, samples):
+        """Estimate the noise floor from the quietest tenth of the frames"""
+        rms, _ = self.frame_features(samples)
+        self._calibrate(rms)
+
+    def _calibrate(self, rms):
+        import numpy as np
+
+        floor = float(np.percentile(rms, 10)) if len(rms) else 0.0
+        self.noise_floor = max(VAD_MIN_NOISE_RMS, floor)
+        logger.debug(f"VAD noise floor calibrated to {self.noise_floor:.1f}")
+
+    def classify(self, samples):
+        """
+        Return a boolean speech flag per whole frame of samples, updating
+        the tracked noise floor
+        """
+        import numpy as np
+
+        rms, zcr = self.frame_features(samples)
+        if self.noise_floor is None:
+            self._calibrate(rms)
+        threshold = self.noise_floor * self.energy_ratio
+        speech = (rms > threshold) | ((rms > threshold / 2) & (zcr > self.zcr_threshold))
+
+        silent = rms[~speech]
+        if silent.size:
+            self.noise_floor = max(
+                VAD_MIN_NOISE_RMS,
+                (1 - VAD_NOISE_ADAPTATION) * self.noise_floor + VAD_NOISE_ADAPTATION * float(np.median(silent))
+            )
+        return speech
+
+    def feed(self, block):
+        """
+        Add a block of int16 samples (stereo blocks are averaged); returns
+        the segments closed by it, oldest first
+        """
+        import numpy as np
+
+        block = np.asarray(block)
+        if block.ndim > 1:
+            block = block.mean(axis=1).astype(np.int16)
+        if self._remainder is not None and len(self._remainder):
+            block = np.concatenate((self._remainder, block))
+        count = len(block) // self.frame_length
+        whole = count * self.frame_length
+        self._remainder = block[whole:]
+        if not count:
+            return []
+        self._history.append(block[:whole])
+
+        with METRICS.timer(ANALYSE):
+            speech = self.classify(block[:whole])
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], speech, [False])))) + self.frames
+        self.frames += count
+
+        closed = []
+        for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            if self._segment_start is not None and start - self._speech_end <= self.hangover_frames:
+                self._speech_end = stop
+                continue
+            if self._segment_start is not None:
+                closed.extend(self._close())
+            self._segment_start = start
+            self._speech_end = stop
+        if self._segment_start is not None and self.frames - self._speech_end > self.hangover_frames:
+            closed.extend(self._close())
+        self._trim_history()
+        return closed
+
+    def flush(self):
+        """End the stream, returning the segment still open if any"""
+        closed = self._close() if self._segment_start is not None else []
+        self.reset()
+        return closed
+
+    def _close(self):
+        start_frame, end_frame = self._segment_start, self._speech_end
+        self._segment_start = self._speech_end = None
+        if end_frame - start_frame < self.min_speech_frames:
+            return []
+
+        import numpy as np
+
+        start = max(0, start_frame * self.frame_length - self.padding)
+        stop = min(self.frames * self.frame_length, end_frame * self.frame_length + self.padding)
+        history = np.concatenate(self._history) if len(self._history) > 1 else self._history[0]
+        self._history = [history]
+        samples = history[start - self._history_start:stop - self._history_start].copy()
+        METRICS.increment('speech_segments')
+        return [SpeechSegment(start, stop, samples)]
+
+    def _trim_history(self):
+        """Drop buffered audio that no open or future segment can reach"""
+        if self._segment_start is not None:
+            keep_from = self._segment_start * self.frame_length - self.padding
+        else:
+            keep_from = self.frames * self.frame_length - self.padding
+        while self._history and self._history_start + len(self._history[0]) <= keep_from:
+            self._history_start += len(self._history.pop(0))
+
+    def segments(self, audio, block_frames=PROCESS_CHUNK_FRAMES):
+        """
+        Yield the speech segments of a recording as each one closes
+
+        audio is a WAV path, a WavSource or an int16 array at the
+        detector's sample rate; files are read block by block through a
+        memory map, and the detector follows their sample rate.
+        """
+        if isinstance(audio, str):
+            with WavSource(audio) as source:
+                yield from self.segments(source, block_frames)
+            return
+        if isinstance(audio, WavSource):
+            if audio.sample_rate != self.sample_rate:
+                self.set_sample_rate(audio.sample_rate)
+            blocks = audio.iter_blocks(block_frames)
+        else:
+            blocks = (audio[start:start + block_frames] for start in range(0, len(audio), block_frames))
+
+        self.reset()
+        for block in blocks:
+            yield from self.feed(block)
+        yield from self.flush()
@@ -0,0 +1,160 @@
+"""
+Memory-mapped WAV reader for the Voice-to-Music Generator
+Using only Python standard library (NumPy views are used when installed)
+"""
+
+import os
+import mmap
+import struct
+import logging
+import importlib.util
+from config import *
+
+logger = logging.getLogger(__name__)
+
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, sample width) -> (NumPy dtype, memoryview format)
+SAMPLE_FORMATS = {
+    (WAVE_FORMAT_PCM, 1): ('u1', 'B'),
+    (WAVE_FORMAT_PCM, 2): ('<i2', 'h'),
+    (WAVE_FORMAT_PCM, 4): ('<i4', 'i'),
+    (WAVE_FORMAT_IEEE_FLOAT, 4): ('<f4', 'f'),
+    (WAVE_FORMAT_IEEE_FLOAT, 8): ('<f8', 'd')
+}
+
+class WavSource:
+    """
+    Read-only, zero-copy view of the PCM payload of a WAV file
+
+    The RIFF header is parsed once and the file is memory-mapped, so
+    samples() and slicing return views into the page cache instead of
+    copies. Keep the source open for as long as any view is in use.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._parse_header()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        logger.debug(f"Opened {path}: {self.frames} frames at {self.sample_rate} Hz")
+
+    def _parse_header(self):
+        riff, _, wave_id = struct.unpack('<4sL4s', self._file.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{self.path} is not a RIFF/WAVE file")
+
+        file_size = os.fstat(self._file.fileno()).st_size
+        fmt = None
+        while True:
+            chunk_header = self._file.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"{self.path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sL', chunk_header)
+
+            if chunk_id == b'fmt ':
+                fmt = self._file.read(chunk_size)
+                self._file.seek(chunk_size & 1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"{self.path} has a data chunk before its fmt chunk")
+                self.data_offset = self._file.tell()
+                # Streamed writers may leave the size unset (0 or 0xFFFFFFFF);
+                # the data then runs to the end of the file
+                if chunk_size in (0, 0xFFFFFFFF):
+                    chunk_size = file_size - self.data_offset
+                self.data_size = min(chunk_size, file_size - self.data_offset)
+                break
+            else:
+                self._file.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+        format_tag, self.channels, self.sample_rate, _, self.block_align, bits = \
+            struct.unpack('<HHLLHH', fmt[:16])
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            format_tag = struct.unpack('<H', fmt[24:26])[0]
+        self.format_tag = format_tag
+        self.sample_width = bits // 8
+        self.frames = self.data_size // self.block_align
+
+    @property
+    def duration(self):
+        """Length in seconds"""
+        return self.frames / self.sample_rate
+
+    def _sample_format(self):
+        sample_format = SAMPLE_FORMATS.get((self.format_tag, self.sample_width))
+        if sample_format is None:
+            raise ValueError(
+                f"Unsupported sample format {self.format_tag} with {8 * self.sample_width}-bit samples"
+            )
+        return sample_format
+
+    def samples(self, start=0, stop=None):
+        """
+        Return frames [start, stop) without copying
+
+        With NumPy this is a read-only array of shape (frames,) for mono or
+        (frames, channels) otherwise; without NumPy it is a flat memoryview.
+        """
+        start, stop, _ = slice(start, stop).indices(self.frames)
+        stop = max(start, stop)
+        dtype, view_format = self._sample_format()
+        offset = self.data_offset + start * self.block_align
+
+        if HAVE_NUMPY:
+            import numpy as np
+            data = np.frombuffer(self._mmap, dtype=dtype, count=(stop - start) * self.channels,
+                                 offset=offset)
+            return data.reshape(-1, self.channels) if self.channels > 1 else data
+
+        return memoryview(self._mmap)[offset:self.data_offset + stop * self.block_align].cast(view_format)
+
+    def raw(self, start=0, stop=None):
+        """
+        Return the bytes of frames [start, stop) as a memoryview, without
+        copying; works for every sample format, including 24-bit PCM
+        """
+        start, stop, _ = slice(start, stop).indices(self.frames)
+        stop = max(start, stop)
+        return memoryview(self._mmap)[self.data_offset + start * self.block_align:
+                                      self.data_offset + stop * self.block_align]
+
+    def iter_blocks(self, block_frames):
+        """Yield consecutive zero-copy views of at most block_frames frames"""
+        for start in range(0, self.frames, block_frames):
+            yield self.samples(start, start + block_frames)
+
+    def __len__(self):
+        return self.frames
+
+    def __getitem__(self, key):
+        if isinstance(key, slice) and key.step in (None, 1):
+            return self.samples(key.start or 0, key.stop)
+        return self.samples()[key]
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.samples()
+        return data if dtype is None else data.astype(dtype)
+
+    def close(self):
+        """Release the memory map and file handle"""
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views are still alive; the map is released once they are collected
+            logger.debug(f"Deferring unmap of {self.path} until its views are released")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False